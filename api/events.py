@@ -0,0 +1,132 @@
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import itertools
+import json
+import threading
+import time
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class EventBroker:
+    """
+    Fan-out of contract state changes to Server-Sent Events subscribers.
+
+    publish() may be called from any thread (ingestion workers); events are
+    handed to each subscriber's event loop. The last `history` events are
+    kept so a reconnecting client can resume from its Last-Event-ID instead
+    of re-fetching the whole contract list.
+    """
+    def __init__(self, history: int = 1000, queue_size: int = 1000):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._history = deque(maxlen=history)
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self.queue_size = queue_size
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            event = {"id": next(self._ids), "type": event_type, "time": time.time(), "data": data}
+            self._history.append(event)
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Loop already closed; the subscriber is going away
+                self.unsubscribe(queue)
+        return event["id"]
+
+    def _deliver(self, queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: drop what it has not read and tell it to resync
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self._reset_event())
+
+    def _reset_event(self) -> dict:
+        return {"id": None, "type": "reset", "time": time.time(), "data": {}}
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[asyncio.Queue, List[dict]]:
+        """
+        Registers a subscriber on the running event loop. Returns its queue and
+        the backlog of events after last_event_id (or a single 'reset' event
+        if that point is no longer in the history).
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+            history = list(self._history)
+
+        backlog = []
+        if last_event_id is not None:
+            oldest = history[0]["id"] if history else None
+            if oldest is not None and last_event_id < oldest - 1:
+                backlog = [self._reset_event()]
+            else:
+                backlog = [e for e in history if e["id"] > last_event_id]
+        return queue, backlog
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+class AwaitableEvent(threading.Event):
+    """
+    threading.Event that coroutines can also wait on without holding a
+    threadpool worker: set() wakes them through their own event loops.
+    """
+    def __init__(self):
+        super().__init__()
+        self._waiters_lock = threading.Lock()
+        self._waiters: Dict[asyncio.Future, asyncio.AbstractEventLoop] = {}
+
+    def set(self):
+        with self._waiters_lock:
+            super().set()
+            waiters, self._waiters = self._waiters, {}
+        for future, loop in waiters.items():
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # Loop already closed; nobody is waiting any more
+                pass
+
+    async def wait_async(self, timeout: Optional[float] = None) -> bool:
+        """Like wait(), for coroutines; returns False on timeout."""
+        if self.is_set():
+            return True
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._waiters_lock:
+            if self.is_set():
+                return True
+            self._waiters[future] = loop
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._waiters_lock:
+                self._waiters.pop(future, None)
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(True)
+
+def format_sse(event: dict) -> str:
+    lines = []
+    if event.get("id") is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'], default=str)}")
+    return "\n".join(lines) + "\n\n"
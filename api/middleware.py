@@ -0,0 +1,36 @@
+import re
+import uuid
+from utils.logger import request_id
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Accept caller-supplied IDs (e.g. from a proxy) only if they are short and plain
+_VALID_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+class RequestIdMiddleware:
+    """
+    Gives every HTTP request a correlation ID: the caller's X-Request-ID if
+    it looks sane, otherwise a new one. It is set for the request's log
+    lines (and the ingestion job it queues) and echoed in the response.
+    Plain ASGI rather than BaseHTTPMiddleware, which would add a task per
+    request and buffer streaming responses.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        rid = incoming if _VALID_ID.match(incoming) else uuid.uuid4().hex[:16]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER, rid.encode())]
+            await send(message)
+
+        token = request_id.set(rid)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
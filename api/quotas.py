@@ -0,0 +1,226 @@
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+import hashlib
+import math
+import threading
+import time
+from utils.llm_client import TokenBucket
+
+CHAT = "chat"
+UPLOAD = "upload"
+KINDS = (CHAT, UPLOAD)
+
+class QuotaExceeded(Exception):
+    """Raised when a caller is over its rate, concurrency cap or quota."""
+    def __init__(self, kind: str, reason: str, retry_after: int):
+        if reason == "size":
+            super().__init__(f"{kind} request costs more than the per-minute {kind} limit allows")
+        else:
+            super().__init__(f"{kind} {reason} limit reached, retry after {retry_after}s")
+        self.kind = kind
+        self.reason = reason
+        self.retry_after = retry_after
+
+@dataclass
+class KeyLimits:
+    # Requests per minute (token bucket, bursts up to one minute's worth); 0 = unlimited
+    chat_per_minute: float = 0
+    upload_per_minute: float = 0
+    # Requests in flight at once (uploads: queued or running ingestion jobs); 0 = unlimited
+    max_concurrent_chats: int = 0
+    max_concurrent_uploads: int = 0
+    # Remaining absolute allowance, counted down per request; None = unlimited
+    chat_quota: Optional[int] = None
+    upload_quota: Optional[int] = None
+
+def key_id(api_key: str) -> str:
+    """Stable, non-secret identifier of an API key for admin endpoints and logs."""
+    return "key-" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+class _KeyState:
+    def __init__(self, limits: KeyLimits, now: float):
+        self.lock = threading.Lock()
+        self.limits = limits
+        self.buckets = {
+            CHAT: TokenBucket(limits.chat_per_minute),
+            UPLOAD: TokenBucket(limits.upload_per_minute),
+        }
+        self.in_flight = {kind: 0 for kind in KINDS}
+        self.counters = {kind: {"requests": 0, "rejected_rate": 0, "rejected_concurrency": 0, "rejected_quota": 0}
+                         for kind in KINDS}
+        self.last_seen = now
+        # Limits changed by an admin; such callers are never forgotten
+        self.customized = False
+
+    def cap(self, kind: str) -> int:
+        return self.limits.max_concurrent_chats if kind == CHAT else self.limits.max_concurrent_uploads
+
+class Lease:
+    """
+    An admitted request: a held concurrency slot and the rate and quota it
+    was charged. release() is idempotent; refund() gives back part
+    or all of the charge for work that turned out not to be done.
+    """
+    def __init__(self, manager: "QuotaManager", identity: str, kind: str, cost: int = 0):
+        self._manager = manager
+        self.identity = identity
+        self.kind = kind
+        self.cost = cost
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._manager._release(self.identity, self.kind)
+
+    def refund(self, amount: int = None):
+        amount = self.cost if amount is None else min(amount, self.cost)
+        if amount > 0:
+            self.cost -= amount
+            self._manager._refund(self.identity, self.kind, amount)
+
+    def cancel(self):
+        """The request was rejected after admission: refund everything and free the slot."""
+        self.refund()
+        self.release()
+
+class QuotaManager:
+    """
+    Per-caller token buckets, concurrency caps and quotas for chat and
+    upload. Each check takes only that caller's lock, so callers never
+    contend with each other; the shared lock is held only to create the
+    state for a caller seen for the first time and to forget callers idle
+    for idle_seconds (anonymous clients come and go by IP).
+    """
+    def __init__(self, defaults: KeyLimits, busy_retry_after: int = 1, idle_seconds: float = 600,
+                 clock=time.monotonic):
+        self.defaults = defaults
+        self.busy_retry_after = busy_retry_after
+        # Longer than a bucket takes to refill, so forgetting a caller never resets a depleted bucket early
+        self.idle_seconds = max(idle_seconds, 60)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._keys: Dict[str, _KeyState] = {}
+        self._swept = clock()
+        # Callers that are never limited (e.g. the admin key); still counted
+        self.unlimited = set()
+
+    def _state(self, identity: str) -> _KeyState:
+        state = self._keys.get(identity)
+        if state is None:
+            with self._lock:
+                state = self._keys.get(identity)
+                if state is None:
+                    now = self.clock()
+                    if now - self._swept > self.idle_seconds / 10:
+                        self._sweep(now)
+                    limits = KeyLimits() if identity in self.unlimited else KeyLimits(**asdict(self.defaults))
+                    state = self._keys[identity] = _KeyState(limits, now)
+        return state
+
+    def _sweep(self, now: float):
+        """Forgets idle callers with nothing in flight and default limits. Holds self._lock."""
+        self._swept = now
+        for identity, state in list(self._keys.items()):
+            if (now - state.last_seen > self.idle_seconds and not state.customized
+                    and not any(state.in_flight.values())):
+                del self._keys[identity]
+
+    def _check_charge(self, state: _KeyState, kind: str, cost: int):
+        counters = state.counters[kind]
+        quota = getattr(state.limits, f"{kind}_quota")
+        if quota is not None and quota < cost:
+            counters["rejected_quota"] += 1
+            # Only an admin can top it up; tell clients to back off for a while
+            raise QuotaExceeded(kind, "quota", 3600)
+        bucket = state.buckets[kind]
+        if bucket.enabled and cost > bucket.capacity:
+            # More than a minute's worth at once can never be admitted (the bucket would clamp it)
+            counters["rejected_rate"] += 1
+            raise QuotaExceeded(kind, "size", 0)
+        wait = bucket.wait_time(cost)
+        if wait > 0:
+            counters["rejected_rate"] += 1
+            raise QuotaExceeded(kind, "rate", max(1, math.ceil(wait)))
+
+    def _check_slot(self, state: _KeyState, kind: str, retry_after: int = None):
+        cap = state.cap(kind)
+        if cap and state.in_flight[kind] >= cap:
+            state.counters[kind]["rejected_concurrency"] += 1
+            raise QuotaExceeded(kind, "concurrency", retry_after or self.busy_retry_after)
+
+    def _take(self, state: _KeyState, kind: str, cost: int):
+        state.buckets[kind].take(cost)
+        quota_field = f"{kind}_quota"
+        quota = getattr(state.limits, quota_field)
+        if quota is not None:
+            setattr(state.limits, quota_field, quota - cost)
+
+    def admit(self, identity: str, kind: str, cost: int = 1, retry_after: int = None) -> Lease:
+        """
+        Checks quota, rate and the concurrency cap together and only then
+        charges the caller and takes a slot, so a rejected request costs
+        nothing. Raises QuotaExceeded.
+        """
+        state = self._state(identity)
+        with state.lock:
+            state.last_seen = self.clock()
+            state.counters[kind]["requests"] += 1
+            self._check_charge(state, kind, cost)
+            self._check_slot(state, kind, retry_after)
+            self._take(state, kind, cost)
+            state.in_flight[kind] += 1
+        return Lease(self, identity, kind, cost)
+
+    def _release(self, identity: str, kind: str):
+        state = self._state(identity)
+        with state.lock:
+            state.in_flight[kind] = max(0, state.in_flight[kind] - 1)
+
+    def _refund(self, identity: str, kind: str, amount: int):
+        state = self._state(identity)
+        with state.lock:
+            state.buckets[kind].adjust(-amount)
+            quota_field = f"{kind}_quota"
+            quota = getattr(state.limits, quota_field)
+            if quota is not None:
+                setattr(state.limits, quota_field, quota + amount)
+
+    def update(self, identity: str, reset_counters: bool = False, **limits) -> dict:
+        """
+        Changes a caller's limits at runtime. None values are left as they
+        are; a negative chat_quota/upload_quota makes that quota unlimited.
+        """
+        state = self._state(identity)
+        with state.lock:
+            state.customized = True
+            for name, value in limits.items():
+                if value is None:
+                    continue
+                if name.endswith("_quota") and value < 0:
+                    value = None
+                setattr(state.limits, name, value)
+            if limits.get("chat_per_minute") is not None:
+                state.buckets[CHAT] = TokenBucket(state.limits.chat_per_minute)
+            if limits.get("upload_per_minute") is not None:
+                state.buckets[UPLOAD] = TokenBucket(state.limits.upload_per_minute)
+            if reset_counters:
+                for counters in state.counters.values():
+                    for name in counters:
+                        counters[name] = 0
+        return self.snapshot(identity)
+
+    def snapshot(self, identity: str) -> dict:
+        state = self._state(identity)
+        with state.lock:
+            return {
+                "key_id": identity,
+                "limits": asdict(state.limits),
+                "in_flight": dict(state.in_flight),
+                "counters": {kind: dict(c) for kind, c in state.counters.items()},
+            }
+
+    def snapshots(self) -> list:
+        with self._lock:
+            identities = list(self._keys)
+        return [self.snapshot(identity) for identity in identities]
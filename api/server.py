@@ -1,7 +1,9 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Depends, Body
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Body, Header, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from fastapi.responses import StreamingResponse, Response
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Tuple
 import shutil
 import os
 import uuid
@@ -9,19 +11,35 @@ import io
 import tempfile
 import logging
 import re
+import json
+import time
+import hashlib
+import threading
+import itertools
 import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Re-use existing engines
 from ingestion.pdf_loader import PDFLoader
-from rag_engine.vector_store import RAGEngine
+from ingestion.work_queue import IngestionQueue, QueueFullError
+from ingestion.bulk import BulkIngestor, BulkItem, read_manifest
+from rag_engine.vector_store import RAGEngine, check_embedding_model
+from rag_engine.segments import SegmentStore
 from metadata_extractor.extractor import MetadataExtractor, ContractMetadata
 from chat_engine.core import ChatEngine
+from chat_engine.router import QueryRouter
 from config.settings import settings
-from utils.logger import setup_logger
-from api.auth import get_api_key, get_admin_key, add_api_key
-from langchain_community.embeddings import FakeEmbeddings
-from langchain_community.chat_models import FakeListChatModel
-import requests
+from utils.logger import setup_logger, dropped_records
+from utils.llm_client import get_llm, registry as llm_registry, PRIORITY_CHAT, PRIORITY_BACKGROUND
+from api.auth import get_api_key, get_admin_key, add_api_key, valid_api_keys
+from api.quotas import QuotaManager, QuotaExceeded, KeyLimits, Lease, key_id, CHAT, UPLOAD
+from api.events import AwaitableEvent, EventBroker, format_sse
+from api.middleware import RequestIdMiddleware
+from rag_engine.hashing_embeddings import HashingEmbeddings, _bucket as hashing_feature_cache
+from utils.fake_llm import FakeChatModel
+from utils.metrics import registry as metrics_registry
+from utils.profiling import ProfileStore, ProfileSession, bind as bind_profile
 
 logger = setup_logger(__name__)
 
@@ -30,6 +48,7 @@ app = FastAPI(title="AI Contract Chatbot API")
 def validate_openai_api_key(api_key: str, model: str) -> bool:
     if not api_key:
         return False
+    import requests
     try:
         response = requests.post(
             "https://api.openai.com/v1/chat/completions",
@@ -50,24 +69,51 @@ def validate_openai_api_key(api_key: str, model: str) -> bool:
         logger.warning(f"OpenAI API Key validation failed: {e}")
         return False
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting up API Server...")
+# Cleared while a warm-up is running; engine-backed requests wait on it
+warm_up_done = AwaitableEvent()
+warm_up_done.set()
+warm_up_seconds: Optional[float] = None
+
+def warm_up():
+    """
+    Builds the engines: validates the OpenAI key, loads the embedding model
+    and any persisted index. Runs on a background thread so the server
+    answers health checks and contract listings while it warms up.
+    """
+    global warm_up_seconds
+    started = time.perf_counter()
+    try:
+        _init_engines()
+        if settings.SHARED_INDEX_DIR:
+            start_shared_index(settings.SHARED_INDEX_DIR)
+        elif settings.INDEX_DIR:
+            load_persisted_index(settings.INDEX_DIR)
+    finally:
+        warm_up_seconds = round(time.perf_counter() - started, 3)
+        warm_up_done.set()
+        logger.info(f"Engines ready after {warm_up_seconds}s warm-up")
+
+def _server_engine(embeddings=None) -> RAGEngine:
+    """The engine serving chat, with the configured memory budget."""
+    return RAGEngine(embeddings=embeddings, memory_budget_mb=settings.MEMORY_BUDGET_MB,
+                     cold_dir=settings.COLD_INDEX_DIR or None)
 
-    # Initialize Engines
+def _init_engines():
     try:
+        if settings.MOCK_MODE:
+            raise ValueError("MOCK_MODE is set")
         if settings.OPENAI_API_KEY:
             # Validate Key First!
-            loop = asyncio.get_event_loop()
             # Pass the configured model for validation to ensure both key and model access are valid
-            is_valid = await loop.run_in_executor(None, validate_openai_api_key, settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
+            is_valid = validate_openai_api_key(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
 
             if not is_valid:
                 raise ValueError("Invalid OpenAI API Key (validation failed)")
 
             logger.info("Initializing RAG Engine with OpenAI...")
-            state.rag_engine = RAGEngine()
+            state.rag_engine = _server_engine()
             state.chat_engine = ChatEngine(state.rag_engine)
+            state.metadata_extractor = None
             logger.info("Engines initialized successfully")
         else:
             raise ValueError("OPENAI_API_KEY not set")
@@ -81,16 +127,46 @@ async def startup_event():
         logger.warning("Please set OPENAI_API_KEY in your .env file.")
         logger.warning("----------------------------------------------------------------")
 
-        # Switch to Mock Mode
-        fake_embeddings = FakeEmbeddings(size=384)
-        fake_llm = FakeListChatModel(responses=[
-            "I am running in MOCK MODE because a valid OpenAI API Key was not found. "
-            "I cannot analyze the PDF content, but the system is functional for demonstration purposes. "
-            "Please set OPENAI_API_KEY in your .env file to use the full features."
-        ])
+        # Switch to Mock Mode: deterministic local embeddings (retrieval still
+        # works) and a fake LLM whose latency can be tuned for load tests
+        fake_embeddings = HashingEmbeddings(size=384)
+        fake_llm = FakeChatModel(
+            responses=[
+                "I am running in MOCK MODE because a valid OpenAI API Key was not found. "
+                "I cannot analyze the PDF content, but the system is functional for demonstration purposes. "
+                "Please set OPENAI_API_KEY in your .env file to use the full features."
+            ],
+            first_token_latency=settings.MOCK_LLM_LATENCY,
+            tokens_per_second=settings.MOCK_LLM_TOKENS_PER_SECOND,
+        )
 
-        state.rag_engine = RAGEngine(embeddings=fake_embeddings)
+        state.rag_engine = _server_engine(embeddings=fake_embeddings)
         state.chat_engine = ChatEngine(state.rag_engine, llm=fake_llm)
+        # Rule-based metadata extraction still works without an LLM
+        state.metadata_extractor = MetadataExtractor(use_llm=False)
+
+def _mock_embeddings() -> bool:
+    return state.rag_engine is not None and isinstance(state.rag_engine.embeddings, HashingEmbeddings)
+
+def _llm_mode() -> str:
+    # Key rotation can give a mock-mode index (hashing embeddings) a real LLM
+    return "mock" if isinstance(state.chat_engine.llm, FakeChatModel) else "openai"
+
+async def require_engines():
+    """
+    Holds engine-backed requests until warm-up finishes; 503 if it takes too
+    long. Waits on the event loop, so waiting requests do not use up the
+    threadpool that health checks and other endpoints run on.
+    """
+    if not await warm_up_done.wait_async(timeout=settings.WARMUP_WAIT_SECONDS) or state.chat_engine is None:
+        raise HTTPException(status_code=503, detail="Engines are warming up", headers={"Retry-After": "5"})
+
+@app.on_event("startup")
+async def startup_event():
+    logger.info("Starting up API Server...")
+    # Key validation and model loading happen off the startup path
+    warm_up_done.clear()
+    threading.Thread(target=warm_up, name="engine-warm-up", daemon=True).start()
 
     # Check for OCR tools
     if not shutil.which("tesseract"):
@@ -98,6 +174,31 @@ async def startup_event():
     if not shutil.which("pdftoppm"): # pdftoppm is part of poppler-utils
         logger.warning("WARNING: 'pdftoppm' executable not found. OCR for scanned PDFs will fail. Install poppler-utils.")
 
+# Probes are async: they only read state and must answer even when the threadpool is busy
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: engines are built and any persisted index is loaded."""
+    if not warm_up_done.is_set() or state.chat_engine is None:
+        return Response(
+            content=json.dumps({"status": "warming_up"}),
+            status_code=503,
+            media_type="application/json",
+        )
+    return {"status": "ready", "llm": _llm_mode(), "embeddings": state.rag_engine.embedding_model,
+            "warm_up_seconds": warm_up_seconds}
+
+@app.get("/metrics")
+def metrics():
+    """Pipeline metrics in the Prometheus text format (per process)."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Allow CORS for React Frontend (usually runs on port 3000)
 app.add_middleware(
     CORSMiddleware,
@@ -105,17 +206,105 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Request-ID"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 # Global State (In-Memory)
 class AppState:
     rag_engine = None
     chat_engine = None
+    metadata_extractor = None
     metadata_store: List[dict] = []
-    processed_files = set()
     processing_files: Dict[str, dict] = {}
+    # sha256 of the uploaded bytes -> contract ID (processed or processing)
+    content_hashes: Dict[str, str] = {}
+    batches: Dict[str, dict] = {}
+    # Bumped on every change to the contract list; backs the /api/contracts ETag
+    version: int = 0
+    # Multi-worker mode: shared on-disk segments and what this process has loaded
+    segment_store: Optional[SegmentStore] = None
+    index_version: int = 0
+    loaded_segments: Dict[str, tuple] = {}
 
 state = AppState()
+_versions = itertools.count(1)
+# Contract state changes pushed to /api/events subscribers
+events = EventBroker(history=settings.EVENT_HISTORY)
+# Serializes reloads of the shared index within this process
+segment_lock = threading.Lock()
+# Held while this process runs a background segment compaction
+compaction_lock = threading.Lock()
+# Makes the duplicate check and the registration of a new upload atomic
+upload_lock = threading.Lock()
+# Swaps the chat and metadata LLM clients together on key rotation
+llm_lock = threading.Lock()
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Per-caller rate limits, concurrency caps and quotas, adjustable from /api/admin/quotas
+quotas = QuotaManager(KeyLimits(
+    chat_per_minute=settings.RATE_LIMIT_CHAT_PER_MINUTE,
+    upload_per_minute=settings.RATE_LIMIT_UPLOAD_PER_MINUTE,
+    max_concurrent_chats=settings.MAX_CONCURRENT_CHATS_PER_KEY,
+    max_concurrent_uploads=settings.MAX_CONCURRENT_UPLOADS_PER_KEY,
+))
+quotas.unlimited.add("admin")
+# Profiles of admin-flagged requests, fetched from /api/admin/profiles
+profiles = ProfileStore(max_profiles=settings.PROFILE_HISTORY)
+# Dedicated ingestion workers; uploads never run on the request threadpool
+state.ingestion_queue = IngestionQueue(
+    workers=settings.INGEST_WORKERS,
+    max_depth=settings.INGEST_MAX_QUEUE,
+    size_rate=settings.INGEST_SIZE_PRIORITY_RATE,
+)
+# Reads state.metadata_store lazily so it always sees the current list
+state.query_router = QueryRouter(lambda: state.metadata_store)
+
+def _index_vectors() -> int:
+    engine = state.rag_engine
+    if engine is None:
+        return 0
+    return engine.vector_count
+
+def _memory_stats() -> dict:
+    engine = state.rag_engine
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Engines not initialized")
+    return engine.memory_stats()
+
+# Gauges are evaluated when /metrics is scraped, never on the request path
+metrics_registry.gauge("chatbot_ingestion_queue_depth", "Uploads waiting for an ingestion worker",
+                       fn=lambda: state.ingestion_queue.stats()["depth"])
+metrics_registry.gauge("chatbot_ingestion_queue_active", "Ingestion jobs running",
+                       fn=lambda: state.ingestion_queue.stats()["active"])
+metrics_registry.gauge("chatbot_ingestion_queue_oldest_wait_seconds", "How long the oldest queued upload has waited",
+                       fn=lambda: state.ingestion_queue.stats()["oldest_wait_seconds"])
+metrics_registry.gauge("chatbot_index_vectors", "Chunks in the FAISS index (all segments)", fn=_index_vectors)
+metrics_registry.gauge("chatbot_index_contracts", "Contracts in RAM (hot) and evicted to disk (cold); hot is only tracked with a memory budget",
+                       labels=("tier",),
+                       fn=lambda: {("hot",): _memory_stats()["hot"].get("contracts", 0),
+                                   ("cold",): _memory_stats()["cold"]["contracts"]})
+metrics_registry.gauge("chatbot_index_hot_estimated_bytes", "Estimated RAM of hot contracts, compared with MEMORY_BUDGET_MB",
+                       fn=lambda: _memory_stats()["hot"].get("estimated_bytes", 0))
+metrics_registry.gauge("chatbot_index_cold_disk_bytes", "Size of the cold segment files",
+                       fn=lambda: _memory_stats()["cold"]["disk_bytes"])
+metrics_registry.gauge("chatbot_index_evicted_contracts_total", "Contracts evicted to disk by the memory budget",
+                       fn=lambda: _memory_stats()["evictions"]["contracts"])
+metrics_registry.gauge("chatbot_index_cold_searches_total", "Searches that read cold segments",
+                       fn=lambda: _memory_stats()["cold_searches"])
+metrics_registry.gauge("chatbot_index_segments", "Shared index segments loaded by this process",
+                       fn=lambda: len(state.loaded_segments))
+metrics_registry.gauge("chatbot_contracts", "Contracts known to this process, by status", labels=("status",),
+                       fn=lambda: {("processed",): len(state.metadata_store), ("processing",): len(state.processing_files)})
+metrics_registry.gauge("chatbot_event_subscribers", "Open /api/events streams", fn=lambda: events.subscriber_count)
+UPLOADS = metrics_registry.counter("chatbot_uploads_total", "Uploaded files; 'duplicate' were answered from the content hash cache", labels=("result",))
+QUOTA_REJECTIONS = metrics_registry.counter("chatbot_quota_rejections_total", "Requests rejected with 429 by per-caller limits", labels=("kind", "reason"))
+CHAT_ROUTES = metrics_registry.counter("chatbot_chat_requests_total", "Chat requests; 'router' were answered from metadata without RAG or LLM", labels=("route",))
+metrics_registry.counter("chatbot_log_records_dropped_total", "Log records dropped because the log writer fell behind",
+                         fn=dropped_records)
+metrics_registry.counter("chatbot_embedding_feature_cache_hits_total", "Hashing embeddings feature cache hits (mock mode)",
+                         fn=lambda: hashing_feature_cache.cache_info().hits)
+metrics_registry.counter("chatbot_embedding_feature_cache_misses_total", "Hashing embeddings feature cache misses (mock mode)",
+                         fn=lambda: hashing_feature_cache.cache_info().misses)
 
 # Request Models
 class ChatRequest(BaseModel):
@@ -126,79 +315,438 @@ class ChatResponse(BaseModel):
     answer: str
     sources: List[str]
 
+class BatchChatRequest(BaseModel):
+    questions: List[str]
+    contract_ids: Optional[List[str]] = None
+    max_concurrency: Optional[int] = None
+
 class ContractResponse(BaseModel):
     id: str
     filename: str
     metadata: Optional[ContractMetadata]
     status: str = "processed"
+    stage: Optional[str] = None
+    queue_position: Optional[int] = None
+    progress: Optional[Dict[str, int]] = None
+    timings: Optional[Dict[str, float]] = None
 
 class APIKeyResponse(BaseModel):
     api_key: str
     message: str
+    key_id: Optional[str] = None
+
+class QuotaUpdate(BaseModel):
+    chat_per_minute: Optional[float] = Field(None, ge=0)
+    upload_per_minute: Optional[float] = Field(None, ge=0)
+    max_concurrent_chats: Optional[int] = Field(None, ge=0)
+    max_concurrent_uploads: Optional[int] = Field(None, ge=0)
+    # Remaining requests; negative = unlimited
+    chat_quota: Optional[int] = None
+    upload_quota: Optional[int] = None
+    reset_counters: bool = False
+
+# LLM metadata calls are network-bound, so they run here while the
+# background task thread does the CPU-bound splitting and embedding.
+metadata_executor = ThreadPoolExecutor(max_workers=settings.METADATA_WORKERS, thread_name_prefix="metadata")
+
+def _bump_version():
+    state.version = next(_versions)
+
+def _publish_contract(item: dict, **extra):
+    # Only what a client needs to patch its list; never the whole store
+    meta = item.get("metadata")
+    data = {
+        "id": item["id"],
+        "filename": item["filename"],
+        "status": item.get("status", "processed"),
+        "stage": item.get("stage"),
+        "error": item.get("error"),
+        "metadata": meta.model_dump() if meta is not None else None,
+    }
+    data.update(extra)
+    _bump_version()
+    events.publish("contract", data)
+
+def _update_task(contract_id: str, **fields):
+    task = state.processing_files.get(contract_id)
+    if task is not None:
+        task.update(fields)
+        _publish_contract(task)
 
-def process_contract_background(file_path: str, filename: str, contract_id: str):
-    logger.info(f"Starting background processing for {filename} (ID: {contract_id})")
+def _report_page_progress(contract_id: str):
+    last = [0.0]
+
+    def progress(page: int, pages: int):
+        # Throttled: at most a few events per second per contract
+        now = time.monotonic()
+        if page == pages or now - last[0] >= settings.PROGRESS_EVENT_INTERVAL:
+            last[0] = now
+            _update_task(contract_id, progress={"page": page, "pages": pages})
+    return progress
+
+def _mark_failed(contract_id: str, error: str):
+    task = state.processing_files.get(contract_id)
+    if task is None:
+        return
+    task["status"] = "failed"
+    task["error"] = error
+    # Let the same bytes be uploaded again
+    content_hash = task.get("content_hash")
+    if content_hash and state.content_hashes.get(content_hash) == contract_id:
+        del state.content_hashes[content_hash]
+    _publish_contract(task)
+
+def _complete_tasks(records: List[dict], engine: RAGEngine):
+    if state.segment_store is not None:
+        # Other workers (and this one) see the contracts once their segment is published
+        _publish_segment(engine, records)
+        for record in records:
+            state.processing_files.pop(record["id"], None)
+        return
+    for record in records:
+        # Update state: Move from processing to metadata_store
+        state.metadata_store.append(record)
+        state.processing_files.pop(record["id"], None)
+        _publish_contract(record)
+
+def _index_engine() -> RAGEngine:
+    # With a shared index, each job indexes into its own engine and publishes it as a segment
+    if state.segment_store is not None:
+        return RAGEngine(embeddings=state.rag_engine.embeddings)
+    return state.rag_engine
+
+def _get_metadata_extractor() -> MetadataExtractor:
+    # One extractor per process; its LLM client is shared and rate-limited
+    with llm_lock:
+        if state.metadata_extractor is None:
+            state.metadata_extractor = MetadataExtractor()
+        return state.metadata_extractor
+
+def profile_requested(request: Request) -> bool:
+    """
+    True if the request asks to be profiled (X-Profile header or ?profile=1).
+    Only admins may profile; the key is checked only when the flag is set.
+    """
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile")
+    if not flag or flag.lower() in ("0", "false", "no"):
+        return False
+    get_admin_key(request.headers.get("X-API-Key"))
+    return True
+
+def caller_identity(request: Request) -> str:
+    """Whom per-caller limits apply to: the API key (by key_id), else the client IP."""
+    api_key = request.headers.get("X-API-Key")
+    if api_key and api_key == settings.API_ADMIN_KEY:
+        return "admin"
+    if api_key and api_key in valid_api_keys:
+        return key_id(api_key)
+    return f"anon-{request.client.host if request.client else 'unknown'}"
+
+def _raise_rate_limited(error: QuotaExceeded):
+    QUOTA_REJECTIONS.inc(kind=error.kind, reason=error.reason)
+    if error.reason == "size":
+        # Retrying cannot help; the request has to be split
+        raise HTTPException(
+            status_code=413,
+            detail=f"This {error.kind} request counts for more than the per-minute limit of this API key. Please split it.",
+        )
+    raise HTTPException(
+        status_code=429,
+        detail=f"Too many {error.kind} requests for this API key ({error.reason} limit). Please retry later.",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+def _admit(identity: str, kind: str, cost: int = 1, retry_after: int = None) -> Lease:
+    """Charges the caller's rate and quota and takes a concurrency slot, all or nothing; 429 if over a limit."""
+    try:
+        return quotas.admit(identity, kind, cost, retry_after)
+    except QuotaExceeded as e:
+        _raise_rate_limited(e)
+
+def _extract_metadata(text: str, contract_id: str, timings: dict, rag_engine: RAGEngine = None) -> Optional[ContractMetadata]:
+    started = time.perf_counter()
+    try:
+        extractor = _get_metadata_extractor()
+        if rag_engine is not None:
+            # Long documents use retrieved chunks, so the contract must be indexed already
+            return extractor.extract(text, rag_engine=rag_engine, contract_id=contract_id)
+        return extractor.extract(text)
+    except Exception as e:
+        logger.warning(f"Metadata extraction failed: {e}. Proceeding without metadata.")
+        return None
+    finally:
+        timings["metadata"] = round(time.perf_counter() - started, 3)
+
+def process_contract_background(file_path: str, filename: str, contract_id: str, profile: ProfileSession = None,
+                                lease: Lease = None):
+    # Uploads are accepted during warm-up; processing starts once the engines exist
+    warm_up_done.wait()
+    try:
+        if profile is not None:
+            with profiles.profile(profile):
+                return _process_contract(file_path, filename, contract_id)
+        return _process_contract(file_path, filename, contract_id)
+    finally:
+        # Frees the uploader's concurrency slot
+        if lease is not None:
+            lease.release()
+
+def _process_contract(file_path: str, filename: str, contract_id: str):
+    # Per-upload lines use lazy %-formatting: nothing is formatted when INFO is off
+    logger.info("Starting background processing for %s (ID: %s)", filename, contract_id)
+    timings = {}
+    started = time.perf_counter()
+    _update_task(contract_id, stage="extracting", timings=timings)
     try:
-        # Ingest
-        text = PDFLoader.extract_text_from_file(file_path)
+        # Stage 1: Ingest
+        stage_start = time.perf_counter()
+        text = PDFLoader.extract_text_from_file(file_path, progress=_report_page_progress(contract_id))
+        timings["extract_text"] = round(time.perf_counter() - stage_start, 3)
 
         if not text:
             logger.warning(f"No text extracted for {filename}")
-            if contract_id in state.processing_files:
-                state.processing_files[contract_id]["status"] = "failed"
-                state.processing_files[contract_id]["error"] = "No text extracted. The file might be an image-based PDF and OCR dependencies (tesseract-ocr, poppler-utils) are missing or not configured."
+            _mark_failed(contract_id, "No text extracted. The file might be an image-based PDF and OCR dependencies (tesseract-ocr, poppler-utils) are missing or not configured.")
             return
 
-        # Index
-        indexed = state.rag_engine.index_documents(
-            text,
-            filename,
-            metadata={"contract_id": contract_id}
-        )
+        # Stage 2: Metadata and indexing in parallel. Extraction for long
+        # contracts needs chunk retrieval, so it is started once indexing is done.
+        use_index = len(text) > settings.METADATA_MAX_CHARS
+        metadata_future = None
+        if not use_index:
+            metadata_future = metadata_executor.submit(
+                contextvars.copy_context().run, bind_profile(_extract_metadata), text, contract_id, timings)
+
+        _update_task(contract_id, stage="indexing")
+        stage_start = time.perf_counter()
+        engine = _index_engine()
+        try:
+            indexed = engine.index_documents(
+                text,
+                filename,
+                metadata={"contract_id": contract_id}
+            )
+        except Exception:
+            if metadata_future is not None:
+                metadata_future.cancel()
+            raise
+        timings["index"] = round(time.perf_counter() - stage_start, 3)
 
         if not indexed:
+            if metadata_future is not None:
+                metadata_future.cancel()
             logger.warning(f"Indexing failed for {filename} (empty content?)")
-            if contract_id in state.processing_files:
-                state.processing_files[contract_id]["status"] = "failed"
-                state.processing_files[contract_id]["error"] = "Content extraction yielded no indexable text."
-
-                # We do NOT add to metadata_store as processed
+            # We do NOT add to metadata_store as processed
+            _mark_failed(contract_id, "Content extraction yielded no indexable text.")
             return
 
-        # Extract Metadata
+        # Stage 3: Join metadata
+        _update_task(contract_id, stage="metadata")
+        stage_start = time.perf_counter()
         meta = None
-        try:
-            extractor = MetadataExtractor()
-            meta = extractor.extract(text)
-        except Exception as e:
-            logger.warning(f"Metadata extraction failed: {e}. Proceeding without metadata.")
+        if metadata_future is None:
+            meta = _extract_metadata(text, contract_id, timings, rag_engine=engine)
+        else:
+            try:
+                meta = metadata_future.result(timeout=settings.METADATA_TIMEOUT)
+            except FutureTimeoutError:
+                logger.warning(f"Metadata extraction for {filename} timed out. Proceeding without metadata.")
+        timings["metadata_wait"] = round(time.perf_counter() - stage_start, 3)
+        timings["total"] = round(time.perf_counter() - started, 3)
 
-        # Update state: Move from processing to metadata_store
-        record = {
+        task = state.processing_files.get(contract_id, {})
+        _complete_tasks([{
             "id": contract_id,
             "filename": filename,
             "metadata": meta,
-            "status": "processed"
-        }
-        state.metadata_store.append(record)
-        state.processed_files.add(filename)
-
-        # Remove from processing_files
-        if contract_id in state.processing_files:
-            del state.processing_files[contract_id]
+            "status": "processed",
+            "content_hash": task.get("content_hash"),
+            "timings": timings
+        }], engine)
 
-        logger.info(f"Successfully processed {filename}")
+        logger.info("Successfully processed %s in %ss (%s)", filename, timings["total"], timings)
 
     except Exception as e:
         logger.error(f"Background processing failed for {filename}: {e}")
-        if contract_id in state.processing_files:
-            state.processing_files[contract_id]["status"] = "failed"
-            state.processing_files[contract_id]["error"] = str(e)
+        _mark_failed(contract_id, str(e))
     finally:
         # Cleanup temp file
         if os.path.exists(file_path):
             os.remove(file_path)
 
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+def process_batch_background(batch_id: str, items: List[BulkItem], lease: Lease = None):
+    try:
+        _process_batch(batch_id, items)
+    finally:
+        if lease is not None:
+            lease.release()
+
+def _process_batch(batch_id: str, items: List[BulkItem]):
+    warm_up_done.wait()
+    logger.info(f"Starting bulk processing of {len(items)} files (batch {batch_id})")
+    state.batches[batch_id]["status"] = "processing"
+    for item in items:
+        _update_task(item.contract_id, stage="indexing")
+    engine = _index_engine()
+    finished = []
+
+    def on_done(item: BulkItem, text: str, meta: Optional[ContractMetadata]):
+        record = {
+            "id": item.contract_id,
+            "filename": item.source,
+            "metadata": meta,
+            "status": "processed",
+            "content_hash": item.content_hash
+        }
+        if state.segment_store is not None:
+            # Published as one segment once the whole batch is done
+            finished.append(record)
+        else:
+            _complete_tasks([record], engine)
+        _remove_file(item.path)
+
+    def on_failed(item: BulkItem, error: str):
+        _mark_failed(item.contract_id, error)
+        _remove_file(item.path)
+
+    try:
+        try:
+            extractor = _get_metadata_extractor()
+        except Exception as e:
+            logger.warning(f"Metadata extraction unavailable for batch {batch_id}: {e}")
+            extractor = None
+
+        stats = BulkIngestor(engine, metadata_extractor=extractor, on_done=on_done, on_failed=on_failed).ingest(items)
+        if finished:
+            _complete_tasks(finished, engine)
+        state.batches[batch_id].update(status="done", stats=stats.as_dict())
+    except Exception as e:
+        logger.error(f"Bulk processing failed for batch {batch_id}: {e}")
+        state.batches[batch_id].update(status="failed", error=str(e))
+        for item in items:
+            if item.contract_id in state.processing_files:
+                on_failed(item, str(e))
+    finally:
+        for item in items:
+            _remove_file(item.path)
+
+def _segment_entry(record: dict) -> dict:
+    meta = record.get("metadata")
+    return {
+        "id": record["id"],
+        "filename": record["filename"],
+        "metadata": meta.model_dump() if meta is not None else None,
+        "content_hash": record.get("content_hash"),
+        "timings": record.get("timings"),
+    }
+
+def _segment_record(entry: dict) -> dict:
+    return {
+        "id": entry["id"],
+        "filename": entry["filename"],
+        "metadata": ContractMetadata(**entry["metadata"]) if entry.get("metadata") else None,
+        "status": "processed",
+        "content_hash": entry.get("content_hash"),
+        "timings": entry.get("timings"),
+    }
+
+def _publish_segment(engine: RAGEngine, records: List[dict]):
+    state.segment_store.publish(engine.vector_store, [_segment_entry(r) for r in records])
+    reload_shared_index()
+    # Merging runs off the ingestion job; one compaction per process, one leader across processes
+    if len(state.loaded_segments) > settings.SHARED_INDEX_MAX_SEGMENTS and compaction_lock.acquire(blocking=False):
+        threading.Thread(target=_compact_shared_index, name="segment-compaction", daemon=True).start()
+
+def _compact_shared_index():
+    try:
+        if state.segment_store.compact(state.rag_engine.embeddings, settings.SHARED_INDEX_MAX_SEGMENTS):
+            reload_shared_index()
+    except Exception as e:
+        logger.error(f"Segment compaction failed: {e}")
+    finally:
+        compaction_lock.release()
+
+def reload_shared_index() -> bool:
+    """
+    Brings this process up to the latest shared index version: opens new
+    segments (memory-mapped), drops compacted ones and rebuilds the contract
+    list from the segments' records. Returns False if already current.
+    """
+    store = state.segment_store
+    with segment_lock:
+        manifest = store.read_manifest()
+        if manifest["version"] == state.index_version:
+            return False
+        check_embedding_model(manifest.get("embedding_model"), state.rag_engine.embeddings, f"Shared index {store.root}")
+        loaded = {}
+        for name in manifest["segments"]:
+            if name in state.loaded_segments:
+                loaded[name] = state.loaded_segments[name]
+            else:
+                vector_store, entries = store.load(name, state.rag_engine.embeddings)
+                loaded[name] = (vector_store, [_segment_record(e) for e in entries])
+
+        known = {item["id"] for item in state.metadata_store}
+        records = [record for name in manifest["segments"] for record in loaded[name][1]]
+        state.rag_engine.set_segments([loaded[name][0] for name in manifest["segments"]])
+        state.loaded_segments = loaded
+        state.metadata_store = records
+        state.index_version = manifest["version"]
+        for record in records:
+            if record.get("content_hash"):
+                state.content_hashes[record["content_hash"]] = record["id"]
+            if record["id"] not in known:
+                _publish_contract(record)
+        _bump_version()
+    logger.info(f"Loaded shared index version {manifest['version']} ({len(manifest['segments'])} segments, {len(records)} contracts)")
+    return True
+
+def _watch_shared_index():
+    while True:
+        time.sleep(settings.SHARED_INDEX_POLL_SECONDS)
+        try:
+            reload_shared_index()
+        except Exception as e:
+            # e.g. a segment deleted after its grace period before this worker caught up; the next poll retries
+            logger.warning(f"Shared index reload failed: {e}")
+
+def start_shared_index(root: str):
+    """Serves from segments in root, shared by all worker processes, and follows new versions."""
+    state.segment_store = SegmentStore(root, retire_seconds=settings.SHARED_INDEX_RETIRE_SECONDS)
+    try:
+        reload_shared_index()
+    except Exception as e:
+        logger.error(f"Failed to load shared index from {root}: {e}")
+    threading.Thread(target=_watch_shared_index, name="shared-index-watcher", daemon=True).start()
+
+def load_persisted_index(index_dir: str):
+    """Serves an index built by 'main.py ingest' (FAISS files + manifest)."""
+    try:
+        if not state.rag_engine.load(index_dir):
+            logger.warning(f"No persisted index found in {index_dir}")
+            return
+    except Exception as e:
+        logger.error(f"Failed to load persisted index from {index_dir}: {e}")
+        return
+
+    for entry in read_manifest(index_dir).values():
+        if entry.get("status") != "indexed":
+            continue
+        state.metadata_store.append({
+            "id": entry["contract_id"],
+            "filename": entry["source"],
+            "metadata": ContractMetadata(**entry["metadata"]) if entry.get("metadata") else None,
+            "status": "processed",
+            "content_hash": entry.get("content_hash")
+        })
+        if entry.get("content_hash"):
+            state.content_hashes[entry["content_hash"]] = entry["contract_id"]
+    _bump_version()
+    logger.info(f"Loaded persisted index from {index_dir} ({len(state.metadata_store)} contracts)")
+
 @app.post("/api/admin/generate-key", response_model=APIKeyResponse)
 def generate_api_key(admin_key: str = Depends(get_admin_key)):
     """
@@ -207,16 +755,73 @@ def generate_api_key(admin_key: str = Depends(get_admin_key)):
     """
     new_key = str(uuid.uuid4())
     add_api_key(new_key)
-    return {"api_key": new_key, "message": "API Key generated successfully"}
+    return {"api_key": new_key, "message": "API Key generated successfully", "key_id": key_id(new_key)}
+
+@app.get("/api/admin/quotas")
+def list_quotas(admin_key: str = Depends(get_admin_key)):
+    """Limits, requests in flight and counters of every caller seen so far."""
+    return quotas.snapshots()
+
+@app.get("/api/admin/quotas/{caller_id}")
+def get_quota(caller_id: str, admin_key: str = Depends(get_admin_key)):
+    """One caller by key_id (or anon-<ip> for requests without a key)."""
+    return quotas.snapshot(caller_id)
+
+@app.put("/api/admin/quotas/{caller_id}")
+def update_quota(caller_id: str, update: QuotaUpdate, admin_key: str = Depends(get_admin_key)):
+    """Changes a caller's limits at runtime; omitted fields keep their value."""
+    limits = update.model_dump(exclude={"reset_counters"})
+    return quotas.update(caller_id, reset_counters=update.reset_counters, **limits)
+
+@app.get("/api/admin/index/memory")
+def index_memory(admin_key: str = Depends(get_admin_key)):
+    """Hot and cold contracts of the in-memory index, evictions and cold searches."""
+    return _memory_stats()
+
+@app.get("/api/admin/profiles")
+def list_profiles(admin_key: str = Depends(get_admin_key)):
+    """Most recent profiled requests first: stage breakdown without the profiler report."""
+    return profiles.list()
+
+@app.get("/api/admin/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|text|pstats)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+    admin_key: str = Depends(get_admin_key),
+):
+    """
+    A profiled request: per-stage seconds and calls plus the top functions
+    (json), the profiler report alone (text), or the raw profile for pstats
+    or snakeviz (pstats).
+    """
+    session = profiles.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        if session.status in ("pending", "running"):
+            raise HTTPException(status_code=409, detail=f"Profile is {session.status}")
+        return Response(content=session.pstats_bytes(), media_type="application/octet-stream",
+                        headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'})
+    report = session.report(settings.PROFILE_TOP_FUNCTIONS, sort)
+    if format == "text":
+        return Response(content=report, media_type="text/plain")
+    return {**session.summary(), "report": report}
 
 @app.post("/api/admin/set-openai-key")
 def set_openai_key(api_key: str = Body(..., embed=True), admin_key: str = Depends(get_admin_key)):
     """
-    Updates the OpenAI API Key and re-initializes engines.
+    Updates the OpenAI API Key and swaps the LLM clients to it.
+    The embedding model and the index are kept (a mock-mode index keeps its
+    hashing embeddings; /readyz reports them apart from the LLM); requests
+    already talking to the LLM finish on the old client.
     Protected by Admin Key.
     """
     if not api_key:
         raise HTTPException(status_code=400, detail="API Key cannot be empty")
+    # Warm-up installs engines of its own; a swap made before it finishes would be overwritten
+    if not warm_up_done.wait(timeout=settings.WARMUP_WAIT_SECONDS):
+        raise HTTPException(status_code=503, detail="Engines are warming up", headers={"Retry-After": "5"})
 
     logger.info("Updating OpenAI API Key...")
 
@@ -244,11 +849,24 @@ def set_openai_key(api_key: str = Body(..., embed=True), admin_key: str = Depend
             logger.error(f"Failed to update .env file: {e}")
             # Non-critical, continue
 
-    # 3. Re-initialize Engines
+    # 3. Swap the LLM clients
     try:
-        logger.info("Re-initializing Engines with new key...")
-        state.rag_engine = RAGEngine()
-        state.chat_engine = ChatEngine(state.rag_engine)
+        if state.chat_engine is None or (_mock_embeddings() and state.rag_engine.is_empty):
+            # Nothing worth keeping yet (mock mode with an empty index): build real engines
+            logger.info("Initializing engines with new key...")
+            rag_engine = _server_engine()
+            chat_engine = ChatEngine(rag_engine)
+            with llm_lock:
+                state.rag_engine, state.chat_engine = rag_engine, chat_engine
+                state.metadata_extractor = None
+        else:
+            logger.info("Swapping LLM clients to the new key...")
+            chat_llm, background_llm = get_llm(priority=PRIORITY_CHAT), get_llm(priority=PRIORITY_BACKGROUND)
+            with llm_lock:
+                state.chat_engine.set_llm(chat_llm)
+                if state.metadata_extractor is not None:
+                    state.metadata_extractor.set_llm(background_llm)
+        llm_registry.retire_other_keys(api_key)
         return {"message": "OpenAI API Key updated and engines re-initialized successfully"}
     except Exception as e:
         logger.error(f"Failed to re-initialize engines: {e}")
@@ -257,88 +875,381 @@ def set_openai_key(api_key: str = Body(..., embed=True), admin_key: str = Depend
 
 @app.post("/api/upload")
 def upload_contract(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    http_request: Request,
+    file: UploadFile = File(...),
+    profile: bool = Depends(profile_requested),
 ):
     filename = file.filename
-    # Check if already processed
-    if filename in state.processed_files:
-        return {"message": "File already processed", "filename": filename, "status": "processed"}
+    identity = caller_identity(http_request)
+    # Hash the upload first: duplicates return before it is copied out and queued for ingestion
+    content_hash, size = _hash_upload(file)
+
+    with upload_lock:
+        existing = _existing_upload(content_hash, filename)
+        if existing:
+            return existing
 
-    # Check if currently processing
-    for task in state.processing_files.values():
-        if task["filename"] == filename and task["status"] == "processing":
-             return {"message": "File is currently processing", "filename": filename, "status": "processing", "id": task["id"]}
+        if state.ingestion_queue.is_full():
+            _raise_queue_full(state.ingestion_queue.retry_after())
 
-    logger.info(f"Queuing upload: {filename}")
-    contract_id = str(uuid.uuid4())
+        # Only uploads that are queued are charged; the slot is held until the ingestion job finishes
+        lease = _admit(identity, UPLOAD, retry_after=state.ingestion_queue.retry_after())
+
+        logger.info("Queuing upload: %s", filename)
+        contract_id = str(uuid.uuid4())
+        _register_upload(contract_id, filename, content_hash)
 
     # Save to temp file
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            tmp_path = tmp.name
+        tmp_path = _save_upload(file)
     except Exception as e:
         logger.error(f"Failed to save temp file: {e}")
+        _release_upload(contract_id)
+        lease.cancel()
         raise HTTPException(status_code=500, detail="Failed to save file")
 
+    # Profiling covers the background job; fetch it from /api/admin/profiles/{profile_id}
+    session = profiles.create("upload", filename) if profile else None
+    try:
+        state.ingestion_queue.submit(contract_id, size, process_contract_background, tmp_path, filename, contract_id, session, lease)
+    except QueueFullError as e:
+        # Lost the race for the last slot
+        _release_upload(contract_id)
+        lease.cancel()
+        os.remove(tmp_path)
+        _raise_queue_full(e.retry_after)
+
+    result = {"message": "Upload successful, processing started.", "id": contract_id, "status": "processing"}
+    if session is not None:
+        result["profile_id"] = session.id
+    return result
+
+@app.post("/api/upload/batch")
+def upload_contracts_batch(
+    http_request: Request,
+    files: List[UploadFile] = File(...)
+):
+    """
+    Uploads many contracts in one request. They are processed as a single
+    ingestion job: text extraction across processes and chunks embedded in
+    large batches. Progress is available from /api/upload/batch/{batch_id}.
+    Each new file counts against the caller's upload rate and quota
+    (duplicates are refunded); the job takes one concurrency slot.
+    """
+    lease = _admit(caller_identity(http_request), UPLOAD, cost=len(files), retry_after=state.ingestion_queue.retry_after())
+    batch_id = str(uuid.uuid4())
+    results = []
+    items = []
+    total_size = 0
+    try:
+        for file in files:
+            content_hash, size = _hash_upload(file)
+            with upload_lock:
+                existing = _existing_upload(content_hash, file.filename)
+                if existing:
+                    results.append(existing)
+                    continue
+                if not items and state.ingestion_queue.is_full():
+                    _raise_queue_full(state.ingestion_queue.retry_after())
+                contract_id = str(uuid.uuid4())
+                _register_upload(contract_id, file.filename, content_hash, batch_id=batch_id)
+
+            try:
+                tmp_path = _save_upload(file)
+            except Exception:
+                _release_upload(contract_id)
+                raise
+            items.append(BulkItem(path=tmp_path, source=file.filename, contract_id=contract_id, content_hash=content_hash))
+            total_size += size
+            results.append({"filename": file.filename, "id": contract_id, "status": "processing"})
+
+        if items:
+            state.batches[batch_id] = {"id": batch_id, "status": "queued", "files": len(items), "stats": None}
+            state.ingestion_queue.submit(batch_id, total_size, process_batch_background, batch_id, items, lease)
+            lease.refund(len(files) - len(items))
+        else:
+            lease.cancel()
+    except Exception as e:
+        lease.cancel()
+        for item in items:
+            _release_upload(item.contract_id)
+            _remove_file(item.path)
+        state.batches.pop(batch_id, None)
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, QueueFullError):
+            _raise_queue_full(e.retry_after)
+        logger.error(f"Failed to queue batch upload: {e}")
+        raise HTTPException(status_code=500, detail="Failed to save files")
+
+    return {"message": f"{len(items)} files queued for processing.", "batch_id": batch_id if items else None, "files": results}
+
+@app.get("/api/upload/batch/{batch_id}")
+def get_upload_batch(batch_id: str):
+    batch = state.batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+@app.get("/api/queue")
+def get_ingestion_queue():
+    """Ingestion queue depth, running jobs and how long the oldest job has waited."""
+    return state.ingestion_queue.stats()
+
+def _hash_upload(file: UploadFile) -> Tuple[str, int]:
+    """
+    Hashes an upload and returns (sha256, size). Starlette has already read
+    the request body into a spooled file, which goes to a temporary file on
+    disk past 1 MB; a duplicate skips only our own copy and the ingestion.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: file.file.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    file.file.seek(0)
+    return digest.hexdigest(), size
+
+def _save_upload(file: UploadFile) -> str:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        shutil.copyfileobj(file.file, tmp, UPLOAD_CHUNK_SIZE)
+        return tmp.name
+
+def _existing_upload(content_hash: str, filename: str) -> Optional[dict]:
+    contract_id = state.content_hashes.get(content_hash)
+    if contract_id is None:
+        UPLOADS.inc(result="new")
+        return None
+    UPLOADS.inc(result="duplicate")
+    if contract_id in state.processing_files:
+        return {"message": "File is currently processing", "filename": filename, "status": "processing", "id": contract_id}
+    return {"message": "File already processed", "filename": filename, "status": "processed", "id": contract_id}
+
+def _register_upload(contract_id: str, filename: str, content_hash: str, batch_id: str = None):
     # Add to processing queue
-    state.processing_files[contract_id] = {
+    task = {
         "id": contract_id,
         "filename": filename,
         "status": "processing",
+        "stage": "queued",
+        "content_hash": content_hash,
         "metadata": None
     }
+    if batch_id:
+        task["batch_id"] = batch_id
+    state.processing_files[contract_id] = task
+    state.content_hashes[content_hash] = contract_id
+    _publish_contract(task)
+
+def _release_upload(contract_id: str):
+    task = state.processing_files.pop(contract_id, None)
+    if task is None:
+        return
+    if state.content_hashes.get(task["content_hash"]) == contract_id:
+        del state.content_hashes[task["content_hash"]]
+    _publish_contract(task, status="removed")
 
-    background_tasks.add_task(process_contract_background, tmp_path, filename, contract_id)
+def _raise_queue_full(retry_after: int):
+    logger.warning(f"Ingestion queue full, rejecting upload (Retry-After: {retry_after}s)")
+    raise HTTPException(
+        status_code=429,
+        detail="Too many uploads in progress. Please retry later.",
+        headers={"Retry-After": str(retry_after)},
+    )
 
-    return {"message": "Upload successful, processing started.", "id": contract_id, "status": "processing"}
+def _source_names(response: dict) -> List[str]:
+    # Extract sources names
+    if not response.get("source_documents"):
+        return []
+    return list(set([doc.metadata.get("source", "Unknown") for doc in response["source_documents"]]))
 
-@app.post("/api/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+@app.post("/api/chat", response_model=ChatResponse, dependencies=[Depends(require_engines)])
+def chat(request: ChatRequest, http_request: Request, http_response: Response, profile: bool = Depends(profile_requested)):
+    lease = _admit(caller_identity(http_request), CHAT)
     try:
-        response = state.chat_engine.process_query(request.query, contract_id=request.contract_id)
+        if profile:
+            session = profiles.create("chat", request.query)
+            http_response.headers["X-Profile-Id"] = session.id
+            with profiles.profile(session):
+                return _answer_chat(request)
+        return _answer_chat(request)
+    finally:
+        lease.release()
 
-        # Extract sources names
-        sources = []
-        if response.get("source_documents"):
-            sources = list(set([doc.metadata.get("source", "Unknown") for doc in response["source_documents"]]))
+def _answer_chat(request: ChatRequest) -> ChatResponse:
+    try:
+        response = None
+        # Metadata lookups are answered straight from metadata_store
+        if settings.ENABLE_QUERY_ROUTER:
+            response = state.query_router.route(request.query, contract_id=request.contract_id)
+        CHAT_ROUTES.inc(route="rag" if response is None else "router")
+        if response is None:
+            response = state.chat_engine.process_query(request.query, contract_id=request.contract_id)
 
         return ChatResponse(
             answer=response["answer"],
-            sources=sources
+            sources=_source_names(response)
         )
     except Exception as e:
         logger.error(f"Chat failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/batch", dependencies=[Depends(require_engines)])
+def chat_batch(request: BatchChatRequest, http_request: Request):
+    """
+    Answers every question against every contract and streams one NDJSON
+    line per (question, contract) pair as soon as it is ready. Every pair
+    counts against the caller's chat rate and quota; the stream takes one
+    concurrency slot.
+    """
+    questions = [q for q in request.questions if q.strip()]
+    if not questions:
+        raise HTTPException(status_code=400, detail="At least one question is required")
+    lease = _admit(caller_identity(http_request), CHAT, cost=len(questions) * len(request.contract_ids or [None]))
+
+    # Callers may lower the LLM concurrency, never raise it above the configured cap
+    concurrency = settings.BATCH_LLM_CONCURRENCY
+    if request.max_concurrency:
+        concurrency = max(1, min(request.max_concurrency, concurrency))
+
+    router = state.query_router if settings.ENABLE_QUERY_ROUTER else None
+    logger.info("Batch chat: %d questions x %d contracts", len(questions), len(request.contract_ids or [None]))
+
+    def stream():
+        try:
+            for result in state.chat_engine.process_batch(
+                questions,
+                contract_ids=request.contract_ids,
+                max_concurrency=concurrency,
+                router=router,
+            ):
+                yield json.dumps({
+                    "question": result["question"],
+                    "contract_id": result["contract_id"],
+                    "answer": result["answer"],
+                    "sources": _source_names(result),
+                }) + "\n"
+        except Exception as e:
+            logger.error(f"Batch chat failed: {e}", exc_info=True)
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            lease.release()
+
+    # The background task covers a stream that is never started; release() is idempotent
+    return StreamingResponse(stream(), media_type="application/x-ndjson", background=BackgroundTask(lease.release))
+
+@app.get("/api/events")
+async def contract_events(request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of contract state changes (queued, stage
+    changes, page progress, processed with metadata, failed). Clients load
+    /api/contracts once and then patch their list from these events; on
+    reconnect the browser sends Last-Event-ID and only missed events are
+    replayed. A 'reset' event means the client must re-fetch the list.
+    """
+    try:
+        after = int(last_event_id) if last_event_id else None
+    except ValueError:
+        after = None
+    queue, backlog = events.subscribe(after)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield format_sse(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            events.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+CONTRACT_FIELDS = tuple(ContractResponse.model_fields)
+
+def _contract_row(item: dict, fields: Tuple[str, ...], queue_positions: Dict[str, int]) -> dict:
+    row = {}
+    for name in fields:
+        if name == "metadata":
+            meta = item.get("metadata")
+            row[name] = meta.model_dump() if meta is not None else None
+        elif name == "queue_position":
+            row[name] = queue_positions.get(item["id"])
+        elif name == "status":
+            row[name] = item.get("status", "processed")
+        else:
+            row[name] = item.get(name)
+    return row
+
 @app.get("/api/contracts", response_model=List[ContractResponse])
-def list_contracts():
-    processed_list = []
-    processed_ids = set()
-    # Copy metadata_store to avoid modification issues if any (though append is atomic-ish)
-    # Actually, iterate over a copy or just assume it's append-only
-    for item in list(state.metadata_store):
-        item_copy = item.copy()
-        if "status" not in item_copy:
-            item_copy["status"] = "processed"
-        processed_list.append(item_copy)
-        processed_ids.add(item["id"])
-
-    # Create a copy of processing files to avoid runtime error during iteration
-    processing_tasks = list(state.processing_files.values())
-
-    processing_list = []
-    for task in processing_tasks:
-        # Avoid race condition duplicates
-        if task["id"] in processed_ids:
-            continue
+def list_contracts(
+    limit: int = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Lists processed contracts followed by those still processing.
 
-        processing_list.append({
-            "id": task["id"],
-            "filename": task["filename"],
-            "metadata": task["metadata"],
-            "status": task["status"]
-        })
+    Paginated: at most `limit` items (default CONTRACTS_PAGE_SIZE); when more
+    remain, the X-Next-Cursor header holds the cursor for the next page.
+    `fields` is a comma separated projection (e.g. "id,filename,status") so
+    polls can skip metadata. Responses carry an ETag derived from the store
+    version; an unchanged list answers If-None-Match with 304 without
+    building the page.
+    """
+    limit = min(limit or settings.CONTRACTS_PAGE_SIZE, settings.CONTRACTS_MAX_PAGE_SIZE)
+    if fields:
+        selected = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = set(selected) - set(CONTRACT_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        if "id" not in selected:
+            selected = ("id",) + selected
+    else:
+        selected = CONTRACT_FIELDS
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    etag = f'W/"{state.version}-{offset}-{limit}-{"+".join(selected)}"'
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # metadata_store is append-only, so an offset into it is a stable cursor;
+    # tasks still processing follow the processed contracts
+    processed = state.metadata_store
+    tasks = list(state.processing_files.values())
+    # A task that just finished is appended to the store before it leaves
+    # processing_files, so duplicates can only be among the last few records
+    recent = {item["id"] for item in processed[max(0, len(processed) - len(tasks)):]}
+    processing = [task for task in tasks if task["id"] not in recent]
+
+    page = processed[offset:offset + limit]
+    remaining = limit - len(page)
+    queue_positions = {}
+    if remaining:
+        start = max(0, offset - len(processed))
+        page = page + processing[start:start + remaining]
+        if "queue_position" in selected and processing:
+            queue_positions = state.ingestion_queue.positions()
+    # Counted even when the processed contracts fill the page
+    has_more = offset + len(page) < len(processed) + len(processing)
 
-    return processed_list + processing_list
+    body = json.dumps([_contract_row(item, selected, queue_positions) for item in page], default=str)
+    headers = {"ETag": etag}
+    if has_more:
+        headers["X-Next-Cursor"] = str(offset + len(page))
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,228 @@
+"""
+Component microbenchmarks: PDF extraction, OCR, splitting, embedding,
+indexing, search and metadata extraction on a generated contract corpus.
+
+Results are JSON (throughput plus latency percentiles per component) so runs
+can be diffed across commits:
+
+    python main.py bench --count 50 --pages 5 --output bench.json
+    python main.py bench --count 50 --pages 5 --compare bench.json
+"""
+from typing import Callable, Dict, Iterable, List, Optional
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+QUERIES = [
+    "When does the agreement renew?",
+    "What are the payment terms?",
+    "How much notice is required to terminate?",
+    "Which law governs the contract?",
+    "What is the guaranteed availability?",
+    "How quickly must a data breach be reported?",
+]
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "p50": round(pick(0.50) * 1000, 3),
+        "p90": round(pick(0.90) * 1000, 3),
+        "p99": round(pick(0.99) * 1000, 3),
+        "mean": round(statistics.fmean(ordered) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+def measure(fn: Callable, items: Iterable, units: Callable = None) -> dict:
+    """
+    Calls fn(item) for every item. Returns the call count, total time,
+    calls/s, latency percentiles and, if units(item, result) is given, the
+    units processed per second (pages, chunks, ...).
+    """
+    latencies, total_units = [], 0
+    started = time.perf_counter()
+    for item in items:
+        call_started = time.perf_counter()
+        result = fn(item)
+        latencies.append(time.perf_counter() - call_started)
+        if units:
+            total_units += units(item, result)
+    elapsed = time.perf_counter() - started
+    report = {
+        "calls": len(latencies),
+        "seconds": round(elapsed, 4),
+        "calls_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles(latencies),
+    }
+    if units:
+        report["units"] = total_units
+        report["units_per_sec"] = round(total_units / elapsed, 2) if elapsed else 0.0
+    return report
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+def _embeddings(kind: str):
+    if kind == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        from config.settings import settings
+        return HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
+    from rag_engine.hashing_embeddings import HashingEmbeddings
+    return HashingEmbeddings(size=384)
+
+def run_benchmarks(corpus_dir: str = None, count: int = 20, pages: int = 3, scanned: float = 0.1, mixed: float = 0.1,
+                   embeddings: str = "hashing", seed: int = 42, search_rounds: int = 20) -> dict:
+    """
+    Generates a deterministic corpus into corpus_dir (a temporary directory,
+    removed afterwards, if not given) and benchmarks each ingestion and
+    retrieval component on it.
+    """
+    if corpus_dir is None:
+        import shutil
+        corpus_dir = tempfile.mkdtemp(prefix="bench_contracts_")
+        try:
+            return run_benchmarks(corpus_dir, count, pages, scanned, mixed, embeddings, seed, search_rounds)
+        finally:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    from create_samples import generate_corpus
+    from ingestion.pdf_loader import PDFLoader, _load_ocr
+    from rag_engine.vector_store import RAGEngine
+    from metadata_extractor.extractor import MetadataExtractor
+    from config.settings import settings
+
+    generate_started = time.perf_counter()
+    corpus = generate_corpus(corpus_dir, count, pages=pages, scanned=scanned, mixed=mixed, seed=seed)
+    generate_seconds = time.perf_counter() - generate_started
+    text_files = [c for c in corpus if c["layer"] != "scanned"]
+    scanned_files = [c for c in corpus if c["layer"] == "scanned"]
+
+    results = {}
+
+    # PDF text layer extraction (OCR fallback off, measured separately)
+    texts = {}
+
+    def extract(entry):
+        text, page_count = PDFLoader.extract_text_and_page_count(entry["path"], use_ocr_if_empty=False)
+        texts[entry["path"]] = text
+        return page_count
+
+    results["pdf_extract"] = measure(extract, text_files, units=lambda entry, page_count: page_count)
+    results["pdf_extract"]["unit"] = "pages"
+
+    # OCR needs tesseract and poppler; report why it was skipped instead of failing
+    if not scanned_files:
+        results["ocr"] = {"skipped": "no scanned contracts in corpus"}
+    elif not _load_ocr():
+        results["ocr"] = {"skipped": "pytesseract/pdf2image not installed"}
+    else:
+        import shutil
+        if not (shutil.which("tesseract") and shutil.which("pdftoppm")):
+            results["ocr"] = {"skipped": "tesseract or pdftoppm executable not found"}
+        else:
+            results["ocr"] = measure(lambda entry: PDFLoader._ocr_extract_from_file(entry["path"]), scanned_files,
+                                     units=lambda entry, _: entry["pages"])
+            results["ocr"]["unit"] = "pages"
+
+    embedder = _embeddings(embeddings)
+    rag = RAGEngine(embeddings=embedder)
+    documents = {}
+
+    def split(entry):
+        docs = rag.split_documents(texts[entry["path"]], os.path.basename(entry["path"]),
+                                   metadata={"contract_id": entry["spec"]["contract_id"]})
+        documents[entry["path"]] = docs
+        return len(docs)
+
+    results["split"] = measure(split, text_files, units=lambda entry, chunks: chunks)
+    results["split"]["unit"] = "chunks"
+
+    all_chunks = [doc.page_content for entry in text_files for doc in documents[entry["path"]]]
+    batch_size = settings.EMBED_BATCH_SIZE
+    batches = [all_chunks[i:i + batch_size] for i in range(0, len(all_chunks), batch_size)]
+    results["embed"] = measure(embedder.embed_documents, batches, units=lambda batch, _: len(batch))
+    results["embed"].update(unit="chunks", batch_size=batch_size)
+
+    # index_documents end to end (split + embed + FAISS add), one contract per call
+    index_rag = RAGEngine(embeddings=embedder)
+    results["index"] = measure(
+        lambda entry: index_rag.index_documents(texts[entry["path"]], os.path.basename(entry["path"]),
+                                                metadata={"contract_id": entry["spec"]["contract_id"]}),
+        text_files,
+        units=lambda entry, _: len(documents[entry["path"]]),
+    )
+    results["index"].update(unit="chunks", index_size=index_rag.vector_store.index.ntotal if not index_rag.is_empty else 0)
+
+    queries = [QUERIES[i % len(QUERIES)] for i in range(search_rounds * len(QUERIES))]
+    results["search"] = measure(lambda query: index_rag.search(query, k=3), queries)
+    contract_ids = [entry["spec"]["contract_id"] for entry in text_files] or [None]
+    filtered = [(query, contract_ids[i % len(contract_ids)]) for i, query in enumerate(queries)]
+    results["search_filtered"] = measure(
+        lambda pair: index_rag.search(pair[0], k=3, filter={"contract_id": pair[1]} if pair[1] else None), filtered)
+
+    # Rules only: the LLM pass is network-bound and measured by the load test instead
+    extractor = MetadataExtractor(use_llm=False)
+    results["metadata_rules"] = measure(lambda entry: extractor.extract(texts[entry["path"]]), text_files)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "embeddings": embeddings,
+            "corpus": {
+                "dir": corpus_dir,
+                "contracts": len(corpus),
+                "pages_per_contract": pages,
+                "text": sum(1 for c in corpus if c["layer"] == "text"),
+                "mixed": sum(1 for c in corpus if c["layer"] == "mixed"),
+                "scanned": len(scanned_files),
+                "chunks": len(all_chunks),
+                "seed": seed,
+                "generate_seconds": round(generate_seconds, 3),
+            },
+        },
+        "benchmarks": results,
+    }
+
+def compare(baseline: dict, current: dict) -> List[str]:
+    """
+    One line per benchmark with the p50 latency and throughput change versus
+    baseline. Positive throughput and negative latency changes are improvements.
+    """
+    lines = []
+    for name, now in current["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or "skipped" in now or "skipped" in before:
+            continue
+        key = "units_per_sec" if "units_per_sec" in now else "calls_per_sec"
+        p50_before, p50_now = before["latency_ms"].get("p50"), now["latency_ms"].get("p50")
+        rate_before, rate_now = before.get(key), now.get(key)
+        latency = f"{(p50_now - p50_before) / p50_before:+.1%}" if p50_before else "n/a"
+        rate = f"{(rate_now - rate_before) / rate_before:+.1%}" if rate_before else "n/a"
+        lines.append(f"{name:16} p50 {p50_before:>9.3f} -> {p50_now:>9.3f} ms ({latency}), {key} {rate_before} -> {rate_now} ({rate})")
+    return lines
+
+def write_report(report: dict, output: str = None):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,344 @@
+"""
+End-to-end HTTP load test: concurrent users drive /api/upload,
+/api/contracts and /api/chat with a weighted mix for a fixed duration, at
+one or more concurrency levels.
+
+Without a URL a mock-mode server (hashing embeddings, fake LLM) is started
+in a subprocess, so runs are offline and repeatable:
+
+    python main.py load --levels 1,8,32 --duration 30 --mix upload=1,contracts=3,chat=6
+    python main.py load --url http://prod-candidate:8000 --levels 16 --duration 120
+"""
+from typing import Dict, List, Optional, Sequence
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from benchmarks.components import QUERIES, percentiles, _git_commit
+
+DEFAULT_MIX = {"upload": 1, "contracts": 3, "chat": 6}
+OPERATIONS = ("upload", "contracts", "chat")
+FINISHED = ("processed", "failed")
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'upload=1,chat=6' -> {'upload': 1.0, 'chat': 6.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("Mix needs at least one operation with a positive weight")
+    return mix
+
+def prepare_uploads(count: int, pages: int, seed: int) -> List[bytes]:
+    """Generates count distinct contracts and returns their PDF bytes."""
+    from create_samples import generate_corpus
+    out_dir = tempfile.mkdtemp(prefix="load_contracts_")
+    try:
+        corpus = generate_corpus(out_dir, count, pages=pages, seed=seed)
+        files = []
+        for entry in corpus:
+            with open(entry["path"], "rb") as f:
+                files.append(f.read())
+        return files
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+def _unique(pdf: bytes, tag: str) -> bytes:
+    # A trailing comment changes the content hash, so the server does not
+    # answer repeated uploads from its duplicate check
+    return pdf + f"\n% load-test {tag}\n".encode()
+
+class OperationStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.status_codes: Dict[str, int] = {}
+        self.errors = 0
+
+    def record(self, status, seconds: float, ok: bool):
+        self.latencies.append(seconds)
+        self.status_codes[str(status)] = self.status_codes.get(str(status), 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def as_dict(self, elapsed: float) -> dict:
+        requests = len(self.latencies)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / requests, 4) if requests else 0.0,
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "status_codes": self.status_codes,
+            "latency_ms": percentiles(self.latencies),
+        }
+
+class LoadRun:
+    """One concurrency level: users, the event listener and the queue sampler."""
+    def __init__(self, client, concurrency: int, duration: float, mix: Dict[str, float], uploads: List[bytes],
+                 seed: int, drain_timeout: float, sample_interval: float = 0.5):
+        self.client = client
+        self.concurrency = concurrency
+        self.duration = duration
+        self.operations = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.operations]
+        self.uploads = uploads
+        self.seed = seed
+        self.drain_timeout = drain_timeout
+        self.sample_interval = sample_interval
+        self.stats = {name: OperationStats() for name in self.operations}
+        self.run_id = uuid.uuid4().hex[:8]
+        self.upload_count = 0
+        # contract id -> time the upload was accepted
+        self.pending: Dict[str, float] = {}
+        # Completion events that arrived before their upload response
+        self.early: Dict[str, tuple] = {}
+        self.ingestion_lag: List[float] = []
+        self.ingested = {"processed": 0, "failed": 0}
+        self.processed_ids: List[str] = []
+        self.queue_samples: List[dict] = []
+        self._listening = asyncio.Event()
+
+    async def run(self) -> dict:
+        listener = asyncio.create_task(self._listen())
+        sampler = asyncio.create_task(self._sample_queue())
+        try:
+            await asyncio.wait_for(self._listening.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            pass
+
+        started = time.perf_counter()
+        deadline = started + self.duration
+        await asyncio.gather(*(self._user(i, deadline) for i in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        # Let accepted uploads finish so their ingestion lag is measured too
+        drain_deadline = time.perf_counter() + self.drain_timeout
+        while self.pending and time.perf_counter() < drain_deadline:
+            await asyncio.sleep(0.1)
+        drained = time.perf_counter() - started - elapsed
+
+        for task in (listener, sampler):
+            task.cancel()
+        await asyncio.gather(listener, sampler, return_exceptions=True)
+        return self._report(elapsed, drained)
+
+    async def _user(self, index: int, deadline: float):
+        rng = random.Random(self.seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            operation = rng.choices(self.operations, self.weights)[0]
+            await getattr(self, f"_{operation}")(rng)
+
+    async def _timed(self, operation: str, request):
+        started = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self.stats[operation].record("exception", time.perf_counter() - started, ok=False)
+            return None
+        elapsed = time.perf_counter() - started
+        self.stats[operation].record(response.status_code, elapsed, ok=response.status_code < 400)
+        return response
+
+    async def _upload(self, rng: random.Random):
+        self.upload_count += 1
+        tag = f"{self.run_id}-{self.upload_count}"
+        pdf = _unique(rng.choice(self.uploads), tag)
+        files = {"file": (f"load_{tag}.pdf", pdf, "application/pdf")}
+        response = await self._timed("upload", self.client.post("/api/upload", files=files))
+        if response is not None and response.status_code == 200:
+            body = response.json()
+            if body.get("status") == "processing":
+                self.pending.setdefault(body["id"], time.perf_counter())
+                if body["id"] in self.early:
+                    self._finish(body["id"], *self.early.pop(body["id"]))
+
+    async def _contracts(self, rng: random.Random):
+        await self._timed("contracts", self.client.get("/api/contracts", params={"limit": 100}))
+
+    async def _chat(self, rng: random.Random):
+        payload = {"query": rng.choice(QUERIES)}
+        if self.processed_ids and rng.random() < 0.5:
+            payload["contract_id"] = rng.choice(self.processed_ids)
+        await self._timed("chat", self.client.post("/api/chat", json=payload))
+
+    async def _listen(self):
+        # Completion events give the upload -> indexed lag without polling
+        while True:
+            try:
+                async with self.client.stream("GET", "/api/events", timeout=None) as response:
+                    self._listening.set()
+                    event_type = None
+                    async for line in response.aiter_lines():
+                        if line.startswith("event:"):
+                            event_type = line[6:].strip()
+                        elif line.startswith("data:") and event_type == "contract":
+                            self._on_contract(json.loads(line[5:]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(0.5)
+
+    def _on_contract(self, data: dict):
+        status = data.get("status")
+        if status not in FINISHED:
+            return
+        if data.get("id") in self.pending:
+            self._finish(data["id"], status, time.perf_counter())
+        else:
+            self.early[data.get("id")] = (status, time.perf_counter())
+
+    def _finish(self, contract_id: str, status: str, finished: float):
+        accepted = self.pending.pop(contract_id)
+        self.ingestion_lag.append(max(0.0, finished - accepted))
+        self.ingested[status] += 1
+        if status == "processed":
+            self.processed_ids.append(contract_id)
+
+    async def _sample_queue(self):
+        while True:
+            try:
+                response = await self.client.get("/api/queue")
+                if response.status_code == 200:
+                    self.queue_samples.append(response.json())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(self.sample_interval)
+
+    def _report(self, elapsed: float, drained: float) -> dict:
+        operations = {name: stats.as_dict(elapsed) for name, stats in self.stats.items()}
+        total = sum(o["requests"] for o in operations.values())
+        errors = sum(o["errors"] for o in operations.values())
+        depths = [s["depth"] for s in self.queue_samples]
+        waits = [s["oldest_wait_seconds"] for s in self.queue_samples]
+        return {
+            "concurrency": self.concurrency,
+            "seconds": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "operations": operations,
+            "ingestion": {
+                "accepted": self.ingested["processed"] + self.ingested["failed"] + len(self.pending),
+                "processed": self.ingested["processed"],
+                "failed": self.ingested["failed"],
+                "unfinished": len(self.pending),
+                "drain_seconds": round(drained, 3),
+                "lag_ms": percentiles(self.ingestion_lag),
+                "queue_depth_max": max(depths, default=0),
+                "queue_depth_mean": round(sum(depths) / len(depths), 2) if depths else 0.0,
+                "queue_wait_max_seconds": max(waits, default=0.0),
+            },
+        }
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_mock_server(port: int = None, startup_timeout: float = 60.0):
+    """Starts `main.py server` in mock mode on a local port. Returns (process, url)."""
+    import httpx
+    port = port or _free_port()
+    env = dict(os.environ, MOCK_MODE="1", LOG_LEVEL="WARNING")
+    # All simulated users share one client IP; measure capacity, not per-caller limits
+    for name in ("RATE_LIMIT_CHAT_PER_MINUTE", "RATE_LIMIT_UPLOAD_PER_MINUTE",
+                 "MAX_CONCURRENT_CHATS_PER_KEY", "MAX_CONCURRENT_UPLOADS_PER_KEY"):
+        env[name] = "0"
+    # Start from an empty in-memory index
+    for name in ("INDEX_DIR", "SHARED_INDEX_DIR"):
+        env.pop(name, None)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(root, "main.py"), "server", "--host", "127.0.0.1", "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Mock server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/readyz", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Mock server not ready after {startup_timeout}s")
+
+async def _run_levels(url: str, levels: Sequence[int], duration: float, mix: Dict[str, float], uploads: List[bytes],
+                      seed: int, drain_timeout: float, api_key: Optional[str]) -> List[dict]:
+    import httpx
+    headers = {"X-API-Key": api_key} if api_key else {}
+    # Two extra connections for the event stream and the queue sampler
+    limits = httpx.Limits(max_connections=max(levels) + 2, max_keepalive_connections=max(levels) + 2)
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=60) as client:
+        results = []
+        for concurrency in levels:
+            run = LoadRun(client, concurrency, duration, mix, uploads, seed, drain_timeout)
+            results.append(await run.run())
+        return results
+
+def run_load_test(url: str = None, levels: Sequence[int] = (1, 8, 32), duration: float = 10.0,
+                  mix: Dict[str, float] = None, pages: int = 2, distinct_files: int = 10, seed: int = 42,
+                  drain_timeout: float = 60.0, api_key: str = None) -> dict:
+    """
+    Runs each concurrency level for duration seconds against url (or a
+    freshly started mock-mode server) and returns the JSON report.
+    """
+    mix = mix or DEFAULT_MIX
+    uploads = prepare_uploads(distinct_files, pages, seed) if mix.get("upload") else []
+    process = None
+    if not url:
+        process, url = start_mock_server()
+    try:
+        import httpx
+        ready = httpx.get(f"{url.rstrip('/')}/readyz", timeout=10)
+        mode = ready.json().get("llm") if ready.status_code == 200 else None
+        results = asyncio.run(_run_levels(url.rstrip("/"), levels, duration, mix, uploads, seed, drain_timeout, api_key))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "url": url if process is None else "spawned",
+            "server_mode": mode,
+            "duration_seconds": duration,
+            "mix": mix,
+            "pages_per_upload": pages,
+            "seed": seed,
+        },
+        "levels": results,
+    }
+
+def summary(report: dict) -> List[str]:
+    """One line per concurrency level, for the terminal."""
+    lines = []
+    for level in report["levels"]:
+        parts = [f"c={level['concurrency']:<4} {level['throughput_rps']:>8} req/s  errors {level['error_rate']:.2%}"]
+        for name, op in level["operations"].items():
+            latency = op["latency_ms"]
+            if latency:
+                parts.append(f"{name} p50/p99 {latency['p50']:.1f}/{latency['p99']:.1f} ms")
+        ingestion = level["ingestion"]
+        if ingestion["accepted"]:
+            lag = ingestion["lag_ms"]
+            parts.append(f"ingest lag p50/p99 {lag.get('p50', 0) / 1000:.2f}/{lag.get('p99', 0) / 1000:.2f} s, "
+                         f"queue max {ingestion['queue_depth_max']}, unfinished {ingestion['unfinished']}")
+        lines.append("  ".join(parts))
+    return lines
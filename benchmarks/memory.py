@@ -0,0 +1,133 @@
+"""
+Index memory benchmark: resident memory of an index built from a large
+synthetic corpus, with the compact docstore versus LangChain's
+InMemoryDocstore (a Document per chunk). Each variant is built in a fresh
+process so their allocations do not mix:
+
+    python main.py bench --memory --count 2000 --pages 10 --output memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux); peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KiB on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def contract_text(index: int, pages: int, seed: int = 42) -> str:
+    """Text of a generated contract, without rendering a PDF (so the corpus can be large)."""
+    from create_samples import _contract_lines, generate_contract_spec
+    return "\n".join(_contract_lines(generate_contract_spec(index, seed), pages, lines_per_page=45))
+
+def measure_index_memory(compact: bool, count: int, pages: int, seed: int = 42, embeddings: str = "hashing") -> dict:
+    """Builds the index in this process and reports how much RSS it added."""
+    from benchmarks.components import QUERIES, _embeddings, percentiles
+    from rag_engine.vector_store import RAGEngine
+
+    engine = RAGEngine(embeddings=_embeddings(embeddings), compact_docstore=compact)
+    # Warm up imports and caches so they are not counted as index memory
+    engine.index_documents(contract_text(0, 1, seed + 1), "warmup.pdf", {"contract_id": "warmup"})
+    engine.delete_contracts({"warmup"})
+    gc.collect()
+    before = rss_bytes()
+
+    started = time.perf_counter()
+    chunks = text_chars = 0
+    for i in range(count):
+        text = contract_text(i, pages, seed)
+        text_chars += len(text)
+        documents = engine.split_documents(text, f"contract_{i:06d}.pdf", {"contract_id": f"CTR-{seed}-{i:06d}"})
+        chunks += len(documents)
+        engine.add_documents(documents)
+    build_seconds = time.perf_counter() - started
+    gc.collect()
+    added = rss_bytes() - before
+
+    store = engine.vector_store
+    vector_bytes = store.index.ntotal * store.index.d * 4
+    # Building a Document per hit is the compact docstore's extra cost at search time
+    ids = list(store.index_to_docstore_id.values())[:1000]
+    lookup_started = time.perf_counter()
+    for doc_id in ids:
+        store.docstore.search(doc_id)
+    lookup_seconds = time.perf_counter() - lookup_started
+
+    latencies = []
+    for query in QUERIES * 20:
+        query_started = time.perf_counter()
+        engine.search(query)
+        latencies.append(time.perf_counter() - query_started)
+
+    return {
+        "docstore": type(store.docstore).__name__,
+        "contracts": count,
+        "chunks": chunks,
+        "text_mb": round(text_chars / 2**20, 2),
+        "rss_added_mb": round(added / 2**20, 2),
+        # What is not the FAISS vectors: docstore, id mappings, allocator overhead
+        "rss_excluding_vectors_mb": round((added - vector_bytes) / 2**20, 2),
+        "vectors_mb": round(vector_bytes / 2**20, 2),
+        "build_seconds": round(build_seconds, 2),
+        "docstore_lookup_us": round(lookup_seconds / max(1, len(ids)) * 1e6, 2),
+        # Dominated by the FAISS scan, which varies with where the vectors land in memory
+        "search_latency_ms": percentiles(latencies),
+    }
+
+def _run_child(compact: bool, count: int, pages: int, seed: int, embeddings: str) -> dict:
+    command = [sys.executable, "-m", "benchmarks.memory", "--child", "compact" if compact else "in_memory",
+               "--count", str(count), "--pages", str(pages), "--seed", str(seed), "--embeddings", embeddings]
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run_memory_benchmark(count: int = 2000, pages: int = 10, seed: int = 42, embeddings: str = "hashing") -> dict:
+    from benchmarks.components import _git_commit
+    in_memory = _run_child(False, count, pages, seed, embeddings)
+    compact = _run_child(True, count, pages, seed, embeddings)
+    saved = in_memory["rss_added_mb"] - compact["rss_added_mb"]
+    return {
+        "meta": {"commit": _git_commit(), "count": count, "pages": pages, "seed": seed, "embeddings": embeddings},
+        "in_memory": in_memory,
+        "compact": compact,
+        "savings": {
+            "rss_mb": round(saved, 2),
+            "rss_percent": round(saved / in_memory["rss_added_mb"] * 100, 1) if in_memory["rss_added_mb"] else None,
+            "excluding_vectors_percent": round(
+                (in_memory["rss_excluding_vectors_mb"] - compact["rss_excluding_vectors_mb"])
+                / in_memory["rss_excluding_vectors_mb"] * 100, 1) if in_memory["rss_excluding_vectors_mb"] else None,
+        },
+    }
+
+def summary(report: dict) -> list:
+    lines = []
+    for name in ("in_memory", "compact"):
+        r = report[name]
+        lines.append(f"{r['docstore']:18} {r['chunks']} chunks: +{r['rss_added_mb']} MB RSS "
+                     f"({r['rss_excluding_vectors_mb']} MB besides {r['vectors_mb']} MB of vectors), "
+                     f"{r['docstore_lookup_us']} us per docstore lookup, search p50 {r['search_latency_ms'].get('p50')} ms")
+    s = report["savings"]
+    lines.append(f"Saved {s['rss_mb']} MB ({s['rss_percent']}% of index RSS, {s['excluding_vectors_percent']}% excluding vectors)")
+    return lines
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index memory benchmark (one variant per process)")
+    parser.add_argument("--child", choices=["compact", "in_memory"], required=True)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embeddings", default="hashing")
+    args = parser.parse_args()
+    print(json.dumps(measure_index_memory(args.child == "compact", args.count, args.pages, args.seed, args.embeddings)))
@@ -1,9 +1,11 @@
-import requests
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.documents import Document
 from rag_engine.vector_store import RAGEngine
 from config.settings import settings
-from typing import Dict, Any
+from utils.llm_client import get_llm, PRIORITY_CHAT
+from utils.metrics import observe_llm
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterator, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,7 +19,15 @@ class ChatEngine:
             api_key = settings.OPENAI_API_KEY
             if not api_key:
                 raise ValueError("OpenAI API Key is missing. Please set the OPENAI_API_KEY environment variable.")
-            self.llm = ChatOpenAI(openai_api_key=api_key, model=settings.OPENAI_MODEL, temperature=0)
+            # Shared, rate-limited client; chat traffic has priority over background work
+            self.llm = get_llm(priority=PRIORITY_CHAT)
+
+    def set_llm(self, llm):
+        """
+        Swaps the LLM client (key rotation). The RAG engine is kept, and calls
+        already running finish on the client they started with.
+        """
+        self.llm = llm
 
     def process_query(self, query: str, contract_id: str = None) -> Dict[str, Any]:
         # Retrieve context if contracts are indexed
@@ -28,6 +38,74 @@ class ChatEngine:
                 filter_dict = {"contract_id": contract_id}
             docs = self.rag_engine.search(query, filter=filter_dict)
 
+        answer = self._generate_answer(query, docs)
+
+        return {
+            "answer": answer,
+            "source_documents": docs
+        }
+
+    def process_batch(
+        self,
+        questions: List[str],
+        contract_ids: Optional[List[str]] = None,
+        max_concurrency: int = None,
+        router=None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Answers every question against every contract (or the whole corpus when
+        contract_ids is empty). Queries are embedded once, retrieval runs in
+        parallel per contract and at most max_concurrency LLM calls are in
+        flight. Results are yielded as they complete, not in input order.
+        """
+        targets = list(contract_ids) if contract_ids else [None]
+        max_concurrency = max(1, max_concurrency or settings.BATCH_LLM_CONCURRENCY)
+
+        vectors = None
+        if not self.rag_engine.is_empty:
+            vectors = self.rag_engine.embed_queries(questions)
+
+        def retrieve(contract_id):
+            if vectors is None:
+                return contract_id, [[] for _ in questions]
+            filter_dict = {"contract_id": contract_id} if contract_id else None
+            return contract_id, [
+                self.rag_engine.search_by_vector(vector, filter=filter_dict) for vector in vectors
+            ]
+
+        def answer(question, contract_id, docs):
+            routed = router.route(question, contract_id=contract_id) if router else None
+            if routed is not None:
+                return {"question": question, "contract_id": contract_id, **routed}
+            return {
+                "question": question,
+                "contract_id": contract_id,
+                "answer": self._generate_answer(question, docs),
+                "source_documents": docs,
+            }
+
+        with ThreadPoolExecutor(max_workers=min(len(targets), 8)) as retrieval_pool, \
+                ThreadPoolExecutor(max_workers=max_concurrency) as llm_pool:
+            retrievals = [retrieval_pool.submit(retrieve, cid) for cid in targets]
+            pending = []
+            for future in as_completed(retrievals):
+                try:
+                    contract_id, doc_lists = future.result()
+                except Exception as e:
+                    logger.error(f"Batch retrieval failed: {e}")
+                    continue
+                for question, docs in zip(questions, doc_lists):
+                    pending.append(llm_pool.submit(answer, question, contract_id, docs))
+
+            try:
+                for future in as_completed(pending):
+                    yield future.result()
+            finally:
+                # Consumer went away (e.g. client disconnected) - drop queued LLM calls
+                for future in pending:
+                    future.cancel()
+
+    def _generate_answer(self, query: str, docs: List[Document]) -> str:
         # Format context
         context_parts = []
         for i, doc in enumerate(docs):
@@ -61,16 +139,14 @@ class ChatEngine:
             user_message = f"Context:\n{context}\n\nQuestion:\n{query}"
 
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_message)
-            ])
+            with observe_llm(PRIORITY_CHAT) as call:
+                response = call.record(self.llm.invoke([
+                    SystemMessage(content=system_prompt),
+                    HumanMessage(content=user_message)
+                ]))
             answer = response.content if hasattr(response, 'content') else str(response)
         except Exception as e:
             answer = f"Error generating answer: {e}"
             logger.error(f"LLM Error: {e}")
 
-        return {
-            "answer": answer,
-            "source_documents": docs
-        }
\ No newline at end of file
+        return answer
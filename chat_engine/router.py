@@ -0,0 +1,243 @@
+from langchain_core.documents import Document
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import re
+import logging
+from metadata_extractor.rules import normalize_date
+
+logger = logging.getLogger(__name__)
+
+# Field keywords -> ContractMetadata attribute. Order matters: the first
+# pattern that matches wins, so more specific phrases come first.
+FIELD_PATTERNS = [
+    ("contract_id", re.compile(r"\b(contract\s+(id|number|no\.?)|reference\s+number)\b")),
+    ("renewal_terms", re.compile(r"\b(renew|renews|renewal|renewed|auto[- ]?renew\w*)\b")),
+    # Only date phrases: bare verbs ("when the contract ends") are usually about consequences, not the date
+    ("end_date", re.compile(r"\b(expire|expires|expired|expiry|expiration|end\s+date|run\s+until|valid\s+until)\b")),
+    ("start_date", re.compile(r"\b(start\s+date|effective\s+date|commencement\s+date|effective\s+from)\b")),
+    ("vendor", re.compile(r"\b(vendor|provider|supplier|licensor)\b")),
+    ("client", re.compile(r"\b(client|customer|licensee)\b")),
+    ("title", re.compile(r"\b(title|called|named)\b")),
+]
+
+LIST_PATTERN = re.compile(r"\b(list|which|what|show|how\s+many)\b.*\bcontracts\b|\ball\s+(the\s+)?contracts\b")
+COUNT_PATTERN = re.compile(r"\bhow\s+many\b")
+# Questions about the contract list itself; anything else about "contracts" needs a filter we understand
+LIST_ALL_PATTERN = re.compile(
+    r"^(please\s+)?(list|show(\s+me)?|what\s+are|which\s+are)\s+(all\s+)?(the\s+|our\s+|my\s+)?(indexed\s+|uploaded\s+)?contracts\W*$"
+    r"|^(what|which)\s+contracts\s+(do\s+(we|i)\s+have|are\s+(there|indexed|uploaded))\W*$"
+    r"|^how\s+many\s+contracts(\s+(are\s+there|do\s+(we|i)\s+have|are\s+(indexed|uploaded)))?\W*$"
+)
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+BEFORE_PATTERN = re.compile(r"\b(before|by|prior\s+to)\s+(\d{4}(?:-\d{2}-\d{2})?)\b")
+AFTER_PATTERN = re.compile(r"\b(after|from|since)\s+(\d{4}(?:-\d{2}-\d{2})?)\b")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Questions that need reasoning over clause text are always left to RAG.
+RAG_ONLY_PATTERN = re.compile(r"\b(why|explain|summari[sz]e|compare|clause|penalt\w*|liabilit\w*|terminat\w*|payment|fee|fees|cost)\b")
+
+# Tokens too generic to identify a particular contract.
+GENERIC_TOKENS = {
+    "the", "and", "for", "with", "contract", "contracts", "agreement", "license", "licence",
+    "service", "services", "inc", "ltd", "llc", "corp", "corporation", "company", "pdf",
+    "when", "does", "who", "what", "which", "vendor", "client", "date", "end", "start",
+}
+
+FIELD_LABELS = {
+    "title": "title",
+    "vendor": "vendor",
+    "client": "client",
+    "start_date": "start date",
+    "end_date": "end date",
+    "renewal_terms": "renewal terms",
+    "contract_id": "contract ID",
+}
+
+def _tokens(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        normalized = normalize_date(value)
+        return date.fromisoformat(normalized) if normalized else None
+
+def _query_bound(match: re.Match, inclusive_words: tuple) -> Optional[tuple]:
+    """
+    (keyword is inclusive, bound) for a before/after phrase. A bare year
+    stands for its last day after "after"/"by" and its first day otherwise,
+    so "after 2025" means from 2026 and "before 2025" means up to 2024.
+    """
+    word, value = match.group(1), match.group(2)
+    if len(value) == 4:
+        year = int(value)
+        return word in inclusive_words, date(year, 12, 31) if word in ("after", "by") else date(year, 1, 1)
+    parsed = _parse_date(value)
+    return (word in inclusive_words, parsed) if parsed else None
+
+class QueryRouter:
+    """
+    Answers simple metadata lookups and list/filter questions directly from
+    the extracted ContractMetadata, without retrieval or an LLM call.
+    route() returns None whenever the question should fall back to RAG.
+    """
+    def __init__(self, metadata_provider: Callable[[], Iterable[dict]]):
+        self.metadata_provider = metadata_provider
+
+    def route(self, query: str, contract_id: str = None) -> Optional[Dict[str, Any]]:
+        text = query.lower().strip()
+        if not text or RAG_ONLY_PATTERN.search(text):
+            return None
+
+        records = [r for r in self.metadata_provider() if r.get("metadata") is not None]
+        if not records:
+            return None
+
+        field = self._detect_field(text)
+
+        if LIST_PATTERN.search(text) and not contract_id:
+            return self._answer_list(text, field, records)
+
+        if field is None:
+            return None
+
+        record = self._resolve_contract(text, records, contract_id)
+        if record is None:
+            return None
+
+        return self._answer_field(field, record)
+
+    def _detect_field(self, text: str) -> Optional[str]:
+        for field, pattern in FIELD_PATTERNS:
+            if pattern.search(text):
+                return field
+        return None
+
+    def _record_tokens(self, record: dict) -> set:
+        meta = record["metadata"]
+        parts = [record.get("filename") or "", meta.title or "", meta.vendor or "", meta.client or ""]
+        return {t for t in _tokens(" ".join(parts)) if len(t) > 2 and t not in GENERIC_TOKENS}
+
+    def _resolve_contract(self, text: str, records: List[dict], contract_id: str = None) -> Optional[dict]:
+        if contract_id:
+            return next((r for r in records if r.get("id") == contract_id), None)
+
+        for record in records:
+            if record.get("id") and record["id"].lower() in text:
+                return record
+
+        query_tokens = set(_tokens(text))
+        scored = []
+        for record in records:
+            score = len(self._record_tokens(record) & query_tokens)
+            if score:
+                scored.append((score, record))
+
+        if not scored:
+            return None
+        scored.sort(key=lambda s: s[0], reverse=True)
+        # Ambiguous match (e.g. a shared client name) - let RAG handle it
+        if len(scored) > 1 and scored[0][0] == scored[1][0]:
+            return None
+        return scored[0][1]
+
+    def _describe(self, record: dict) -> str:
+        meta = record["metadata"]
+        name = meta.title or record.get("filename") or record.get("id")
+        return f"{name} ({record.get('filename')})" if meta.title and record.get("filename") else name
+
+    def _source_documents(self, records: List[dict], answer: str) -> List[Document]:
+        return [
+            Document(page_content=answer, metadata={"source": r.get("filename", "Unknown"), "contract_id": r.get("id")})
+            for r in records
+        ]
+
+    def _answer_field(self, field: str, record: dict) -> Optional[Dict[str, Any]]:
+        value = getattr(record["metadata"], field, None)
+        if not value:
+            return None
+
+        name = self._describe(record)
+        if field == "end_date":
+            answer = f"{name} expires on {value}."
+        elif field == "start_date":
+            answer = f"{name} started on {value}."
+        elif field == "renewal_terms":
+            answer = f"Renewal terms for {name}: {value}"
+        else:
+            answer = f"The {FIELD_LABELS[field]} of {name} is {value}."
+
+        logger.info("Routed query to metadata lookup (%s)", field)
+        return {"answer": answer, "source_documents": self._source_documents([record], answer), "routed": True}
+
+    def _answer_list(self, text: str, field: Optional[str], records: List[dict]) -> Optional[Dict[str, Any]]:
+        date_field = field if field in ("start_date", "end_date") else None
+        matches = records
+
+        before = BEFORE_PATTERN.search(text)
+        after = AFTER_PATTERN.search(text)
+        year = YEAR_PATTERN.search(text)
+        if date_field is None and (before or after or year):
+            # A date without "expire"/"start date" etc. ("contracts signed in 2024") - not a filter we understand
+            return None
+        if before or after:
+            # Compared as dates: string order breaks on bare years ("2025-12-31" > "2025")
+            dated = [(r, self._date_of(r, date_field)) for r in matches]
+            dated = [(r, d) for r, d in dated if d is not None]
+            if before:
+                bound = _query_bound(before, inclusive_words=("by",))
+                if bound is None:
+                    return None
+                inclusive, limit = bound
+                dated = [(r, d) for r, d in dated if (d <= limit if inclusive else d < limit)]
+            if after:
+                bound = _query_bound(after, inclusive_words=("from", "since"))
+                if bound is None:
+                    return None
+                inclusive, limit = bound
+                dated = [(r, d) for r, d in dated if (d >= limit if inclusive else d > limit)]
+            matches = [r for r, _ in dated]
+        elif year:
+            year = int(year.group(0))
+            matches = [r for r in matches if self._date_of(r, date_field) and self._date_of(r, date_field).year == year]
+        elif field in ("vendor", "client"):
+            # "Which contracts are with vendor X?"
+            query_tokens = set(_tokens(text))
+            matches = [
+                r for r in matches
+                if {t for t in _tokens(getattr(r["metadata"], field) or "") if t not in GENERIC_TOKENS} & query_tokens
+            ]
+            if not matches:
+                return None
+        elif field is not None:
+            # A field was named but no filter we understand - e.g. "which contracts renew automatically?"
+            return None
+        elif not LIST_ALL_PATTERN.search(text):
+            # No filter and not a plain list or count ("what contracts mention confidentiality?"): RAG
+            return None
+
+        if COUNT_PATTERN.search(text):
+            answer = f"There are {len(matches)} matching contracts."
+        elif not matches:
+            answer = "No contracts match that criteria."
+        else:
+            lines = []
+            for r in matches:
+                meta = r["metadata"]
+                details = ", ".join(
+                    f"{FIELD_LABELS[f]}: {getattr(meta, f)}"
+                    for f in ("vendor", "start_date", "end_date")
+                    if getattr(meta, f)
+                )
+                lines.append(f"- {self._describe(r)}" + (f" [{details}]" if details else ""))
+            answer = f"Found {len(matches)} matching contracts:\n" + "\n".join(lines)
+
+        logger.info("Routed query to metadata listing (%d matches)", len(matches))
+        return {"answer": answer, "source_documents": self._source_documents(matches, answer), "routed": True}
+
+    @staticmethod
+    def _date_of(record: dict, field: str) -> Optional[date]:
+        return _parse_date(getattr(record["metadata"], field, None))
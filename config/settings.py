@@ -10,6 +10,93 @@ class Settings:
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    # Log lines as "text" or one JSON object per line ("json")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+    # Write logs from a background thread; request threads never block on stdout
+    # (records are dropped, and counted, if more than LOG_QUEUE_SIZE are waiting)
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Fraction of requests whose INFO/DEBUG lines are kept (warnings and errors always are)
+    LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0"))
     API_ADMIN_KEY = os.getenv("API_ADMIN_KEY", "admin-secret")
+    # Answer simple metadata questions (expiry, vendor, ...) without RAG/LLM
+    ENABLE_QUERY_ROUTER = os.getenv("ENABLE_QUERY_ROUTER", "true").lower() == "true"
+
+    # Max characters of contract text sent to the LLM for metadata extraction
+    METADATA_MAX_CHARS = int(os.getenv("METADATA_MAX_CHARS", "10000"))
+    # Long contracts: chunks retrieved per missing field, plus the opening kept verbatim
+    METADATA_CHUNKS_PER_FIELD = int(os.getenv("METADATA_CHUNKS_PER_FIELD", "2"))
+    METADATA_HEAD_CHARS = int(os.getenv("METADATA_HEAD_CHARS", "2000"))
+    # Ingestion queue: worker threads, max waiting uploads (429 beyond that) and
+    # how strongly small files are preferred (bytes per second of queue delay)
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+    INGEST_MAX_QUEUE = int(os.getenv("INGEST_MAX_QUEUE", "100"))
+    INGEST_SIZE_PRIORITY_RATE = float(os.getenv("INGEST_SIZE_PRIORITY_RATE", "1000000"))
+    # Bulk ingestion: extraction processes and chunks embedded per batch
+    INGEST_PROCESSES = int(os.getenv("INGEST_PROCESSES", str(os.cpu_count() or 2)))
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "512"))
+    # Store chunk text once per contract (offsets into it) instead of a Document per chunk
+    COMPACT_DOCSTORE = os.getenv("COMPACT_DOCSTORE", "true").lower() in ("1", "true", "yes")
+    # RAM budget for the server's in-memory index (0 = unlimited); least recently searched contracts are evicted to disk beyond it
+    MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "0"))
+    # Where evicted contracts are written ("" = the system temp directory)
+    COLD_INDEX_DIR = os.getenv("COLD_INDEX_DIR", "")
+    # Cold segments are merged into one beyond this many, so global searches do not scan many small files
+    COLD_MAX_SEGMENTS = int(os.getenv("COLD_MAX_SEGMENTS", "8"))
+    # Directory of a persisted index built by 'main.py ingest' (loaded at startup if set)
+    INDEX_DIR = os.getenv("INDEX_DIR", "")
+    # Background metadata extraction threads and how long the pipeline waits for them
+    METADATA_WORKERS = int(os.getenv("METADATA_WORKERS", "4"))
+    METADATA_TIMEOUT = float(os.getenv("METADATA_TIMEOUT", "120"))
+    # Force mock mode (local embeddings, fake LLM) even if a key is set, e.g. for offline load tests
+    MOCK_MODE = os.getenv("MOCK_MODE", "").lower() in ("1", "true", "yes")
+    # Mock LLM cost profile: seconds before the first token, then tokens per second (0 = instant)
+    MOCK_LLM_LATENCY = float(os.getenv("MOCK_LLM_LATENCY", "0"))
+    MOCK_LLM_TOKENS_PER_SECOND = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "0"))
+    # Max seconds a chat request waits for the startup warm-up before a 503
+    WARMUP_WAIT_SECONDS = float(os.getenv("WARMUP_WAIT_SECONDS", "30"))
+    # Multi-worker serving: directory of shared, versioned index segments (replaces INDEX_DIR)
+    SHARED_INDEX_DIR = os.getenv("SHARED_INDEX_DIR", "")
+    SHARED_INDEX_POLL_SECONDS = float(os.getenv("SHARED_INDEX_POLL_SECONDS", "2"))
+    SHARED_INDEX_MAX_SEGMENTS = int(os.getenv("SHARED_INDEX_MAX_SEGMENTS", "32"))
+    # Seconds segments merged away by compaction stay on disk for workers that still map them
+    SHARED_INDEX_RETIRE_SECONDS = float(os.getenv("SHARED_INDEX_RETIRE_SECONDS", "300"))
+    # MCP server without SHARED_INDEX_DIR/INDEX_DIR: folder of PDFs it indexes and watches
+    # (inotify, polling as fallback), and where it keeps that index and its file manifest
+    # across restarts (empty = in memory only)
+    MCP_CONTRACTS_DIR = os.getenv("MCP_CONTRACTS_DIR", "sample_contracts")
+    MCP_WATCH = os.getenv("MCP_WATCH", "true").lower() in ("1", "true", "yes")
+    MCP_WATCH_POLL_SECONDS = float(os.getenv("MCP_WATCH_POLL_SECONDS", "2"))
+    MCP_STATE_DIR = os.getenv("MCP_STATE_DIR", "")
+    # GET /api/contracts page size (default and upper bound)
+    CONTRACTS_PAGE_SIZE = int(os.getenv("CONTRACTS_PAGE_SIZE", "500"))
+    CONTRACTS_MAX_PAGE_SIZE = int(os.getenv("CONTRACTS_MAX_PAGE_SIZE", "5000"))
+    # /api/events: replayable history, keep-alive interval and page progress throttle
+    EVENT_HISTORY = int(os.getenv("EVENT_HISTORY", "1000"))
+    EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+    PROGRESS_EVENT_INTERVAL = float(os.getenv("PROGRESS_EVENT_INTERVAL", "0.25"))
+    # Per caller (API key, or client IP without one): requests per minute, requests in
+    # flight (uploads: ingestion jobs queued or running). 0 = unlimited; the admin key is exempt
+    RATE_LIMIT_CHAT_PER_MINUTE = float(os.getenv("RATE_LIMIT_CHAT_PER_MINUTE", "120"))
+    RATE_LIMIT_UPLOAD_PER_MINUTE = float(os.getenv("RATE_LIMIT_UPLOAD_PER_MINUTE", "60"))
+    MAX_CONCURRENT_CHATS_PER_KEY = int(os.getenv("MAX_CONCURRENT_CHATS_PER_KEY", "8"))
+    MAX_CONCURRENT_UPLOADS_PER_KEY = int(os.getenv("MAX_CONCURRENT_UPLOADS_PER_KEY", "10"))
+    # Max concurrent LLM calls per /api/chat/batch request
+    BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+    # Shared LLM client: rate limits (0 disables a limit), retries and connection pool
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+    LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+    LLM_BACKGROUND_RESERVE = float(os.getenv("LLM_BACKGROUND_RESERVE", "0.2"))
+    LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "512"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30.0"))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+    # Pipeline histograms, counters and gauges served from /metrics (Prometheus text format)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Admin request profiling (X-Profile header): profiles kept and functions shown per report
+    PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "50"))
+    PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "40"))
 
 settings = Settings()
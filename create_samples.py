@@ -1,6 +1,13 @@
 from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
+from datetime import date, timedelta
+import argparse
+import io
+import json
 import os
+import random
+import textwrap
 
 def create_contract(filename, title, vendor, client, start_date, end_date, content):
     c = canvas.Canvas(filename, pagesize=LETTER)
@@ -24,6 +31,184 @@ def create_contract(filename, title, vendor, client, start_date, end_date, conte
     c.save()
     print(f"Created {filename}")
 
+VENDORS = ["TechSolutions Inc.", "SoftWareHouse Ltd.", "CloudNine Hosting LLC", "Datacore Systems GmbH",
+           "NetSecure Partners", "Bluefin Analytics Inc.", "Orbit Telecom Ltd.", "Helix IT Services"]
+CLIENTS = ["Global Corp", "Acme Manufacturing", "Northwind Traders", "Contoso Health", "Initech"]
+TITLES = ["IT Service Agreement", "Enterprise Software License", "Cloud Hosting Agreement",
+          "Master Services Agreement", "Support and Maintenance Contract", "Data Processing Addendum"]
+
+# Clause templates; fields are filled from the contract spec
+CLAUSE_TEMPLATES = [
+    ("Scope of Services", "{vendor} shall provide {service} to {client} in accordance with the service levels set out in Schedule {schedule}."),
+    ("Payment Terms", "{client} shall pay {vendor} ${fee:,} per {period}, net {net} days from the date of invoice. Late payments accrue interest at {interest}% per month."),
+    ("Renewal Clause", "This agreement shall automatically renew for successive {renewal}-year terms unless either party gives written notice of non-renewal at least {notice} days prior to the end of the current term."),
+    ("Termination", "Either party may terminate this agreement for cause with {notice} days written notice if the other party materially breaches its obligations and fails to cure the breach."),
+    ("Confidentiality", "Each party shall keep the other party's confidential information secret and use it only for the purposes of this agreement, during the term and for {years} years thereafter."),
+    ("Service Levels", "{vendor} guarantees {uptime}% monthly availability. Service credits of {credit}% of the monthly fee apply for each full hour of downtime beyond the guaranteed level."),
+    ("Data Protection", "{vendor} shall process personal data only on documented instructions from {client} and shall notify {client} of any personal data breach within {hours} hours."),
+    ("Limitation of Liability", "Neither party's aggregate liability under this agreement shall exceed the fees paid in the {months} months preceding the claim, except for breaches of confidentiality."),
+    ("Governing Law", "This agreement is governed by the laws of {jurisdiction}. The courts of {jurisdiction} have exclusive jurisdiction over any dispute."),
+    ("Support", "Standard support is provided {support_hours}. Premium support requires an additional addendum and is billed at ${hourly} per hour."),
+]
+SERVICES = ["24/7 server monitoring and maintenance", "managed backup and recovery", "help desk support",
+            "network security operations", "hosting of the customer portal", "licensed access to the DataFlow software"]
+JURISDICTIONS = ["the State of New York", "England and Wales", "the State of California", "Germany", "Ontario"]
+
+def load_clause_templates(path: str) -> list:
+    """
+    Reads clause templates from a JSON file: a list of [heading, template]
+    pairs or {"heading": ..., "template": ...} objects. Templates may use
+    the same {fields} as CLAUSE_TEMPLATES.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    templates = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            entry = (entry["heading"], entry["template"])
+        heading, template = entry
+        templates.append((heading, template))
+    if not templates:
+        raise ValueError(f"No clause templates in {path}")
+    return templates
+
+def generate_contract_spec(index: int, seed: int = 42, templates: list = None) -> dict:
+    """
+    Deterministic contract content for the index-th generated contract.
+    Clauses are drawn from templates (default CLAUSE_TEMPLATES).
+    """
+    templates = templates or CLAUSE_TEMPLATES
+    rng = random.Random(f"{seed}-{index}")
+    start = date(2020, 1, 1) + timedelta(days=rng.randrange(0, 5 * 365))
+    end = start + timedelta(days=365 * rng.choice([1, 2, 3]) - 1)
+    values = {
+        "vendor": rng.choice(VENDORS),
+        "client": rng.choice(CLIENTS),
+        "service": rng.choice(SERVICES),
+        "schedule": rng.choice("ABCD"),
+        "fee": rng.randrange(1, 100) * 500,
+        "period": rng.choice(["month", "quarter", "year"]),
+        "net": rng.choice([15, 30, 45, 60]),
+        "interest": rng.choice([1, 1.5, 2]),
+        "renewal": rng.choice([1, 2, 3]),
+        "notice": rng.choice([30, 60, 90]),
+        "years": rng.choice([2, 3, 5]),
+        "uptime": rng.choice([99.5, 99.9, 99.95]),
+        "credit": rng.choice([2, 5, 10]),
+        "hours": rng.choice([24, 48, 72]),
+        "months": rng.choice([6, 12, 24]),
+        "jurisdiction": rng.choice(JURISDICTIONS),
+        "support_hours": rng.choice(["during business hours", "24/7"]),
+        "hourly": rng.choice([150, 200, 250]),
+    }
+    clauses = rng.sample(templates, k=rng.randrange(min(5, len(templates)), len(templates) + 1))
+    return {
+        "title": rng.choice(TITLES),
+        "vendor": values["vendor"],
+        "client": values["client"],
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "contract_id": f"CTR-{seed}-{index:06d}",
+        "clauses": [(heading, template.format(**values)) for heading, template in clauses],
+    }
+
+def _contract_lines(spec: dict, pages: int, lines_per_page: int) -> list:
+    header = [
+        f"Contract ID: {spec['contract_id']}",
+        f"Vendor: {spec['vendor']}",
+        f"Client: {spec['client']}",
+        f"Contract Start Date: {spec['start_date']}",
+        f"Contract End Date: {spec['end_date']}",
+        "",
+    ]
+    body = []
+    for number, (heading, text) in enumerate(spec["clauses"], start=1):
+        body.append(f"{number}. {heading}")
+        body.extend(textwrap.wrap(text, width=85))
+        body.append("")
+    # Repeat the clauses (as numbered schedules) until the page count is filled
+    lines = header + body
+    schedule = 1
+    while len(lines) < pages * lines_per_page:
+        lines.append(f"Schedule {schedule}")
+        lines.extend(body)
+        schedule += 1
+    return lines[:pages * lines_per_page]
+
+def _page_image(title: str, lines: list, width: int, height: int):
+    # Image-only page, like a scan: no text layer, OCR is the only way to read it
+    from PIL import Image, ImageDraw, ImageFont
+    dpi_scale = 2
+    image = Image.new("L", (int(width) * dpi_scale, int(height) * dpi_scale), color=255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=11 * dpi_scale)
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+    y = 50 * dpi_scale
+    if title:
+        draw.text((100 * dpi_scale, y), title, fill=0, font=font)
+        y += 30 * dpi_scale
+    for line in lines:
+        draw.text((100 * dpi_scale, y), line, fill=0, font=font)
+        y += 14 * dpi_scale
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    buffer.seek(0)
+    return ImageReader(buffer)
+
+def create_generated_contract(filename: str, spec: dict, pages: int = 1, layer: str = "text"):
+    """
+    Writes a multi-page contract PDF from generate_contract_spec().
+    layer: 'text' (text layer on every page), 'scanned' (image-only pages)
+    or 'mixed' (every second page is image-only).
+    """
+    width, height = LETTER
+    lines_per_page = 48
+    lines = _contract_lines(spec, pages, lines_per_page)
+    # invariant: no timestamps or random IDs, so the same spec gives the same bytes
+    c = canvas.Canvas(filename, pagesize=LETTER, invariant=1)
+    for page in range(pages):
+        page_lines = lines[page * lines_per_page:(page + 1) * lines_per_page]
+        title = spec["title"] if page == 0 else ""
+        scanned = layer == "scanned" or (layer == "mixed" and page % 2 == 1)
+        if scanned:
+            c.drawImage(_page_image(title, page_lines, width, height), 0, 0, width=width, height=height)
+        else:
+            if title:
+                c.setFont("Helvetica-Bold", 16)
+                c.drawString(100, height - 50, title)
+            text = c.beginText(100, height - 80 if title else height - 50)
+            text.setFont("Helvetica", 11)
+            for line in page_lines:
+                text.textLine(line)
+            c.drawText(text)
+        c.showPage()
+    c.save()
+
+def generate_corpus(out_dir: str, count: int, pages: int = 1, scanned: float = 0.0, mixed: float = 0.0, seed: int = 42,
+                    templates: list = None) -> list:
+    """
+    Writes count generated contracts to out_dir. The scanned and mixed
+    fractions of them get image-only or mixed-layer pages; templates
+    replaces CLAUSE_TEMPLATES. Returns one dict per file with path,
+    layer, pages and spec.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # Exact proportions, spread over the corpus by the seed
+    scanned_count = round(count * scanned)
+    mixed_count = min(count - scanned_count, round(count * mixed))
+    layers = ["scanned"] * scanned_count + ["mixed"] * mixed_count
+    layers += ["text"] * (count - len(layers))
+    random.Random(seed).shuffle(layers)
+    corpus = []
+    for i, layer in enumerate(layers):
+        spec = generate_contract_spec(i, seed, templates)
+        path = os.path.join(out_dir, f"contract_{i:05d}_{layer}.pdf")
+        create_generated_contract(path, spec, pages=pages, layer=layer)
+        corpus.append({"path": path, "layer": layer, "pages": pages, "spec": spec})
+    return corpus
+
 def main():
     os.makedirs("sample_contracts", exist_ok=True)
 
@@ -79,4 +264,19 @@ def main():
     )
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Create sample contract PDFs")
+    parser.add_argument("--count", type=int, help="Generate this many synthetic contracts instead of the two samples")
+    parser.add_argument("--pages", type=int, default=1, help="Pages per generated contract")
+    parser.add_argument("--scanned", type=float, default=0.0, help="Fraction of image-only (scanned) contracts")
+    parser.add_argument("--mixed", type=float, default=0.0, help="Fraction of contracts with alternating text and image pages")
+    parser.add_argument("--seed", type=int, default=42, help="Seed; the same seed produces identical files")
+    parser.add_argument("--out", default="generated_contracts", help="Output directory for generated contracts")
+    parser.add_argument("--templates", help="JSON file of [heading, template] clause pairs to use instead of the built-in ones")
+    args = parser.parse_args()
+
+    if args.count:
+        templates = load_clause_templates(args.templates) if args.templates else None
+        corpus = generate_corpus(args.out, args.count, args.pages, args.scanned, args.mixed, args.seed, templates)
+        print(f"Created {len(corpus)} contracts ({args.pages} pages each) in {args.out}")
+    else:
+        main()
@@ -11,12 +11,40 @@ function App() {
 
   useEffect(() => {
     fetchContracts();
+
+    // Server pushes contract changes; merge them by id instead of polling
+    const source = new EventSource('/api/events');
+    source.addEventListener('contract', (e) => {
+      const update = JSON.parse(e.data);
+      setContracts((prev) => {
+        if (update.status === 'removed') {
+          return prev.filter((c) => c.id !== update.id);
+        }
+        const index = prev.findIndex((c) => c.id === update.id);
+        if (index === -1) {
+          return [...prev, update];
+        }
+        const next = [...prev];
+        next[index] = { ...prev[index], ...update };
+        return next;
+      });
+    });
+    // Missed too many events to replay: load the full list again
+    source.addEventListener('reset', fetchContracts);
+    return () => source.close();
   }, []);
 
   const fetchContracts = async () => {
     try {
-      const res = await axios.get('/api/contracts');
-      setContracts(res.data);
+      // Follow the cursor until every page is loaded
+      let all = [];
+      let cursor = null;
+      do {
+        const res = await axios.get('/api/contracts', { params: cursor ? { cursor } : {} });
+        all = all.concat(res.data);
+        cursor = res.headers['x-next-cursor'];
+      } while (cursor);
+      setContracts(all);
     } catch (err) {
       console.error("Failed to fetch contracts", err);
     }
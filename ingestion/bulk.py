@@ -0,0 +1,376 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from ingestion.pdf_loader import PDFLoader
+from rag_engine.docstore import metadata_items
+from config.settings import settings
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+@dataclass
+class BulkItem:
+    path: str
+    source: str
+    contract_id: str
+    content_hash: Optional[str] = None
+
+@dataclass
+class BulkStats:
+    files: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    pages: int = 0
+    chunks: int = 0
+    embed_batches: int = 0
+    split_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, float]:
+        elapsed = self.elapsed or (time.perf_counter() - self.started)
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "embed_batches": self.embed_batches,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_sec": round(self.files / elapsed, 2) if elapsed else 0.0,
+            "pages_per_sec": round(self.pages / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_sec": round(self.chunks / self.split_seconds, 2) if self.split_seconds else 0.0,
+            "embeddings_per_sec": round(self.chunks / self.embed_seconds, 2) if self.embed_seconds else 0.0,
+        }
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _extract(path: str, content_hash: str = None):
+    # Runs in a worker process: pypdf and OCR are CPU-bound and hold the GIL
+    content_hash = content_hash or _file_hash(path)
+    text, pages = PDFLoader.extract_text_and_page_count(path)
+    return text, pages, content_hash
+
+class BulkIngestor:
+    """
+    Ingests many PDFs at once. Text extraction is spread over worker
+    processes, chunks from many files are embedded together in batches of
+    batch_size, and metadata extraction runs on a thread pool once a
+    contract's batch is indexed.
+
+    Callbacks:
+      on_done(item, text, metadata)   contract indexed (metadata may be None)
+      on_failed(item, error)          contract could not be indexed
+      on_checkpoint(items)            a batch was committed to the index
+    """
+    def __init__(self, rag_engine, metadata_extractor=None, processes: int = None, batch_size: int = None,
+                 on_done: Callable = None, on_failed: Callable = None, on_checkpoint: Callable = None):
+        self.rag_engine = rag_engine
+        self.metadata_extractor = metadata_extractor
+        self.processes = processes or settings.INGEST_PROCESSES
+        self.batch_size = batch_size or settings.EMBED_BATCH_SIZE
+        self.on_done = on_done or (lambda item, text, meta: None)
+        self.on_failed = on_failed or (lambda item, error: None)
+        self.on_checkpoint = on_checkpoint or (lambda items: None)
+
+    def ingest(self, items: List[BulkItem]) -> BulkStats:
+        stats = BulkStats()
+        self._pending = []
+        self._documents = []
+        processes = max(1, min(self.processes, len(items)))
+
+        with ThreadPoolExecutor(max_workers=settings.METADATA_WORKERS, thread_name_prefix="bulk-metadata") as metadata_pool:
+            self._metadata_pool = metadata_pool
+            self._metadata_futures = []
+            if processes == 1:
+                # Not worth spawning a process for a single file
+                for item in items:
+                    try:
+                        result = _extract(item.path, item.content_hash)
+                    except Exception as e:
+                        self._fail(stats, item, e)
+                        continue
+                    self._add(stats, item, *result)
+            else:
+                # spawn: forking a process that already runs threads is unsafe
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+                    futures = {pool.submit(_extract, item.path, item.content_hash): item for item in items}
+                    for future in as_completed(futures):
+                        item = futures[future]
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            self._fail(stats, item, e)
+                            continue
+                        self._add(stats, item, *result)
+
+            self._flush(stats)
+            for future in self._metadata_futures:
+                future.result()
+
+        stats.finish()
+        logger.info(f"Bulk ingestion finished: {stats.as_dict()}")
+        return stats
+
+    def _fail(self, stats: BulkStats, item: BulkItem, error):
+        stats.failed += 1
+        logger.error(f"Bulk ingestion failed for {item.source}: {error}")
+        self.on_failed(item, str(error))
+
+    def _add(self, stats: BulkStats, item: BulkItem, text: str, pages: int, content_hash: str):
+        stats.pages += pages
+        item.content_hash = item.content_hash or content_hash
+        if not text:
+            self._fail(stats, item, "No text extracted")
+            return
+
+        started = time.perf_counter()
+        documents = self.rag_engine.split_documents(text, item.source, metadata={"contract_id": item.contract_id})
+        stats.split_seconds += time.perf_counter() - started
+        if not documents:
+            self._fail(stats, item, "Content extraction yielded no indexable text.")
+            return
+
+        self._documents.extend(documents)
+        self._pending.append((item, text))
+        if len(self._documents) >= self.batch_size:
+            self._flush(stats)
+
+    def _flush(self, stats: BulkStats):
+        if not self._pending:
+            return
+        documents, pending = self._documents, self._pending
+        self._documents, self._pending = [], []
+
+        started = time.perf_counter()
+        try:
+            self.rag_engine.add_documents(documents)
+        except Exception as e:
+            for item, _ in pending:
+                self._fail(stats, item, e)
+            return
+        stats.embed_seconds += time.perf_counter() - started
+        stats.embed_batches += 1
+        stats.chunks += len(documents)
+        stats.files += len(pending)
+        logger.info(f"Embedded batch of {len(documents)} chunks from {len(pending)} files")
+
+        # Metadata needs the contract indexed (retrieval for long documents),
+        # and overlaps with extraction and embedding of the next batch
+        for item, text in pending:
+            self._metadata_futures.append(self._metadata_pool.submit(self._finish_item, item, text))
+        self.on_checkpoint([item for item, _ in pending])
+
+    def _finish_item(self, item: BulkItem, text: str):
+        meta = None
+        if self.metadata_extractor is not None:
+            try:
+                meta = self.metadata_extractor.extract(text, rag_engine=self.rag_engine, contract_id=item.contract_id)
+            except Exception as e:
+                logger.warning(f"Metadata extraction failed for {item.source}: {e}")
+        self.on_done(item, text, meta)
+
+MANIFEST_FILE = "manifest.jsonl"
+
+def read_manifest(index_dir: str) -> Dict[str, dict]:
+    """
+    Returns the latest manifest entry per file path. Later lines win, so a
+    file that failed and was retried shows its most recent outcome.
+    """
+    entries = {}
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return entries
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn last line from an interrupted run
+                continue
+            entries[entry["path"]] = entry
+    return entries
+
+class DirectoryIngestion:
+    """
+    Resumable bulk ingestion of a directory into a persisted index.
+
+    index_dir holds manifest.jsonl (one line per file, including its
+    extracted metadata) and the index, saved by RAGEngine.save_version(). Manifest lines are only written after
+    the index containing that file has been saved, so after an interrupt the
+    next run skips everything in the manifest and drops any chunks of
+    contracts that were indexed but never recorded. Modified files replace
+    their previous chunks; files that no longer exist are removed from the
+    index and recorded as "removed". A file with the same bytes as an indexed
+    one is not extracted again: it is recorded as "duplicate" with that
+    contract's ID, and indexed itself once that contract is gone.
+    """
+    def __init__(self, rag_engine, metadata_extractor=None, index_dir: str = None,
+                 checkpoint_seconds: float = 60.0, processes: int = None, batch_size: int = None):
+        self.rag_engine = rag_engine
+        self.metadata_extractor = metadata_extractor
+        self.index_dir = index_dir or settings.INDEX_DIR
+        self.checkpoint_seconds = checkpoint_seconds
+        self.processes = processes
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._unsaved = []
+        self._last_checkpoint = time.monotonic()
+
+    def run(self, directory: str) -> BulkStats:
+        os.makedirs(self.index_dir, exist_ok=True)
+        manifest = read_manifest(self.index_dir)
+        done = {path: e for path, e in manifest.items() if e.get("status") == "indexed"}
+        duplicates = {path: e for path, e in manifest.items() if e.get("status") == "duplicate"}
+
+        self.rag_engine.load(self.index_dir)
+        self._drop_unrecorded(done)
+
+        files = {}
+        for path in sorted(glob.glob(os.path.join(directory, "**", "*.pdf"), recursive=True)):
+            st = os.stat(path)
+            files[path] = {"size": st.st_size, "mtime": st.st_mtime}
+
+        def unchanged(entry: dict) -> bool:
+            info = files.get(entry["path"])
+            if info is None:
+                # Manifest paths may come from other directories ingested into the same index
+                return os.path.exists(entry["path"])
+            return entry.get("size") == info["size"] and entry.get("mtime") == info["mtime"]
+
+        # Modified files lose their previous chunks and get a fresh contract ID
+        kept = {path: e for path, e in done.items() if unchanged(e)}
+        stale = {e["contract_id"] for path, e in done.items() if path not in kept}
+        removed = [e for e in list(done.values()) + list(duplicates.values()) if not os.path.exists(e["path"])]
+        self._drop_stale(stale, removed)
+
+        # Content already indexed is skipped, whatever the file is called
+        indexed = {e["content_hash"]: e["contract_id"] for e in kept.values() if e.get("content_hash")}
+        live = set(indexed.values())
+        items, skipped = [], []
+        self._file_info = {}
+        for path, info in files.items():
+            previous = duplicates.get(path)
+            if path in kept or (previous and unchanged(previous) and previous["contract_id"] in live):
+                continue
+            self._file_info[path] = info
+            content_hash = _file_hash(path)
+            item = BulkItem(path=path, source=os.path.basename(path), content_hash=content_hash,
+                            contract_id=indexed.get(content_hash) or str(uuid.uuid4()))
+            if content_hash in indexed:
+                skipped.append(self._entry(item, "duplicate"))
+                continue
+            indexed[content_hash] = item.contract_id
+            items.append(item)
+        # Recorded at the next checkpoint, with the contracts they point to
+        with self._lock:
+            self._unsaved.extend(skipped)
+
+        logger.info(f"Bulk ingestion of {directory}: {len(items)} files to process, {len(kept)} already done, "
+                    f"{len(skipped)} duplicates")
+        if not items:
+            if stale or removed or skipped:
+                self._checkpoint()
+            return BulkStats(duplicates=len(skipped))
+
+        ingestor = BulkIngestor(
+            self.rag_engine,
+            metadata_extractor=self.metadata_extractor,
+            processes=self.processes,
+            batch_size=self.batch_size,
+            on_done=self._on_done,
+            on_failed=self._on_failed,
+            on_checkpoint=self._on_checkpoint,
+        )
+        stats = ingestor.ingest(items)
+        stats.duplicates = len(skipped)
+        self._checkpoint()
+        return stats
+
+    def _drop_unrecorded(self, done: Dict[str, dict]):
+        if self.rag_engine.is_empty:
+            return
+        recorded = {e["contract_id"] for e in done.values()}
+        indexed = {metadata.get("contract_id") for _, metadata in metadata_items(self.rag_engine.vector_store.docstore)}
+        orphans = indexed - recorded
+        if orphans:
+            removed = self.rag_engine.delete_contracts(orphans)
+            logger.info(f"Dropped {removed} chunks of {len(orphans)} contracts from an interrupted run")
+
+    def _drop_stale(self, stale: set, removed: List[dict]):
+        """Deletes the chunks of contracts in stale (modified or deleted files) and records removed files."""
+        if not stale and not removed:
+            return
+        dropped = self.rag_engine.delete_contracts(stale)
+        logger.info(f"Dropped {dropped} chunks of {len(stale)} contracts; {len(removed)} files were deleted")
+        # Recorded at the next checkpoint, once the index without them is saved
+        with self._lock:
+            self._unsaved.extend(
+                {"path": entry["path"], "source": entry.get("source"), "contract_id": entry["contract_id"], "status": "removed"}
+                for entry in removed
+            )
+
+    def _entry(self, item: BulkItem, status: str, **extra) -> dict:
+        entry = {"path": item.path, "source": item.source, "contract_id": item.contract_id,
+                 "content_hash": item.content_hash, "status": status}
+        entry.update(self._file_info.get(item.path, {}))
+        entry.update(extra)
+        return entry
+
+    def _on_done(self, item: BulkItem, text: str, meta):
+        entry = self._entry(item, "indexed", metadata=meta.model_dump() if meta is not None else None)
+        with self._lock:
+            self._unsaved.append(entry)
+
+    def _on_failed(self, item: BulkItem, error: str):
+        # Failed files are not in the index, so they can be recorded straight away
+        self._append([self._entry(item, "failed", error=error)])
+
+    def _on_checkpoint(self, items: List[BulkItem]):
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds:
+            self._checkpoint()
+
+    def _checkpoint(self):
+        # Snapshot first: everything in it is already in the in-memory index,
+        # so it is covered by the save below
+        with self._lock:
+            entries, self._unsaved = self._unsaved, []
+        self._save_index()
+        self._append(entries)
+        self._last_checkpoint = time.monotonic()
+        logger.info(f"Checkpoint: index saved, {len(entries)} files recorded")
+
+    def _save_index(self):
+        # A new version directory, then one pointer swap: readers never see a half-written index
+        self.rag_engine.save_version(self.index_dir)
+
+    def _append(self, entries: List[dict]):
+        if not entries:
+            return
+        with self._lock:
+            with open(os.path.join(self.index_dir, MANIFEST_FILE), "a") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
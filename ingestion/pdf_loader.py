@@ -1,40 +1,65 @@
-from pypdf import PdfReader
 from utils.logger import setup_logger
+from utils.metrics import PDF_PAGE_SECONDS, OCR_PAGE_SECONDS
+from typing import Callable, Tuple
 import io
 import os
+import time
 
 logger = setup_logger(__name__)
 
-# Check for OCR dependencies
-try:
-    import pytesseract
-    from pdf2image import convert_from_path, convert_from_bytes
-    from pdf2image.exceptions import PDFInfoNotInstalledError
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+# OCR dependencies are imported on first use (most PDFs have a text layer),
+# which keeps them off the server's startup path
+OCR_AVAILABLE = None
+
+def _load_ocr() -> bool:
+    global OCR_AVAILABLE, pytesseract, convert_from_path, convert_from_bytes, PDFInfoNotInstalledError
+    if OCR_AVAILABLE is None:
+        try:
+            import pytesseract
+            from pdf2image import convert_from_path, convert_from_bytes
+            from pdf2image.exceptions import PDFInfoNotInstalledError
+            OCR_AVAILABLE = True
+        except ImportError:
+            OCR_AVAILABLE = False
+    return OCR_AVAILABLE
 
 class PDFLoader:
     @staticmethod
-    def extract_text_from_file(file_path: str, use_ocr_if_empty: bool = True) -> str:
+    def extract_text_from_file(file_path: str, use_ocr_if_empty: bool = True, progress: Callable[[int, int], None] = None) -> str:
         """
         Extracts text from a PDF file.
         If extracted text is empty and use_ocr_if_empty is True, tries OCR.
+        progress, if given, is called as progress(page_number, page_count).
+        """
+        text, _ = PDFLoader.extract_text_and_page_count(file_path, use_ocr_if_empty, progress)
+        return text
+
+    @staticmethod
+    def extract_text_and_page_count(file_path: str, use_ocr_if_empty: bool = True, progress: Callable[[int, int], None] = None) -> Tuple[str, int]:
         """
-        logger.info(f"Extracting text from {file_path}")
+        Same as extract_text_from_file, but also returns the number of pages
+        (used for throughput reporting in bulk ingestion).
+        """
+        logger.info("Extracting text from %s", file_path)
         text = ""
         try:
+            from pypdf import PdfReader
             reader = PdfReader(file_path)
-            for page in reader.pages:
+            page_count = len(reader.pages)
+            for i, page in enumerate(reader.pages):
+                started = time.perf_counter()
                 page_text = page.extract_text()
+                PDF_PAGE_SECONDS.observe(time.perf_counter() - started)
                 if page_text:
                     text += page_text + "\n"
+                if progress:
+                    progress(i + 1, page_count)
 
             if not text.strip() and use_ocr_if_empty:
                 logger.info("No text extracted using standard method. Attempting OCR...")
-                return PDFLoader._ocr_extract_from_file(file_path)
+                return PDFLoader._ocr_extract_from_file(file_path, progress), page_count
 
-            return text
+            return text, page_count
         except Exception as e:
             logger.error(f"Error reading PDF {file_path}: {e}")
             raise e
@@ -44,13 +69,16 @@ class PDFLoader:
         """
         Extracts text from a file-like object (e.g. uploaded file).
         """
-        logger.info(f"Extracting text from stream: {filename}")
+        logger.info("Extracting text from stream: %s", filename)
         text = ""
         try:
             # pypdf expects a binary stream
+            from pypdf import PdfReader
             reader = PdfReader(file_stream)
             for page in reader.pages:
+                started = time.perf_counter()
                 page_text = page.extract_text()
+                PDF_PAGE_SECONDS.observe(time.perf_counter() - started)
                 if page_text:
                     text += page_text + "\n"
 
@@ -67,16 +95,23 @@ class PDFLoader:
             raise e
 
     @staticmethod
-    def _ocr_extract_from_file(file_path: str) -> str:
-        if not OCR_AVAILABLE:
+    def _ocr_extract_from_file(file_path: str, progress: Callable[[int, int], None] = None) -> str:
+        if not _load_ocr():
             logger.warning("OCR requested but dependencies (pytesseract, pdf2image) not installed.")
             return ""
 
         try:
+            started = time.perf_counter()
             images = convert_from_path(file_path)
+            # Rasterising is done for all pages at once; spread it over them
+            raster_per_page = (time.perf_counter() - started) / max(1, len(images))
             text = ""
-            for image in images:
+            for i, image in enumerate(images):
+                page_started = time.perf_counter()
                 text += pytesseract.image_to_string(image) + "\n"
+                OCR_PAGE_SECONDS.observe(raster_per_page + time.perf_counter() - page_started)
+                if progress:
+                    progress(i + 1, len(images))
             return text
         except PDFInfoNotInstalledError:
             logger.error("OCR failed: Poppler not found. Please install poppler-utils (sudo apt-get install poppler-utils).")
@@ -90,15 +125,19 @@ class PDFLoader:
 
     @staticmethod
     def _ocr_extract_from_bytes(file_bytes: bytes) -> str:
-        if not OCR_AVAILABLE:
+        if not _load_ocr():
             logger.warning("OCR requested but dependencies not installed.")
             return ""
 
         try:
+            started = time.perf_counter()
             images = convert_from_bytes(file_bytes)
+            raster_per_page = (time.perf_counter() - started) / max(1, len(images))
             text = ""
             for image in images:
+                page_started = time.perf_counter()
                 text += pytesseract.image_to_string(image) + "\n"
+                OCR_PAGE_SECONDS.observe(raster_per_page + time.perf_counter() - page_started)
             return text
         except PDFInfoNotInstalledError:
             logger.error("OCR failed: Poppler not found. Please install poppler-utils.")
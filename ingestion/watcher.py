@@ -0,0 +1,154 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import ctypes
+import ctypes.util
+import fnmatch
+import hashlib
+import json
+import os
+import select
+import sys
+import threading
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class FileManifest:
+    """
+    What has been indexed from a directory: file name -> {"mtime", "size",
+    "sha256", "status", "chunks"}. Saved as JSON next to the index when a
+    path is given, so a restart only re-embeds files that changed meanwhile.
+    """
+    def __init__(self, path: str = None):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+    def diff(self, directory: str, pattern: str = "*.pdf") -> Tuple[List[str], List[str]]:
+        """
+        Compares the manifest with the directory. Returns (changed, removed)
+        file names: new or modified files to index, and files that are gone.
+        A file whose mtime changed but whose content did not is only re-stamped.
+        """
+        changed, seen = [], set()
+        for entry in os.scandir(directory):
+            if not entry.is_file() or not fnmatch.fnmatch(entry.name, pattern):
+                continue
+            seen.add(entry.name)
+            stat = entry.stat()
+            known = self.entries.get(entry.name)
+            if known and known["mtime"] == stat.st_mtime and known["size"] == stat.st_size:
+                continue
+            if known and known["size"] == stat.st_size and known["sha256"] == file_hash(entry.path):
+                known["mtime"] = stat.st_mtime
+                continue
+            changed.append(entry.name)
+        removed = [name for name in self.entries if name not in seen]
+        return sorted(changed), removed
+
+# inotify(7) flags
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+class _Inotify:
+    """Directory change notifications from Linux inotify, through libc (no extra dependency)."""
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_CLOSE_WRITE | _IN_MODIFY | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float) -> bool:
+        """Blocks until something changed or timeout passes. Returns True on change."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # Drain the events; callers rescan the directory rather than replaying them
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+class DirectoryWatcher:
+    """
+    Calls on_change whenever files in directory change. Uses inotify on
+    Linux and falls back to polling every poll_seconds elsewhere (or if
+    inotify is unavailable). Bursts of events, such as a large file being
+    copied in, are coalesced: on_change runs once the directory has been
+    quiet for settle_seconds.
+    """
+    def __init__(self, directory: str, on_change: Callable[[], None], poll_seconds: float = 2.0, settle_seconds: float = 0.5):
+        self.directory = directory
+        self.on_change = on_change
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def start(self):
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(self.directory)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable for {self.directory}, polling instead: {e}")
+        self._thread = threading.Thread(target=self._run, name="directory-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s (%s)", self.directory, self.mode)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + self.settle_seconds + 1)
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                if not self._inotify.wait(self.poll_seconds):
+                    continue
+                while self._inotify.wait(self.settle_seconds) and not self._stop.is_set():
+                    pass
+            elif self._stop.wait(self.poll_seconds):
+                break
+            try:
+                self.on_change()
+            except Exception as e:
+                logger.error(f"Directory sync failed for {self.directory}: {e}")
@@ -0,0 +1,120 @@
+from typing import Any, Callable, Dict, Optional
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue is at max depth."""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Ingestion queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class IngestionQueue:
+    """
+    Bounded priority queue served by a dedicated pool of worker threads, so
+    ingestion never competes with request handling for the server threadpool.
+
+    Jobs are ordered by submit time plus a size penalty (size / size_rate
+    seconds): small files jump ahead of large ones, but a large file is never
+    delayed by more than its penalty, so nothing starves.
+    """
+    def __init__(self, workers: int, max_depth: int, size_rate: float = 1_000_000):
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.size_rate = size_rate
+        self._heap = []
+        self._pending: Dict[str, float] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._active = 0
+        # Moving average of job duration, used for Retry-After estimates
+        self._avg_job_seconds = 5.0
+
+    def _start_workers(self):
+        # Called with the lock held; threads are started on first use
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job_id: str, size: int, fn: Callable, *args: Any):
+        """Queues fn(*args). Raises QueueFullError when max_depth jobs are already waiting."""
+        with self._cond:
+            if len(self._heap) >= self.max_depth:
+                raise QueueFullError(self.retry_after())
+            self._start_workers()
+            submitted = time.monotonic()
+            priority = submitted + size / self.size_rate
+            # The job runs in the submitter's context, so its logs carry the request ID
+            context = contextvars.copy_context()
+            heapq.heappush(self._heap, (priority, next(self._counter), job_id, submitted, context.run, (fn, *args)))
+            self._pending[job_id] = submitted
+            self._cond.notify()
+
+    def is_full(self) -> bool:
+        with self._cond:
+            return len(self._heap) >= self.max_depth
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up."""
+        return max(1, math.ceil(self._avg_job_seconds * max(1, len(self._heap)) / self.workers))
+
+    def positions(self) -> Dict[str, int]:
+        """Maps each waiting job to its 1-based position in the queue."""
+        with self._cond:
+            ordered = sorted(self._heap)
+        return {entry[2]: i + 1 for i, entry in enumerate(ordered)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            oldest = min(self._pending.values()) if self._pending else None
+            return {
+                "depth": len(self._heap),
+                "active": self._active,
+                "workers": self.workers,
+                "max_depth": self.max_depth,
+                "oldest_wait_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+                "avg_job_seconds": round(self._avg_job_seconds, 3),
+            }
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until no jobs are queued or running. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._heap or self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+            return True
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, job_id, submitted, fn, args = heapq.heappop(self._heap)
+                self._pending.pop(job_id, None)
+                self._active += 1
+
+            started = time.monotonic()
+            logger.info("Starting ingestion job %s after %.2fs in queue", job_id, started - submitted)
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} failed: {e}")
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * (time.monotonic() - started)
+                    self._cond.notify_all()
@@ -3,30 +3,167 @@ import uvicorn
 import os
 import sys
 
-def run_server(host="0.0.0.0", port=8000):
+def run_server(host="0.0.0.0", port=8000, workers=1):
     """Runs the FastAPI backend server"""
-    print(f"Starting FastAPI Server on {host}:{port}...")
     # Add project root to path
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    uvicorn.run("api.server:app", host=host, port=port, reload=False)
+    if workers > 1:
+        from config.settings import settings
+        if not settings.SHARED_INDEX_DIR:
+            # Each worker would otherwise hold its own private, diverging index
+            print("Running more than one worker requires SHARED_INDEX_DIR")
+            return
+    print(f"Starting FastAPI Server on {host}:{port} with {workers} worker(s)...")
+    uvicorn.run("api.server:app", host=host, port=port, reload=False, workers=workers)
 
 def run_mcp():
     print("Starting MCP Server...")
     try:
         from mcp_server import mcp
+        # The index is loaded on the first tool call
         mcp.run()
     except ImportError as e:
         print(f"Failed to start MCP server: {e}")
 
+def run_batch(questions_file, contract_ids=None, url="http://localhost:8000", output=None, concurrency=None, api_key=None):
+    """Sends a questions x contracts batch to a running server and writes the NDJSON results"""
+    import requests
+
+    with open(questions_file) as f:
+        questions = [line.strip() for line in f if line.strip()]
+    if not questions:
+        print(f"No questions found in {questions_file}")
+        return
+
+    payload = {"questions": questions, "contract_ids": contract_ids or None}
+    if concurrency:
+        payload["max_concurrency"] = concurrency
+    headers = {"X-API-Key": api_key} if api_key else {}
+
+    print(f"Running {len(questions)} questions against {len(contract_ids) if contract_ids else 'all'} contracts...", file=sys.stderr)
+    out = open(output, "w") if output else sys.stdout
+    try:
+        with requests.post(f"{url.rstrip('/')}/api/chat/batch", json=payload, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    out.write(line + "\n")
+                    out.flush()
+    finally:
+        if output:
+            out.close()
+
+def run_ingest(directory, index_dir=None, processes=None, batch_size=None, use_llm=True):
+    """Bulk-ingests a directory of PDFs into a persisted, resumable index"""
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from config.settings import settings
+    from ingestion.bulk import DirectoryIngestion
+    from rag_engine.vector_store import RAGEngine
+    from metadata_extractor.extractor import MetadataExtractor
+
+    index_dir = index_dir or settings.INDEX_DIR or "data/index"
+    if not os.path.isdir(directory):
+        print(f"Not a directory: {directory}")
+        return
+
+    print(f"Ingesting {directory} into {index_dir}...")
+    rag_engine = RAGEngine()
+    extractor = MetadataExtractor(use_llm=use_llm and bool(settings.OPENAI_API_KEY))
+    stats = DirectoryIngestion(
+        rag_engine,
+        metadata_extractor=extractor,
+        index_dir=index_dir,
+        processes=processes,
+        batch_size=batch_size,
+    ).run(directory)
+
+    summary = stats.as_dict()
+    print(f"Files: {summary['files']} indexed, {summary['failed']} failed, {summary['duplicates']} duplicates skipped, {summary['pages']} pages, {summary['chunks']} chunks in {summary['elapsed_seconds']}s")
+    print(f"Throughput: {summary['pages_per_sec']} pages/s, {summary['chunks_per_sec']} chunks/s, {summary['embeddings_per_sec']} embeddings/s")
+    print(f"Start the server with INDEX_DIR={index_dir} to serve this index.")
+
+def run_bench(count=20, pages=3, scanned=0.1, mixed=0.1, embeddings="hashing", corpus_dir=None, output=None, compare_with=None,
+              memory=False):
+    """Runs the component microbenchmarks on a generated corpus and writes JSON results"""
+    # Per-file INFO logs would skew timings and mix into the JSON on stdout
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    import json
+    from benchmarks.components import run_benchmarks, compare, write_report
+
+    if memory:
+        from benchmarks.memory import run_memory_benchmark, summary
+        report = run_memory_benchmark(count, pages, embeddings=embeddings)
+        write_report(report, output)
+        for line in summary(report):
+            print(line, file=sys.stderr)
+        return
+
+    report = run_benchmarks(corpus_dir, count, pages, scanned, mixed, embeddings)
+    write_report(report, output)
+    if compare_with:
+        with open(compare_with) as f:
+            baseline = json.load(f)
+        print(f"Compared with {compare_with} (commit {baseline['meta'].get('commit')}):", file=sys.stderr)
+        for line in compare(baseline, report):
+            print(line, file=sys.stderr)
+
+def run_load(url=None, levels="1,8,32", duration=10.0, mix=None, pages=2, output=None, api_key=None):
+    """Drives the HTTP API with concurrent upload/list/chat traffic and writes a JSON report"""
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from benchmarks.load_test import run_load_test, parse_mix, summary, DEFAULT_MIX
+    from benchmarks.components import write_report
+
+    concurrency_levels = [int(level) for level in levels.split(",") if level.strip()]
+    print(f"Load testing {url or 'a mock-mode server'} at concurrency {concurrency_levels} for {duration}s each...", file=sys.stderr)
+    report = run_load_test(url, concurrency_levels, duration, parse_mix(mix) if mix else DEFAULT_MIX, pages, api_key=api_key)
+    write_report(report, output)
+    for line in summary(report):
+        print(line, file=sys.stderr)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="AI Contract Chatbot")
-    parser.add_argument("mode", choices=["server", "mcp"], nargs="?", default="server", help="Mode: 'server' (FastAPI Backend) or 'mcp' (MCP Server)")
+    parser.add_argument("mode", choices=["server", "mcp", "batch", "ingest", "bench", "load"], nargs="?", default="server", help="Mode: 'server' (FastAPI Backend), 'mcp' (MCP Server), 'batch' (batch questions against a running server), 'ingest' (bulk-index a directory), 'bench' (component microbenchmarks) or 'load' (HTTP load test)")
+    parser.add_argument("path", nargs="?", help="Ingest mode: directory of PDF contracts")
     parser.add_argument("--host", default="0.0.0.0", help="Host for server")
     parser.add_argument("--port", type=int, default=8000, help="Port for server")
+    parser.add_argument("--workers", type=int, default=1, help="Server mode: worker processes (requires SHARED_INDEX_DIR)")
+    parser.add_argument("--questions", help="Batch mode: file with one question per line")
+    parser.add_argument("--contracts", nargs="*", help="Batch mode: contract IDs (default: all contracts)")
+    parser.add_argument("--url", help="Batch/load mode: server URL (batch default: http://localhost:8000; load default: start a mock-mode server)")
+    parser.add_argument("--output", help="Batch/bench/load mode: write results to this file instead of stdout")
+    parser.add_argument("--concurrency", type=int, help="Batch mode: max concurrent LLM calls")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY"), help="Batch/load mode: X-API-Key header value")
+    parser.add_argument("--index-dir", help="Ingest mode: where the index and manifest are written (default: INDEX_DIR or data/index)")
+    parser.add_argument("--processes", type=int, help="Ingest mode: text extraction processes")
+    parser.add_argument("--batch-size", type=int, help="Ingest mode: chunks per embedding batch")
+    parser.add_argument("--no-llm", action="store_true", help="Ingest mode: rule-based metadata only")
+    parser.add_argument("--count", type=int, default=20, help="Bench mode: generated contracts")
+    parser.add_argument("--pages", type=int, default=3, help="Bench/load mode: pages per contract")
+    parser.add_argument("--scanned", type=float, default=0.1, help="Bench mode: fraction of image-only contracts")
+    parser.add_argument("--mixed", type=float, default=0.1, help="Bench mode: fraction of mixed text/image contracts")
+    parser.add_argument("--embeddings", choices=["hashing", "huggingface"], default="hashing", help="Bench mode: embedding model")
+    parser.add_argument("--compare", help="Bench mode: earlier JSON results to compare against")
+    parser.add_argument("--memory", action="store_true", help="Bench mode: index RSS with the compact vs. the in-memory docstore")
+    parser.add_argument("--levels", default="1,8,32", help="Load mode: comma-separated concurrency levels, run one after another")
+    parser.add_argument("--duration", type=float, default=10.0, help="Load mode: seconds per concurrency level")
+    parser.add_argument("--mix", help="Load mode: operation weights, e.g. upload=1,contracts=3,chat=6")
 
     args = parser.parse_args()
 
     if args.mode == "server":
-        run_server(args.host, args.port)
+        run_server(args.host, args.port, args.workers)
     elif args.mode == "mcp":
         run_mcp()
+    elif args.mode == "batch":
+        if not args.questions:
+            parser.error("batch mode requires --questions")
+        run_batch(args.questions, args.contracts, args.url or "http://localhost:8000", args.output, args.concurrency, args.api_key)
+    elif args.mode == "ingest":
+        if not args.path:
+            parser.error("ingest mode requires a directory")
+        run_ingest(args.path, args.index_dir, args.processes, args.batch_size, use_llm=not args.no_llm)
+    elif args.mode == "bench":
+        run_bench(args.count, args.pages, args.scanned, args.mixed, args.embeddings, args.path, args.output, args.compare, args.memory)
+    elif args.mode == "load":
+        run_load(args.url, args.levels, args.duration, args.mix, args.pages, args.output, args.api_key)
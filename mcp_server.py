@@ -1,8 +1,7 @@
 from mcp.server.fastmcp import FastMCP
-from ingestion.pdf_loader import PDFLoader
+from rag_engine.contract_index import ContractIndex
 from rag_engine.vector_store import RAGEngine
-import os
-import glob
+from typing import List, Optional
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -10,55 +9,65 @@ logger = setup_logger(__name__)
 # Initialize FastMCP
 mcp = FastMCP("Contract Chatbot")
 
-# Global RAG Engine
-# In a real app, this might need better state management
-rag_engine = RAGEngine()
+# The index the API server serves (SHARED_INDEX_DIR or INDEX_DIR), loaded on the
+# first tool call so starting the MCP server is instant
+contract_index = ContractIndex()
 
-def index_samples():
-    """Helper to index sample contracts on startup"""
-    sample_dir = "sample_contracts"
-    if not os.path.exists(sample_dir):
-        return
+def get_rag_engine() -> RAGEngine:
+    return contract_index.get_engine()
 
-    files = glob.glob(os.path.join(sample_dir, "*.pdf"))
-    logger.info(f"Indexing {len(files)} sample contracts for MCP...")
-    for f in files:
-        try:
-            text = PDFLoader.extract_text_from_file(f)
-            rag_engine.index_documents(text, os.path.basename(f))
-        except Exception as e:
-            logger.error(f"Failed to index {f}: {e}")
-
-# Index on load
-index_samples()
-
-@mcp.tool()
-def query_contracts(question: str) -> str:
-    """
-    Answers a question about the contracts in the sample_contracts directory.
-    Returns relevant context snippets.
-    """
-    logger.info(f"MCP Tool called with: {question}")
-    docs = rag_engine.search(question)
+def _search_filter(contract_id: Optional[str]) -> Optional[dict]:
+    return {"contract_id": contract_id} if contract_id else None
 
+def _format_context(docs) -> str:
     if not docs:
         return "No relevant information found in the contracts."
 
     context = ""
-    for i, doc in enumerate(docs):
+    for doc in docs:
         source = doc.metadata.get('source', 'Unknown')
         context += f"--- Source: {source} ---\n{doc.page_content}\n\n"
 
     return f"Found the following context:\n{context}"
 
+@mcp.tool()
+def query_contracts(question: str, contract_id: Optional[str] = None) -> str:
+    """
+    Answers a question about the indexed contracts (optionally only the one
+    with contract_id, see contracts://list). Returns relevant context snippets.
+    """
+    logger.info("MCP query_contracts: %s", question)
+    return _format_context(get_rag_engine().search(question, filter=_search_filter(contract_id)))
+
+@mcp.tool()
+def query_contracts_batch(questions: List[str], contract_id: Optional[str] = None) -> str:
+    """
+    Answers several questions about the indexed contracts in one call. The
+    questions are embedded in a single batch; context snippets are returned
+    per question.
+    """
+    questions = [q for q in questions if q.strip()]
+    if not questions:
+        return "No questions given."
+    logger.info("MCP query_contracts_batch: %d questions", len(questions))
+    engine = get_rag_engine()
+    if engine.is_empty:
+        return "No relevant information found in the contracts."
+
+    search_filter = _search_filter(contract_id)
+    sections = []
+    for question, vector in zip(questions, engine.embed_queries(questions)):
+        docs = engine.search_by_vector(vector, filter=search_filter)
+        sections.append(f"=== Question: {question} ===\n{_format_context(docs)}")
+    return "\n".join(sections)
+
 @mcp.resource("contracts://list")
 def list_contracts() -> str:
-    """Lists all indexed contracts."""
-    sample_dir = "sample_contracts"
-    if not os.path.exists(sample_dir):
+    """Lists all indexed contracts with their IDs."""
+    contracts = contract_index.list_contracts()
+    if not contracts:
         return "No contracts found."
-    files = glob.glob(os.path.join(sample_dir, "*.pdf"))
-    return "\n".join([os.path.basename(f) for f in files])
+    return "\n".join(f"{c['filename']} (id: {c['id']})" for c in contracts)
 
 if __name__ == "__main__":
     # fastmcp run will handle execution, but we can also run directly
@@ -1,10 +1,13 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from config.settings import settings
+from utils.llm_client import get_llm, PRIORITY_BACKGROUND
+from utils.metrics import METADATA_SECONDS, METADATA_FIELDS_FILLED, observe_llm
+from metadata_extractor.rules import RuleBasedExtractor
 import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -16,24 +19,106 @@ class ContractMetadata(BaseModel):
     end_date: Optional[str] = Field(None, description="End date or expiry date")
     renewal_terms: Optional[str] = Field(None, description="Brief summary of renewal terms")
     contract_id: Optional[str] = Field(None, description="Contract ID number if present")
+    field_sources: Dict[str, str] = Field(default_factory=dict, description="Which extractor filled each field ('rules' or 'llm')")
+
+METADATA_FIELDS = ["title", "vendor", "client", "start_date", "end_date", "renewal_terms", "contract_id"]
+
+# Retrieval queries used to find the chunks most likely to hold each field
+FIELD_QUERIES = {
+    "title": "title of this agreement",
+    "vendor": "vendor provider supplier licensor party providing the services",
+    "client": "client customer licensee party receiving the services",
+    "start_date": "effective date start date commencement of the agreement",
+    "end_date": "expiration date end of term agreement expires terminates on",
+    "renewal_terms": "renewal automatically renew successive terms notice of non-renewal",
+    "contract_id": "contract number agreement reference ID",
+}
 
 class MetadataExtractor:
-    def __init__(self, llm=None):
+    def __init__(self, llm=None, use_llm: bool = True):
+        self.rules = RuleBasedExtractor()
         if llm:
             self.llm = llm
+        elif not use_llm:
+            # Rules only (e.g. mock mode without an OpenAI key)
+            self.llm = None
         else:
             api_key = settings.OPENAI_API_KEY
             if not api_key:
                 raise ValueError("OpenAI API Key is missing. Please set the OPENAI_API_KEY environment variable.")
 
-            self.llm = ChatOpenAI(openai_api_key=api_key, model=settings.OPENAI_MODEL, temperature=0)
+            # Shares the process-wide client and yields to chat traffic
+            self.llm = get_llm(priority=PRIORITY_BACKGROUND)
+
+    def set_llm(self, llm):
+        """Swaps the LLM client (key rotation); running extractions keep the old one."""
+        self.llm = llm
+
+    def extract(self, text: str, rag_engine=None, contract_id: str = None) -> ContractMetadata:
+        """
+        When the contract is already indexed (rag_engine + contract_id), long
+        documents are covered by retrieving the top chunks for each missing
+        field instead of truncating to the first METADATA_MAX_CHARS.
+        """
+        started = time.perf_counter()
+        # Deterministic pass first; the LLM only sees the fields still missing
+        values = self.rules.extract(text)
+        sources = {field: "rules" for field in values}
+
+        missing = [f for f in METADATA_FIELDS if not values.get(f)]
+        if missing and self.llm is not None:
+            context = self._build_context(text, missing, rag_engine, contract_id)
+            for field, value in self._extract_with_llm(context, missing).items():
+                if field in missing and value:
+                    values[field] = value
+                    sources[field] = "llm"
+
+        for source in sources.values():
+            METADATA_FIELDS_FILLED.inc(source=source)
+        METADATA_SECONDS.observe(time.perf_counter() - started, llm=bool(missing and self.llm is not None))
+        return ContractMetadata(**values, field_sources=sources)
 
-    def extract(self, text: str) -> ContractMetadata:
-        prompt = """
+    def _build_context(self, text: str, fields: list, rag_engine=None, contract_id: str = None) -> str:
+        max_chars = settings.METADATA_MAX_CHARS
+        if len(text) <= max_chars or rag_engine is None or not contract_id or rag_engine.is_empty:
+            # Truncate text to avoid token limits (rudimentary approach)
+            return text[:max_chars]
+
+        try:
+            queries = [FIELD_QUERIES[f] for f in fields]
+            vectors = rag_engine.embed_queries(queries)
+            filter_dict = {"contract_id": contract_id}
+            chunks = []
+            seen = set()
+            for vector in vectors:
+                for doc in rag_engine.search_by_vector(vector, k=settings.METADATA_CHUNKS_PER_FIELD, filter=filter_dict):
+                    if doc.page_content not in seen:
+                        seen.add(doc.page_content)
+                        chunks.append(doc.page_content)
+        except Exception as e:
+            logger.warning(f"Chunk retrieval for metadata failed ({e}); falling back to truncated text")
+            return text[:max_chars]
+
+        # The opening of a contract names the parties and title, so always keep it
+        parts = [text[:settings.METADATA_HEAD_CHARS]]
+        used = len(parts[0])
+        for chunk in chunks:
+            if chunk in parts[0]:
+                continue
+            if used + len(chunk) > max_chars:
+                break
+            parts.append(chunk)
+            used += len(chunk)
+
+        logger.info("Metadata context: %d retrieved chunks, %d chars of %d", len(parts) - 1, used, len(text))
+        return "\n...\n".join(parts)
+
+    def _extract_with_llm(self, text: str, fields: list) -> dict:
+        prompt = f"""
         You are an expert legal contract analyzer.
         Extract the following metadata from the contract text provided below.
         Return ONLY a valid JSON object with the following keys:
-        title, vendor, client, start_date, end_date, renewal_terms, contract_id.
+        {", ".join(fields)}.
 
         Format dates as YYYY-MM-DD if possible.
         If a field is not found, set it to null.
@@ -41,16 +126,14 @@ class MetadataExtractor:
         Contract Text:
         """
 
-        # Truncate text to avoid token limits (rudimentary approach)
-        text_context = text[:10000]
-
         messages = [
             SystemMessage(content="You extract metadata from contracts in JSON format."),
-            HumanMessage(content=prompt + "\n\n" + text_context)
+            HumanMessage(content=prompt + "\n\n" + text)
         ]
 
         try:
-            response = self.llm.invoke(messages)
+            with observe_llm(PRIORITY_BACKGROUND) as call:
+                response = call.record(self.llm.invoke(messages))
             content = response.content.strip()
 
             # Clean up Markdown formatting if present
@@ -62,7 +145,8 @@ class MetadataExtractor:
                 content = content[:-3]
 
             data = json.loads(content.strip())
-            return ContractMetadata(**data)
+            # Validate through the model so wrong types are dropped consistently
+            return ContractMetadata(**{k: v for k, v in data.items() if k in fields}).model_dump(include=set(fields))
         except Exception as e:
             logger.error(f"Metadata extraction failed: {e}")
-            return ContractMetadata()
\ No newline at end of file
+            return {}
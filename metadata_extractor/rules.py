@@ -0,0 +1,99 @@
+from datetime import datetime
+from typing import Dict, Optional
+import re
+
+MONTH_DATE = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}"
+DAY_MONTH_DATE = r"\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?,?\s+\d{4}"
+NUMERIC_DATE = r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.]\d{1,2}[/.]\d{4}"
+DATE = rf"(?P<date>{NUMERIC_DATE}|{MONTH_DATE}|{DAY_MONTH_DATE})"
+
+LABEL_PATTERNS = {
+    "vendor": re.compile(r"^\s*(?:vendor|provider|service\s+provider|supplier|licensor)\s*:\s*(?P<value>.+?)\s*$", re.IGNORECASE | re.MULTILINE),
+    "client": re.compile(r"^\s*(?:client|customer|licensee)\s*:\s*(?P<value>.+?)\s*$", re.IGNORECASE | re.MULTILINE),
+    # A whole-word label, then a ':'/'#' separator or a value containing a digit, so prose
+    # such as "agreement notwithstanding" or "contract noted" is not read as an ID
+    "contract_id": re.compile(
+        r"\b(?:contract|agreement)\s*(?:id\b|no\b\.?|number\b|#)(?:\s*[:#]\s*|\s+(?=[A-Z0-9\-/]*\d))(?P<value>[A-Z0-9][A-Z0-9\-/]{2,})",
+        re.IGNORECASE,
+    ),
+}
+
+DATE_PATTERNS = {
+    "start_date": [
+        re.compile(rf"\b(?:start|effective|commencement)\s+date\s*:?\s*{DATE}", re.IGNORECASE),
+        re.compile(rf"\b(?:effective|commencing)\s+(?:as\s+of\s+|on\s+|from\s+)?{DATE}", re.IGNORECASE),
+    ],
+    "end_date": [
+        re.compile(rf"\b(?:end|expiry|expiration|termination)\s+date\s*:?\s*{DATE}", re.IGNORECASE),
+        re.compile(rf"\b(?:expires|terminates|ends)\s+on\s+{DATE}", re.IGNORECASE),
+    ],
+}
+
+TITLE_KEYWORDS = re.compile(r"\b(agreement|contract|license|licence|addendum|amendment|lease|order|terms|memorandum|statement\s+of\s+work)\b", re.IGNORECASE)
+# Sentence starting at a line start or after a period (so clause headings are skipped)
+RENEWAL_SENTENCE = re.compile(r"(?:(?<=\.)|^)[^.\n]*\b(?:automatically\s+renew|auto-?renew|renewal\s+term|shall\s+renew|may\s+be\s+renewed)[^.]*\.", re.IGNORECASE | re.MULTILINE)
+WHITESPACE = re.compile(r"\s+")
+
+DATE_FORMATS = (
+    "%Y-%m-%d", "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y", "%m/%d/%Y", "%d/%m/%Y", "%d.%m.%Y",
+)
+
+def normalize_date(value: str) -> Optional[str]:
+    """Parses common contract date spellings into YYYY-MM-DD."""
+    cleaned = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", value.strip())
+    cleaned = WHITESPACE.sub(" ", cleaned.replace(",", " ").replace("Sept", "Sep")).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+class RuleBasedExtractor:
+    """
+    Deterministic first pass over the contract text. Fills whatever it can
+    find with labelled lines and date patterns; everything else stays None
+    for the LLM to fill in.
+    """
+    # Labelled fields and dates are usually on the first pages
+    HEADER_CHARS = 5000
+
+    def extract(self, text: str) -> Dict[str, str]:
+        found = {}
+        header = text[:self.HEADER_CHARS]
+
+        title = self._extract_title(header)
+        if title:
+            found["title"] = title
+
+        for field, pattern in LABEL_PATTERNS.items():
+            match = pattern.search(header)
+            if match:
+                found[field] = match.group("value").strip().rstrip(",;")
+
+        for field, patterns in DATE_PATTERNS.items():
+            for pattern in patterns:
+                match = pattern.search(text)
+                date = normalize_date(match.group("date")) if match else None
+                if date:
+                    found[field] = date
+                    break
+
+        renewal = RENEWAL_SENTENCE.search(text)
+        if renewal:
+            found["renewal_terms"] = WHITESPACE.sub(" ", renewal.group(0)).strip()[:300]
+
+        return found
+
+    @staticmethod
+    def _extract_title(header: str) -> Optional[str]:
+        for line in header.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            # Only trust the first line if it looks like a contract title
+            if (len(line) <= 120 and ":" not in line and not line.endswith(".")
+                    and TITLE_KEYWORDS.search(line)):
+                return line
+            return None
+        return None
@@ -0,0 +1,192 @@
+from array import array
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from typing import Dict, List, Optional, Tuple
+import json
+import mmap
+import os
+import pickle
+import shutil
+import numpy as np
+from rag_engine.docstore import _overlap, filter_contract_ids
+
+VECTORS_FILE = "vectors.npy"
+NORMS_FILE = "norms.npy"
+TEXT_FILE = "text.bin"
+TABLE_FILE = "chunks.pkl"
+REMOVED_FILE = "removed.json"
+
+class ColdSegment:
+    """
+    Contracts evicted from RAM by RAGEngine's memory budget, in one directory:
+
+      vectors.npy, norms.npy   float32 vectors and their squared norms, memory-mapped
+      text.bin                 UTF-8 chunk text, each contract's overlaps stored once, memory-mapped
+      chunks.pkl               per chunk (start, end) byte offsets and metadata index; per
+                               contract its row range (kept in RAM, a few bytes per chunk)
+
+    The kernel pages vectors and text in when a search reads them and can drop
+    them again under memory pressure. A search scoped to contracts only reads
+    those contracts' rows. Searches return the same squared L2 distances as
+    FAISS's flat index, so results merge with the hot index.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        self._norms = np.load(os.path.join(path, NORMS_FILE), mmap_mode="r")
+        # Written by write() in this application, so unpickling is safe
+        with open(os.path.join(path, TABLE_FILE), "rb") as f:
+            table = pickle.load(f)
+        self._start: array = table["start"]
+        self._end: array = table["end"]
+        self._metadata: array = table["metadata"]
+        self._metadatas: List[dict] = table["metadatas"]
+        self.contracts: Dict[str, Tuple[int, int]] = table["contracts"]
+        self._text_file = open(os.path.join(path, TEXT_FILE), "rb")
+        size = os.fstat(self._text_file.fileno()).st_size
+        self._text = mmap.mmap(self._text_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.removed = set()
+        removed_path = os.path.join(path, REMOVED_FILE)
+        if os.path.exists(removed_path):
+            with open(removed_path) as f:
+                self.removed = set(json.load(f))
+        self._live = np.ones(len(self._start), dtype=bool)
+        for contract_id in self.removed:
+            start, end = self.contracts[contract_id]
+            self._live[start:end] = False
+
+    @classmethod
+    def write(cls, path: str, contracts: List[Tuple[str, List[Document], np.ndarray]]) -> "ColdSegment":
+        """Writes (contract_id, chunks in order, their vectors) per contract and opens the result."""
+        tmp = path + ".tmp"
+        os.makedirs(tmp)
+        start, end, meta = array("Q"), array("Q"), array("I")
+        metadatas, metadata_index, ranges = [], {}, {}
+        offset = 0
+        with open(os.path.join(tmp, TEXT_FILE), "wb") as f:
+            for contract_id, documents, _ in contracts:
+                first_row = len(start)
+                tail = ""
+                for doc in documents:
+                    chunk = doc.page_content
+                    overlap = _overlap(tail, chunk)
+                    data = chunk[overlap:].encode("utf-8")
+                    start.append(offset - len(chunk[:overlap].encode("utf-8")))
+                    f.write(data)
+                    offset += len(data)
+                    end.append(offset)
+                    tail = chunk
+                    key = json.dumps(doc.metadata, sort_keys=True, default=str)
+                    if key not in metadata_index:
+                        metadata_index[key] = len(metadatas)
+                        metadatas.append(dict(doc.metadata))
+                    meta.append(metadata_index[key])
+                ranges[contract_id] = (first_row, len(start))
+        vectors = np.vstack([v for _, _, v in contracts]).astype(np.float32, copy=False)
+        np.save(os.path.join(tmp, VECTORS_FILE), vectors)
+        np.save(os.path.join(tmp, NORMS_FILE), np.einsum("ij,ij->i", vectors, vectors))
+        with open(os.path.join(tmp, TABLE_FILE), "wb") as f:
+            pickle.dump({"start": start, "end": end, "metadata": meta, "metadatas": metadatas, "contracts": ranges}, f)
+        os.replace(tmp, path)
+        return cls(path)
+
+    @property
+    def live_contracts(self) -> List[str]:
+        return [c for c in self.contracts if c not in self.removed]
+
+    @property
+    def live_chunks(self) -> int:
+        return int(self._live.sum())
+
+    def disk_bytes(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.path, name)) for name in os.listdir(self.path))
+
+    def live_contract_chunks(self) -> List[Tuple[str, List[Document], np.ndarray]]:
+        """(contract_id, chunks in order, their vectors) per live contract, as write() takes them."""
+        return [
+            (contract_id, [self._document(row) for row in range(start, end)], np.array(self._vectors[start:end]))
+            for contract_id, (start, end) in self.contracts.items() if contract_id not in self.removed
+        ]
+
+    def remove(self, contract_ids) -> int:
+        """Drops contracts from search results (the files are immutable). Returns chunks removed."""
+        removed = 0
+        for contract_id in contract_ids:
+            if contract_id in self.contracts and contract_id not in self.removed:
+                start, end = self.contracts[contract_id]
+                self._live[start:end] = False
+                self.removed.add(contract_id)
+                removed += end - start
+        return removed
+
+    def save_removed(self, path: str):
+        """Records removed contracts in a copy of this segment written by RAGEngine.save()."""
+        removed_path = os.path.join(path, REMOVED_FILE)
+        if self.removed:
+            with open(removed_path, "w") as f:
+                json.dump(sorted(self.removed), f)
+        elif os.path.exists(removed_path):
+            os.remove(removed_path)
+
+    def _document(self, row: int) -> Document:
+        return Document(
+            page_content=bytes(self._text[self._start[row]:self._end[row]]).decode("utf-8"),
+            metadata=dict(self._metadatas[self._metadata[row]]),
+        )
+
+    def _rows_for(self, filter) -> Optional[np.ndarray]:
+        """Row numbers of the contracts a filter names by contract_id, or None for all rows."""
+        wanted = filter_contract_ids(filter)
+        if wanted is None:
+            return None
+        ranges = [self.contracts[c] for c in wanted if c in self.contracts and c not in self.removed]
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in ranges])
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, filter=None,
+                                               **kwargs) -> List[Tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        rows = self._rows_for(filter)
+        if rows is None:
+            # Global search: every live vector is read (and paged in)
+            scores = self._norms - 2.0 * (self._vectors @ query) + float(query @ query)
+            scores = np.where(self._live, scores, np.inf)
+            rows = np.arange(len(scores))
+        else:
+            # Contract-scoped: only those contracts' pages are touched
+            scores = self._norms[rows] - 2.0 * (self._vectors[rows] @ query) + float(query @ query)
+        if not len(rows):
+            return []
+
+        matches = FAISS._create_filter_func(filter) if filter is not None else None
+        if matches is None and k < len(scores):
+            order = np.argpartition(scores, k)[:k]
+            order = order[np.argsort(scores[order])]
+        else:
+            order = np.argsort(scores)
+        results = []
+        for i in order:
+            if not np.isfinite(scores[i]):
+                break
+            doc = self._document(int(rows[i]))
+            if matches is None or matches(doc.metadata):
+                results.append((doc, float(scores[i])))
+                if len(results) == k:
+                    break
+        return results
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def close(self):
+        if isinstance(self._text, mmap.mmap):
+            self._text.close()
+        self._text_file.close()
+        self._vectors = self._norms = None
+
+    def destroy(self):
+        """Closes the segment and deletes its files."""
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
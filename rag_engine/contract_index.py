@@ -0,0 +1,213 @@
+from langchain_community.vectorstores import FAISS
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
+from config.settings import settings
+from ingestion.bulk import read_manifest
+from ingestion.pdf_loader import PDFLoader
+from ingestion.watcher import DirectoryWatcher, FileManifest, file_hash
+from rag_engine.hashing_embeddings import HashingEmbeddings
+from rag_engine.segments import SegmentStore
+from rag_engine.vector_store import (
+    EmbeddingMismatchError, RAGEngine, check_embedding_model, embeddings_for_model, index_path, saved_embedding_model,
+)
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def _default_embeddings():
+    # For indexes that do not record their embedding model (and folder mode)
+    if settings.MOCK_MODE or not settings.OPENAI_API_KEY:
+        return HashingEmbeddings(size=384)
+    return None  # RAGEngine loads the HuggingFace model
+
+class ContractIndex:
+    """
+    Read-only view of the index the API server serves, for processes that
+    only search it (the MCP server). Nothing is loaded until first use.
+    Queries are embedded with the model the index records; explicit
+    embeddings that do not match it raise EmbeddingMismatchError.
+    The source follows the server's precedence:
+      - SHARED_INDEX_DIR: the versioned segments, memory-mapped; the manifest
+        is re-checked on every call, so contracts uploaded through the API
+        show up without a restart;
+      - INDEX_DIR: the index written by 'main.py ingest', reloaded when it is
+        rebuilt;
+      - neither: the PDFs in sample_dir, indexed incrementally: a watcher
+        embeds new and modified files and removes deleted ones, tracked in a
+        FileManifest (kept in state_dir with the index, if set).
+    """
+    def __init__(self, shared_dir: str = None, index_dir: str = None, sample_dir: str = None, embeddings=None,
+                 watch: bool = None, state_dir: str = None):
+        self.shared_dir = settings.SHARED_INDEX_DIR if shared_dir is None else shared_dir
+        self.index_dir = settings.INDEX_DIR if index_dir is None else index_dir
+        self.sample_dir = settings.MCP_CONTRACTS_DIR if sample_dir is None else sample_dir
+        self.watch = settings.MCP_WATCH if watch is None else watch
+        self.state_dir = settings.MCP_STATE_DIR if state_dir is None else state_dir
+        self._embeddings = embeddings
+        self._manifest: Optional[FileManifest] = None
+        self._watcher: Optional[DirectoryWatcher] = None
+        self._sync_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.engine: Optional[RAGEngine] = None
+        # {"id", "filename", "metadata"} per contract in the index
+        self.contracts: List[dict] = []
+        self._store: Optional[SegmentStore] = None
+        self._segments: Dict[str, Tuple[FAISS, List[dict]]] = {}
+        # Manifest version (shared) or index file mtime (persisted) currently loaded
+        self._version = None
+
+    @property
+    def source(self) -> str:
+        if self.shared_dir:
+            return f"shared index {self.shared_dir}"
+        if self.index_dir:
+            return f"persisted index {self.index_dir}"
+        return f"sample PDFs in {self.sample_dir}"
+
+    def get_engine(self) -> RAGEngine:
+        """Loads the index on first use and picks up newer versions on later calls."""
+        with self._lock:
+            if self.engine is None:
+                logger.info("Loading contract index from %s", self.source)
+                if self.shared_dir:
+                    self._store = SegmentStore(self.shared_dir)
+                self.engine = RAGEngine(embeddings=self._embeddings or self._recorded_embeddings())
+                if not self.shared_dir and not self.index_dir:
+                    self._open_directory()
+            try:
+                self._refresh()
+            except EmbeddingMismatchError:
+                raise
+            except Exception as e:
+                # e.g. a segment removed by a concurrent compaction; keep serving what is loaded
+                logger.warning(f"Contract index refresh failed: {e}")
+            return self.engine
+
+    def _recorded_embeddings(self):
+        if self._store is not None:
+            recorded = self._store.read_manifest().get("embedding_model")
+        else:
+            recorded = saved_embedding_model(self.index_dir or self.state_dir) if (self.index_dir or self.state_dir) else None
+        if recorded:
+            logger.info("Index was built with %s embeddings", recorded)
+            return embeddings_for_model(recorded)
+        if self._store is not None or self.index_dir:
+            logger.warning("%s does not record its embedding model; assuming the default", self.source)
+        return _default_embeddings()
+
+    def list_contracts(self) -> List[dict]:
+        self.get_engine()
+        return list(self.contracts)
+
+    def _refresh(self):
+        if self._store is not None:
+            self._refresh_segments()
+        elif self.index_dir:
+            self._refresh_persisted()
+
+    def _refresh_segments(self):
+        manifest = self._store.read_manifest()
+        if manifest["version"] == self._version:
+            return
+        check_embedding_model(manifest.get("embedding_model"), self.engine.embeddings, f"Shared index {self.shared_dir}")
+        names = manifest["segments"]
+        loaded = {}
+        for name in names:
+            loaded[name] = self._segments.get(name) or self._store.load(name, self.engine.embeddings)
+        self.engine.set_segments([loaded[name][0] for name in names])
+        self._segments = loaded
+        self.contracts = [
+            {"id": entry["id"], "filename": entry["filename"], "metadata": entry.get("metadata")}
+            for name in names for entry in loaded[name][1]
+        ]
+        self._version = manifest["version"]
+        logger.info("Contract index at version %s (%d contracts)", self._version, len(self.contracts))
+
+    def _refresh_persisted(self):
+        path = os.path.join(index_path(self.index_dir), "index.faiss")
+        if not os.path.exists(path):
+            return
+        # Versions saved by 'main.py ingest' have their own directories; older indexes are rewritten in place
+        version = (path, os.path.getmtime(path))
+        if version == self._version or not self.engine.load(self.index_dir):
+            return
+        self.contracts = [
+            {"id": entry["contract_id"], "filename": entry["source"], "metadata": entry.get("metadata")}
+            for entry in read_manifest(self.index_dir).values() if entry.get("status") == "indexed"
+        ]
+        self._version = version
+        logger.info("Loaded persisted index from %s (%d contracts)", self.index_dir, len(self.contracts))
+
+    def _open_directory(self):
+        manifest_path = None
+        if self.state_dir:
+            os.makedirs(self.state_dir, exist_ok=True)
+            manifest_path = os.path.join(self.state_dir, "files.json")
+        self._manifest = FileManifest(manifest_path)
+        if self._manifest.entries and not self.engine.load(self.state_dir):
+            # Manifest without its index: everything has to be embedded again
+            self._manifest.entries = {}
+        self._update_contracts()
+        if not os.path.isdir(self.sample_dir):
+            return
+        self.sync()
+        if self.watch:
+            self._watcher = DirectoryWatcher(self.sample_dir, self.sync, settings.MCP_WATCH_POLL_SECONDS)
+            self._watcher.start()
+
+    def sync(self) -> Tuple[int, int]:
+        """
+        Brings the index in line with sample_dir: embeds new and modified PDFs
+        (all in one batch) and removes deleted ones. Returns (indexed, removed).
+        """
+        with self._sync_lock:
+            entries = self._manifest.entries
+            changed, removed = self._manifest.diff(self.sample_dir)
+            if not changed and not removed:
+                return 0, 0
+            # Modified files are re-indexed from scratch
+            self.engine.delete_contracts(removed + [name for name in changed if name in entries])
+            for name in removed:
+                del entries[name]
+
+            documents = []
+            for name in changed:
+                path = os.path.join(self.sample_dir, name)
+                try:
+                    stat = os.stat(path)
+                    entry = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": file_hash(path)}
+                except FileNotFoundError:
+                    # Deleted while we were looking at it
+                    entries.pop(name, None)
+                    continue
+                try:
+                    text = PDFLoader.extract_text_from_file(path)
+                    chunks = self.engine.split_documents(text, name, {"contract_id": name})
+                    entry.update(status="indexed" if chunks else "empty", chunks=len(chunks))
+                    documents.extend(chunks)
+                except Exception as e:
+                    # Kept in the manifest so it is only retried once the file changes again
+                    logger.error(f"Failed to index {path}: {e}")
+                    entry.update(status="failed", error=str(e))
+                entries[name] = entry
+            self.engine.add_documents(documents)
+
+            self._update_contracts()
+            if self.state_dir:
+                self.engine.save(self.state_dir)
+            self._manifest.save()
+            logger.info("Synced %s: %d indexed, %d removed (%d contracts)", self.sample_dir, len(changed), len(removed), len(self.contracts))
+            return len(changed), len(removed)
+
+    def _update_contracts(self):
+        self.contracts = [
+            {"id": name, "filename": name, "metadata": None}
+            for name, entry in sorted(self._manifest.entries.items()) if entry.get("status") == "indexed"
+        ]
+
+    def close(self):
+        """Stops the directory watcher, if any."""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
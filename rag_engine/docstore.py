@@ -0,0 +1,174 @@
+from array import array
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# Chunks are grouped (and their text concatenated) per contract
+GROUP_KEYS = ("contract_id", "source")
+# Overlaps shorter than this are found by direct comparison, longer ones with str.find
+_PROBE = 8
+
+def _overlap(tail: str, chunk: str) -> int:
+    """Length of the longest suffix of tail that chunk starts with."""
+    if not tail or not chunk:
+        return 0
+    probe = chunk[:_PROBE]
+    p = tail.find(probe, max(0, len(tail) - len(chunk)))
+    while p != -1:
+        if chunk.startswith(tail[p:]):
+            return len(tail) - p
+        p = tail.find(probe, p + 1)
+    for k in range(min(len(probe) - 1, len(tail)), 0, -1):
+        if chunk.startswith(tail[-k:]):
+            return k
+    return 0
+
+def _metadata_key(metadata: dict):
+    try:
+        return tuple(sorted(metadata.items()))
+    except TypeError:
+        # Unhashable or unorderable values
+        return repr(sorted(metadata.items(), key=lambda item: item[0]))
+
+class CompactDocstore(Docstore, AddableMixin):
+    """
+    Docstore for the FAISS index that keeps each contract's text once.
+
+    InMemoryDocstore holds a Document per chunk: its own page_content string
+    (overlapping chunks repeat chunk_overlap characters of their neighbours)
+    and its own metadata dict. Here the chunks of a contract are laid out in
+    one string per contract with overlaps stored once, chunks are
+    (contract, start, end) rows in typed arrays, and identical metadata dicts
+    are stored once. Documents are built only when FAISS looks one up, i.e.
+    for search candidates.
+
+    Deleted chunks free their contract's text once none of its chunks are
+    left; text of partially deleted contracts stays until then.
+    """
+    def __init__(self):
+        self._texts: List[str] = []
+        self._group_index: Dict[object, int] = {}
+        self._live = array("I")
+        self._metadatas: List[dict] = []
+        self._metadata_index: Dict[object, int] = {}
+        # One row per chunk ever added
+        self._group = array("I")
+        self._start = array("I")
+        self._end = array("I")
+        self._metadata = array("I")
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        overlapping = set(texts).intersection(self._rows)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        # Text appended per contract in this call, joined once at the end
+        pending: Dict[int, list] = {}
+        tails: Dict[int, str] = {}
+        lengths: Dict[int, int] = {}
+        metadata_cache: Dict[int, int] = {}
+        for doc_id, doc in texts.items():
+            metadata = doc.metadata or {}
+            group = self._group_for(metadata)
+            if group not in pending:
+                pending[group] = []
+                tails[group] = self._texts[group][-len(doc.page_content):]
+                lengths[group] = len(self._texts[group])
+            chunk = doc.page_content
+            overlap = _overlap(tails[group], chunk)
+            start = lengths[group] - overlap
+            pending[group].append(chunk[overlap:])
+            lengths[group] += len(chunk) - overlap
+            tails[group] = chunk
+
+            # Chunks of one contract usually share one metadata dict object
+            meta = metadata_cache.get(id(metadata))
+            if meta is None:
+                meta = metadata_cache[id(metadata)] = self._metadata_for(metadata)
+            self._rows[doc_id] = len(self._group)
+            self._group.append(group)
+            self._start.append(start)
+            self._end.append(start + len(chunk))
+            self._metadata.append(meta)
+            self._live[group] += 1
+        for group, pieces in pending.items():
+            self._texts[group] = self._texts[group] + "".join(pieces)
+
+    def _group_for(self, metadata: dict) -> int:
+        key = tuple(metadata.get(name) for name in GROUP_KEYS)
+        group = self._group_index.get(key)
+        if group is None:
+            group = self._group_index[key] = len(self._texts)
+            self._texts.append("")
+            self._live.append(0)
+        return group
+
+    def _metadata_for(self, metadata: dict) -> int:
+        key = _metadata_key(metadata)
+        index = self._metadata_index.get(key)
+        if index is None:
+            index = self._metadata_index[key] = len(self._metadatas)
+            self._metadatas.append(dict(metadata))
+        return index
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._rows.get(search)
+        if row is None:
+            return f"ID {search} not found."
+        text = self._texts[self._group[row]]
+        return Document(
+            id=search,
+            page_content=text[self._start[row]:self._end[row]],
+            # A copy: callers may modify it, the stored dict is shared by many chunks
+            metadata=dict(self._metadatas[self._metadata[row]]),
+        )
+
+    def delete(self, ids: List) -> None:
+        if not set(ids).intersection(self._rows):
+            raise ValueError(f"Tried to delete ids that does not  exist: {ids}")
+        for doc_id in ids:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                continue
+            group = self._group[row]
+            self._live[group] -= 1
+            if self._live[group] == 0:
+                self._texts[group] = ""
+
+    def metadata_items(self) -> Iterator[Tuple[str, dict]]:
+        """(id, metadata) of every chunk without building Documents; do not modify the dicts."""
+        for doc_id, row in list(self._rows.items()):
+            yield doc_id, self._metadatas[self._metadata[row]]
+
+    def stats(self) -> dict:
+        """Stored characters vs. the characters a Document per chunk would hold."""
+        chunk_chars = sum(self._end[row] - self._start[row] for row in self._rows.values())
+        return {
+            "chunks": len(self._rows),
+            "contracts": sum(1 for live in self._live if live),
+            "stored_chars": sum(len(text) for text in self._texts),
+            "chunk_chars": chunk_chars,
+            "metadata_dicts": len(self._metadatas),
+        }
+
+def filter_contract_ids(filter) -> Optional[list]:
+    """Contract IDs a search filter is restricted to (a value, a list, $eq or $in), or None."""
+    if not isinstance(filter, dict) or "contract_id" not in filter:
+        return None
+    wanted = filter["contract_id"]
+    if isinstance(wanted, dict):
+        wanted = wanted.get("$eq", wanted.get("$in"))
+        if wanted is None:
+            return None
+    if isinstance(wanted, str) or not isinstance(wanted, (list, tuple, set)):
+        wanted = [wanted]
+    return list(wanted)
+
+def metadata_items(docstore) -> Iterator[Tuple[str, dict]]:
+    """(id, metadata) of every chunk in a CompactDocstore or an InMemoryDocstore."""
+    if isinstance(docstore, CompactDocstore):
+        return docstore.metadata_items()
+    return ((doc_id, doc.metadata) for doc_id, doc in list(docstore._dict.items()))
@@ -0,0 +1,53 @@
+from langchain_core.embeddings import Embeddings
+from functools import lru_cache
+from typing import List, Tuple
+import re
+import zlib
+import numpy as np
+
+TOKEN = re.compile(r"\w+")
+
+@lru_cache(maxsize=1 << 16)
+def _bucket(feature: str, size: int) -> Tuple[int, float]:
+    # crc32 rather than hash(): str hashes are salted per process
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % size, 1.0 if (h >> 31) & 1 else -1.0
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic, offline embeddings from hashed word and character n-gram
+    features (the "hashing trick"). Texts that share words or word pieces get
+    similar vectors, which is enough for retrieval in mock mode and makes
+    benchmarks repeatable. No model download, no network, no randomness:
+    the same text always maps to the same vector, in every process.
+    """
+    def __init__(self, size: int = 384, char_ngram: int = 3, char_weight: float = 0.5):
+        self.size = size
+        self.char_ngram = char_ngram
+        self.char_weight = char_weight
+
+    def _features(self, text: str):
+        for word in TOKEN.findall(text.lower()):
+            yield word, 1.0
+            # Word pieces make inflections ("renew", "renewal") land close together
+            padded = f"<{word}>"
+            for i in range(len(padded) - self.char_ngram + 1):
+                yield padded[i:i + self.char_ngram], self.char_weight
+
+    def _embed(self, text: str) -> List[float]:
+        indices, weights = [], []
+        for feature, weight in self._features(text):
+            index, sign = _bucket(feature, self.size)
+            indices.append(index)
+            weights.append(sign * weight)
+        vector = np.bincount(indices, weights=weights, minlength=self.size).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
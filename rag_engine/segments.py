@@ -0,0 +1,215 @@
+from langchain_community.vectorstores import FAISS
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import pickle
+import shutil
+import time
+import uuid
+from rag_engine.vector_store import EmbeddingMismatchError, embedding_model_name
+from utils.logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process serving only
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+COMPACT_LOCK_FILE = ".compact.lock"
+SEGMENTS_DIR = "segments"
+
+def _read_index(path: str):
+    import faiss
+    # Memory-map the vectors so every worker process shares one copy in the page cache
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    if flags:
+        try:
+            return faiss.read_index(path, flags | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass
+    return faiss.read_index(path)
+
+class SegmentStore:
+    """
+    Versioned index segments in a directory shared by several server processes.
+
+    Layout:
+      manifest.json               {"version": 7, "segments": ["000007-1a2b3c4d", ...],
+                                   "embedding_model": "HuggingFaceEmbeddings:all-MiniLM-L6-v2",
+                                   "retired": [{"segment": "000003-9f8e7d6c", "retired_at": 1700000000.0}]}
+      segments/<name>/            index.faiss, index.pkl, contracts.json
+
+    A segment is immutable once written. Writers build it under a private
+    name, then commit it by rewriting the manifest under an exclusive file
+    lock; readers poll the manifest version and load only segments they have
+    not seen yet. Segments merged away by compact() stay on disk for
+    retire_seconds, so workers that still map them can reload first.
+    """
+    def __init__(self, root: str, retire_seconds: float = 300, clock=time.time):
+        self.root = root
+        self.retire_seconds = retire_seconds
+        self.clock = clock
+        os.makedirs(os.path.join(root, SEGMENTS_DIR), exist_ok=True)
+
+    def read_manifest(self) -> dict:
+        path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {"version": 0, "segments": []}
+        with open(path) as f:
+            return json.load(f)
+
+    @property
+    def version(self) -> int:
+        return self.read_manifest()["version"]
+
+    def publish(self, vector_store: FAISS, contracts: List[dict]) -> int:
+        """
+        Writes a new segment holding vector_store and the contract records that
+        belong to it, and adds it to the manifest. Returns the new version.
+        Raises EmbeddingMismatchError if the store was built with other
+        embeddings than the segments already published.
+        """
+        model = embedding_model_name(vector_store.embeddings)
+        name = uuid.uuid4().hex[:8]
+        tmp_dir = os.path.join(self.root, SEGMENTS_DIR, f".tmp-{name}")
+        vector_store.save_local(tmp_dir)
+        with open(os.path.join(tmp_dir, "contracts.json"), "w") as f:
+            json.dump(contracts, f, default=str)
+
+        with self._locked():
+            manifest = self.read_manifest()
+            recorded = manifest.get("embedding_model")
+            if recorded and manifest["segments"] and recorded != model:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise EmbeddingMismatchError(f"Shared index {self.root} holds {recorded} embeddings, not {model}")
+            version = manifest["version"] + 1
+            segment = f"{version:06d}-{name}"
+            os.replace(tmp_dir, os.path.join(self.root, SEGMENTS_DIR, segment))
+            self._write_manifest({**manifest, "version": version, "segments": manifest["segments"] + [segment],
+                                  "embedding_model": model,
+                                  "retired": self._purge(manifest.get("retired", []), self.clock())})
+        logger.info(f"Published segment {segment} ({len(contracts)} contracts), index version {version}")
+        return version
+
+    def load(self, segment: str, embeddings) -> Tuple[FAISS, List[dict]]:
+        """Opens a segment read-only; the FAISS vectors are memory-mapped."""
+        path = os.path.join(self.root, SEGMENTS_DIR, segment)
+        index = _read_index(os.path.join(path, "index.faiss"))
+        # Written by publish() in this application, so unpickling is safe
+        with open(os.path.join(path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        with open(os.path.join(path, "contracts.json")) as f:
+            contracts = json.load(f)
+        return FAISS(embeddings, index, docstore, index_to_docstore_id), contracts
+
+    def compact(self, embeddings, max_segments: int) -> Optional[int]:
+        """
+        Merges all segments into one once there are more than max_segments,
+        so searches do not fan out over many small indexes. Returns the new
+        version, or None if nothing was done (including when another process
+        is already compacting).
+
+        The merge runs without the manifest lock, so uploads keep publishing;
+        segments published meanwhile are kept after the merged one. The
+        merged-away segments are retired, not deleted.
+        """
+        leader = _FileLock(os.path.join(self.root, COMPACT_LOCK_FILE), blocking=False)
+        if not leader.acquire():
+            return None
+        name = uuid.uuid4().hex[:8]
+        tmp_dir = os.path.join(self.root, SEGMENTS_DIR, f".tmp-{name}")
+        try:
+            merged_away = self.read_manifest()["segments"]
+            if len(merged_away) <= max_segments:
+                return None
+            merged, contracts = self._merge(merged_away, embeddings)
+            merged.save_local(tmp_dir)
+            with open(os.path.join(tmp_dir, "contracts.json"), "w") as f:
+                json.dump(contracts, f, default=str)
+
+            with self._locked():
+                manifest = self.read_manifest()
+                # Only compact() removes segments and it runs one at a time, so
+                # the merged ones are all still listed
+                published = [s for s in manifest["segments"] if s not in merged_away]
+                version = manifest["version"] + 1
+                segment = f"{version:06d}-{name}"
+                os.replace(tmp_dir, os.path.join(self.root, SEGMENTS_DIR, segment))
+                now = self.clock()
+                retired = manifest.get("retired", []) + [{"segment": s, "retired_at": now} for s in merged_away]
+                self._write_manifest({**manifest, "version": version, "segments": [segment] + published,
+                                      "retired": self._purge(retired, now)})
+        finally:
+            # Left behind only if the merge failed
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            leader.release()
+        logger.info(f"Compacted {len(merged_away)} segments into {segment}, index version {version}")
+        return version
+
+    def _merge(self, segments: List[str], embeddings) -> Tuple[FAISS, List[dict]]:
+        merged, contracts = None, []
+        for segment in segments:
+            # Full read (not mmap): merge_from needs writable storage
+            path = os.path.join(self.root, SEGMENTS_DIR, segment)
+            store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+            with open(os.path.join(path, "contracts.json")) as f:
+                contracts.extend(json.load(f))
+            if merged is None:
+                merged = store
+            else:
+                merged.merge_from(store)
+        return merged, contracts
+
+    def _purge(self, retired: List[dict], now: float) -> List[dict]:
+        """Deletes retired segments past the grace period; returns the ones kept."""
+        kept = []
+        for entry in retired:
+            if now - entry["retired_at"] >= self.retire_seconds:
+                shutil.rmtree(os.path.join(self.root, SEGMENTS_DIR, entry["segment"]), ignore_errors=True)
+            else:
+                kept.append(entry)
+        return kept
+
+    def _write_manifest(self, manifest: Dict):
+        tmp = os.path.join(self.root, MANIFEST_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.root, MANIFEST_FILE))
+
+    def _locked(self):
+        return _FileLock(os.path.join(self.root, LOCK_FILE))
+
+class _FileLock:
+    """Exclusive lock across processes (no-op where fcntl is unavailable)."""
+    def __init__(self, path: str, blocking: bool = True):
+        self.path = path
+        self.blocking = blocking
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Takes the lock; without blocking, returns False if another process holds it."""
+        self._file = open(self.path, "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX if self.blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._file.close()
+                return False
+        return True
+
+    def release(self):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -1,22 +1,117 @@
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from config.settings import settings
-from typing import List
+from rag_engine.cold_store import ColdSegment
+from rag_engine.docstore import CompactDocstore, filter_contract_ids, metadata_items
+from rag_engine.hashing_embeddings import HashingEmbeddings
+from utils.logger import setup_logger
+from utils.metrics import SPLIT_SECONDS, SPLIT_CHUNKS, EMBED_BATCH_SECONDS, EMBED_BATCH_SIZE, SEARCH_SECONDS
+from typing import Dict, List, Optional
+import json
+import numpy as np
 import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+logger = setup_logger(__name__)
+
+# Estimated RAM per hot chunk besides its vector and text (docstore row, FAISS id
+# maps, allocator overhead), from 'main.py bench --memory'
+CHUNK_OVERHEAD_BYTES = 512
+# Cold segments inside a directory written by save()
+COLD_DIR = "cold"
+# The embedding model a directory written by save() was built with
+EMBEDDING_FILE = "embedding.json"
+# Directories written by save_version(): versions/<name>/ holds what save() writes,
+# CURRENT names the version that load() reads
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+class EmbeddingMismatchError(ValueError):
+    """An index is opened with different embeddings than it was built with."""
+
+def embedding_model_name(embeddings) -> str:
+    """Identifies an embedding model; recorded with saved and published indexes."""
+    if isinstance(embeddings, HashingEmbeddings):
+        return f"hashing:{embeddings.size}"
+    for attr in ("model_name", "model"):
+        value = getattr(embeddings, attr, None)
+        if isinstance(value, str) and value:
+            return f"{type(embeddings).__name__}:{value}"
+    return type(embeddings).__name__
+
+def embeddings_for_model(name: str):
+    """Builds the embeddings that embedding_model_name() calls `name`."""
+    kind, _, model = name.partition(":")
+    if kind == "hashing":
+        return HashingEmbeddings(size=int(model))
+    if kind == "HuggingFaceEmbeddings":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model)
+    raise EmbeddingMismatchError(f"Do not know how to build {name} embeddings; pass them explicitly")
+
+def check_embedding_model(recorded: Optional[str], embeddings, where: str):
+    """Raises EmbeddingMismatchError if an index recorded another model than embeddings."""
+    current = embedding_model_name(embeddings)
+    if recorded and recorded != current:
+        raise EmbeddingMismatchError(f"{where} was built with {recorded} embeddings, but this process uses {current}")
+
+def index_path(path: str) -> str:
+    """The directory holding path's index files: the version CURRENT names, or path itself."""
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as f:
+            return os.path.join(path, VERSIONS_DIR, f.read().strip())
+    except FileNotFoundError:
+        return path
+
+def saved_embedding_model(path: str) -> Optional[str]:
+    """The embedding model recorded by RAGEngine.save() in path (None for older indexes)."""
+    try:
+        with open(os.path.join(index_path(path), EMBEDDING_FILE)) as f:
+            return json.load(f)["model"]
+    except FileNotFoundError:
+        return None
 
 class RAGEngine:
-    def __init__(self, embeddings=None):
+    def __init__(self, embeddings=None, compact_docstore: bool = None, memory_budget_mb: float = 0, cold_dir: str = None):
         if embeddings:
             self.embeddings = embeddings
         else:
-            # Use free HuggingFace embeddings (no API key needed)
+            # Use free HuggingFace embeddings (no API key needed).
+            # Imported here: it pulls in sentence-transformers and torch.
+            from langchain_huggingface import HuggingFaceEmbeddings
             self.embeddings = HuggingFaceEmbeddings(
                 model_name=settings.EMBEDDING_MODEL
             )
 
+        self.compact_docstore = settings.COMPACT_DOCSTORE if compact_docstore is None else compact_docstore
         self.vector_store = None
+        # Read-only stores from a shared SegmentStore (multi-worker serving)
+        self.segments: List[FAISS] = []
+        # Memory budget for vector_store (0 = unlimited): once the estimated size of
+        # its contracts exceeds it, the least recently searched ones move to cold
+        # segments on disk, which are memory-mapped and searched alongside
+        self.memory_budget = int(memory_budget_mb * 2**20)
+        self.cold_segments: List[ColdSegment] = []
+        self.max_cold_segments = settings.COLD_MAX_SEGMENTS
+        self._cold_root = cold_dir
+        self._cold_dir = None
+        # contract_id -> [chunks, estimated bytes] and last search time, for hot contracts
+        self._hot: Dict[str, List[int]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._evictions = {"runs": 0, "contracts": 0, "chunks": 0, "seconds": 0.0}
+        self._cold_searches = 0
+        # id(store) -> (its index_to_docstore_id, length, {contract_id: FAISS positions}),
+        # for searches scoped to contracts; stale once the mapping is replaced or grows
+        self._positions: Dict[int, tuple] = {}
+        # FAISS and its docstore are not safe to mutate while being searched.
+        # Document embedding happens outside the lock so ingestion barely blocks chat.
+        self._lock = threading.RLock()
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.CHUNK_SIZE,
             chunk_overlap=settings.CHUNK_OVERLAP
@@ -27,26 +122,336 @@ class RAGEngine:
         Splits text and adds to vector store.
         Returns True if documents were indexed, False otherwise.
         """
-        chunks = self.text_splitter.split_text(text)
-        if not chunks:
+        documents = self.split_documents(text, source, metadata)
+        if not documents:
             return False
 
+        self.add_documents(documents)
+        return True
+
+    def split_documents(self, text: str, source: str, metadata: dict = None) -> List[Document]:
+        """
+        Splits text into chunk Documents without embedding them.
+        """
+        started = time.perf_counter()
+        chunks = self.text_splitter.split_text(text)
+        SPLIT_SECONDS.observe(time.perf_counter() - started)
+        SPLIT_CHUNKS.inc(len(chunks))
+
         doc_metadata = {"source": source}
         if metadata:
             doc_metadata.update(metadata)
 
-        documents = [Document(page_content=chunk, metadata=doc_metadata) for chunk in chunks]
+        return [Document(page_content=chunk, metadata=doc_metadata) for chunk in chunks]
 
-        if self.vector_store is None:
-            self.vector_store = FAISS.from_documents(documents, self.embeddings)
-        else:
-            self.vector_store.add_documents(documents)
+    def add_documents(self, documents: List[Document]):
+        """
+        Embeds and adds already split Documents. Callers may pass chunks from
+        many contracts at once so they are embedded in one large batch.
+        """
+        if not documents:
+            return
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        vectors = self._embed_batch(texts)
+        with self._lock:
+            if self.vector_store is None:
+                kwargs = {"docstore": CompactDocstore()} if self.compact_docstore else {}
+                self.vector_store = FAISS.from_embeddings(list(zip(texts, vectors)), self.embeddings, metadatas=metadatas, **kwargs)
+            else:
+                self.vector_store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+            if self.memory_budget:
+                self._track(documents, len(vectors[0]))
+        if self.memory_budget:
+            self._enforce_budget()
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        EMBED_BATCH_SECONDS.observe(time.perf_counter() - started)
+        EMBED_BATCH_SIZE.observe(len(texts))
+        return vectors
+
+    def delete_contracts(self, contract_ids) -> int:
+        """
+        Removes all chunks belonging to the given contract IDs.
+        Returns the number of chunks removed.
+        """
+        if self.is_empty:
+            return 0
+        contract_ids = set(contract_ids)
+        removed = 0
+        with self._lock:
+            if self.vector_store is not None:
+                doc_ids = [
+                    doc_id for doc_id, metadata in metadata_items(self.vector_store.docstore)
+                    if metadata.get("contract_id") in contract_ids
+                ]
+                if doc_ids:
+                    self.vector_store.delete(doc_ids)
+                removed = len(doc_ids)
+            for contract_id in contract_ids:
+                self._hot.pop(contract_id, None)
+                self._last_used.pop(contract_id, None)
+            for segment in list(self.cold_segments):
+                removed += segment.remove(contract_ids)
+                if not segment.live_contracts:
+                    self._drop_cold(segment)
+        return removed
+
+    def save(self, path: str):
+        """
+        Persists the index to a directory (FAISS index + docstore, plus the
+        cold segments under cold/).
+        """
+        if self.is_empty:
+            return
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            if self.vector_store is not None:
+                self.vector_store.save_local(path)
+            self._save_cold(os.path.join(path, COLD_DIR))
+        with open(os.path.join(path, EMBEDDING_FILE), "w") as f:
+            json.dump({"model": self.embedding_model}, f)
+
+    def save_version(self, path: str, keep: int = 2) -> str:
+        """
+        Saves the index as a new version under path/versions and points
+        path/CURRENT at it with one atomic rename, so a crash or a concurrent
+        load() sees the previous index or the new one, never a mix of both.
+        The newest `keep` versions stay on disk for loaders that read the old
+        pointer. Returns the version name.
+        """
+        versions = os.path.join(path, VERSIONS_DIR)
+        os.makedirs(versions, exist_ok=True)
+        current = os.path.basename(index_path(path)) if os.path.exists(os.path.join(path, CURRENT_FILE)) else None
+        number = int(current.split("-")[0]) + 1 if current else 1
+        name = f"{number:06d}-{uuid.uuid4().hex[:8]}"
+        tmp_dir = os.path.join(versions, f".tmp-{name}")
+        # An empty index is saved too (as an empty version), so deleted contracts do not come back
+        os.makedirs(tmp_dir)
+        self.save(tmp_dir)
+        os.replace(tmp_dir, os.path.join(versions, name))
+
+        pointer = os.path.join(path, CURRENT_FILE + ".tmp")
+        with open(pointer, "w") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer, os.path.join(path, CURRENT_FILE))
+
+        old = sorted(v for v in os.listdir(versions) if not v.startswith("."))[:-keep]
+        for version in old:
+            shutil.rmtree(os.path.join(versions, version), ignore_errors=True)
+        return name
+
+    def load(self, path: str) -> bool:
+        """
+        Loads an index written by save() or save_version(). Returns False if
+        none exists. Cold segments are memory-mapped from its cold/ directory.
+        """
+        path = index_path(path)
+        if not os.path.exists(os.path.join(path, "index.faiss")):
+            return False
+        # Queries embedded with another model than the index would return unrelated chunks
+        check_embedding_model(saved_embedding_model(path), self.embeddings, f"Index {path}")
+        # The files are written by this application, so unpickling the docstore is safe
+        vector_store = FAISS.load_local(path, self.embeddings, allow_dangerous_deserialization=True)
+        cold_root = os.path.join(path, COLD_DIR)
+        cold = []
+        if os.path.isdir(cold_root):
+            cold = [ColdSegment(os.path.join(cold_root, name)) for name in sorted(os.listdir(cold_root))
+                    if not name.endswith(".tmp")]
+        with self._lock:
+            self.vector_store = vector_store
+            self.cold_segments = cold
+            if self.memory_budget:
+                self._hot, self._last_used = {}, {}
+                self._track([vector_store.docstore.search(doc_id) for doc_id in vector_store.index_to_docstore_id.values()],
+                            vector_store.index.d)
+        if self.memory_budget:
+            self._enforce_budget()
         return True
 
+    def _track(self, documents: List[Document], dim: int):
+        now = time.monotonic()
+        with self._lock:
+            for doc in documents:
+                contract_id = doc.metadata.get("contract_id")
+                if contract_id is None:
+                    # Chunks without a contract are never evicted
+                    continue
+                entry = self._hot.setdefault(contract_id, [0, 0])
+                entry[0] += 1
+                entry[1] += dim * 4 + len(doc.page_content) + CHUNK_OVERHEAD_BYTES
+                self._last_used[contract_id] = now
+
+    def _touch(self, filter, documents: List[Document]):
+        """Marks the contracts a search was scoped to or returned as recently used."""
+        if not self.memory_budget:
+            return
+        now = time.monotonic()
+        if isinstance(filter, dict) and filter.get("contract_id") in self._hot:
+            self._last_used[filter["contract_id"]] = now
+        for doc in documents:
+            contract_id = doc.metadata.get("contract_id")
+            if contract_id in self._hot:
+                self._last_used[contract_id] = now
+
+    def _enforce_budget(self):
+        with self._lock:
+            hot_bytes = sum(entry[1] for entry in self._hot.values())
+            if hot_bytes <= self.memory_budget:
+                return
+            # Evict down to 80% of the budget so the next uploads do not trigger another run right away
+            to_free = hot_bytes - int(self.memory_budget * 0.8)
+            victims, freed = [], 0
+            for contract_id in sorted(self._hot, key=lambda c: self._last_used.get(c, 0.0)):
+                victims.append(contract_id)
+                freed += self._hot[contract_id][1]
+                if freed >= to_free:
+                    break
+            self.evict(victims)
+
+    def evict(self, contract_ids) -> int:
+        """
+        Moves contracts from vector_store to a new cold segment on disk; they
+        stay searchable. Returns the number of chunks moved.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            store = self.vector_store
+            wanted = set(contract_ids)
+            if store is None or not wanted:
+                return 0
+            owner = {doc_id: metadata["contract_id"] for doc_id, metadata in metadata_items(store.docstore)
+                     if metadata.get("contract_id") in wanted}
+            # index_to_docstore_id is in insertion order, i.e. chunk order within a contract
+            rows: Dict[str, list] = {}
+            for position, doc_id in store.index_to_docstore_id.items():
+                if doc_id in owner:
+                    rows.setdefault(owner[doc_id], []).append((position, doc_id))
+            if not rows:
+                return 0
+            contracts = [
+                (contract_id, [store.docstore.search(doc_id) for _, doc_id in chunks],
+                 _reconstruct(store.index, [position for position, _ in chunks]))
+                for contract_id, chunks in rows.items()
+            ]
+            segment = ColdSegment.write(os.path.join(self._cold_path(), f"cold-{uuid.uuid4().hex[:12]}"), contracts)
+            store.delete(list(owner))
+            self.cold_segments.append(segment)
+            for contract_id in rows:
+                self._hot.pop(contract_id, None)
+                self._last_used.pop(contract_id, None)
+            elapsed = time.perf_counter() - started
+            self._evictions["runs"] += 1
+            self._evictions["contracts"] += len(rows)
+            self._evictions["chunks"] += len(owner)
+            self._evictions["seconds"] += elapsed
+        logger.info("Evicted %d contracts (%d chunks) to %s in %.2fs", len(rows), len(owner), segment.path, elapsed)
+        self._merge_cold()
+        return len(owner)
+
+    def _merge_cold(self):
+        """
+        Rewrites the cold segments as one once there are more than
+        max_cold_segments, leaving out removed contracts. Searches wait, as
+        they do for an eviction.
+        """
+        with self._lock:
+            if len(self.cold_segments) <= self.max_cold_segments:
+                return
+            started = time.perf_counter()
+            segments = list(self.cold_segments)
+            contracts = [entry for segment in segments for entry in segment.live_contract_chunks()]
+            merged = ColdSegment.write(os.path.join(self._cold_path(), f"cold-{uuid.uuid4().hex[:12]}"), contracts)
+            for segment in segments:
+                self._drop_cold(segment)
+            self.cold_segments.append(merged)
+        logger.info("Merged %d cold segments (%d contracts) into %s in %.2fs",
+                    len(segments), len(contracts), merged.path, time.perf_counter() - started)
+
+    def _cold_path(self) -> str:
+        if self._cold_dir is None:
+            if self._cold_root:
+                os.makedirs(self._cold_root, exist_ok=True)
+            self._cold_dir = tempfile.mkdtemp(prefix="cold-index-", dir=self._cold_root or None)
+            # Evicted data only lives as long as this engine
+            weakref.finalize(self, shutil.rmtree, self._cold_dir, True)
+        return self._cold_dir
+
+    def _drop_cold(self, segment: ColdSegment):
+        self.cold_segments.remove(segment)
+        if self._cold_dir is not None and os.path.dirname(segment.path) == self._cold_dir:
+            segment.destroy()
+        else:
+            # Loaded from a saved index: leave its files to the next save()
+            segment.close()
+
+    def _save_cold(self, cold_root: str):
+        keep = set()
+        for segment in self.cold_segments:
+            dest = os.path.join(cold_root, segment.name)
+            keep.add(segment.name)
+            if not os.path.exists(dest):
+                shutil.copytree(segment.path, dest)
+            segment.save_removed(dest)
+        if os.path.isdir(cold_root):
+            for name in os.listdir(cold_root):
+                if name not in keep:
+                    shutil.rmtree(os.path.join(cold_root, name), ignore_errors=True)
+
+    def memory_stats(self) -> dict:
+        """Hot (in RAM) and cold (memory-mapped on disk) contracts, evictions and cold searches."""
+        with self._lock:
+            segments = list(self.cold_segments)
+            hot_chunks = self.vector_store.index.ntotal if self.vector_store is not None else 0
+            hot = {"chunks": hot_chunks}
+            if self.memory_budget:
+                hot.update(contracts=len(self._hot), estimated_bytes=sum(entry[1] for entry in self._hot.values()))
+            evictions = dict(self._evictions, seconds=round(self._evictions["seconds"], 3))
+            cold_searches = self._cold_searches
+        return {
+            "budget_bytes": self.memory_budget or None,
+            "hot": hot,
+            "cold": {
+                "segments": len(segments),
+                "contracts": sum(len(s.live_contracts) for s in segments),
+                "chunks": sum(s.live_chunks for s in segments),
+                "disk_bytes": sum(s.disk_bytes() for s in segments),
+            },
+            "evictions": evictions,
+            "cold_searches": cold_searches,
+        }
+
+    @property
+    def embedding_model(self) -> str:
+        return embedding_model_name(self.embeddings)
+
+    @property
+    def vector_count(self) -> int:
+        """Chunks searchable in this engine: vector_store, shared segments and cold segments."""
+        with self._lock:
+            return sum(store.index.ntotal for store in self._stores()) + sum(s.live_chunks for s in self.cold_segments)
+
+    def set_segments(self, segments: List[FAISS]):
+        """
+        Replaces the read-only segment stores searched alongside vector_store.
+        """
+        with self._lock:
+            self.segments = list(segments)
+
     @property
     def is_empty(self) -> bool:
         """Checks if the vector store is empty."""
-        return self.vector_store is None
+        return self.vector_store is None and not self.segments and not self.cold_segments
+
+    def _stores(self) -> List[FAISS]:
+        stores = list(self.segments)
+        if self.vector_store is not None:
+            stores.append(self.vector_store)
+        return stores
 
     def search(self, query: str, k: int = 3, filter: dict = None) -> List[Document]:
         """
@@ -54,10 +459,106 @@ class RAGEngine:
         """
         if self.is_empty:
             return []
-        return self.vector_store.similarity_search(query, k=k, filter=filter)
+        with SEARCH_SECONDS.time(kind="text", filtered=filter is not None):
+            if self.segments or self.cold_segments or filter_contract_ids(filter) is not None:
+                return self._search_by_vector(self.embeddings.embed_query(query), k, filter)
+            with self._lock:
+                documents = self.vector_store.similarity_search(query, k=k, filter=filter)
+            self._touch(filter, documents)
+            return documents
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embeds several queries in a single batch call.
+        """
+        return self._embed_batch(queries)
+
+    def search_by_vector(self, embedding: List[float], k: int = 3, filter: dict = None) -> List[Document]:
+        """
+        Retrieves relevant documents for a pre-computed query embedding.
+        """
+        if self.is_empty:
+            return []
+        with SEARCH_SECONDS.time(kind="vector", filtered=filter is not None):
+            return self._search_by_vector(embedding, k, filter)
+
+    def _search_by_vector(self, embedding: List[float], k: int, filter: dict = None) -> List[Document]:
+        with self._lock:
+            # Best k across all segments (scores are L2 distances, lower is closer)
+            scored = []
+            for store in self._stores():
+                scored.extend(self._search_store(store, embedding, k, filter))
+            for segment in self.cold_segments:
+                scored.extend(segment.similarity_search_with_score_by_vector(embedding, k=k, filter=filter))
+            if self.cold_segments:
+                self._cold_searches += 1
+        scored.sort(key=lambda pair: pair[1])
+        documents = [doc for doc, _ in scored[:k]]
+        self._touch(filter, documents)
+        return documents
+
+    def _search_store(self, store: FAISS, embedding: List[float], k: int, filter: dict = None):
+        contract_ids = filter_contract_ids(filter)
+        if contract_ids is None:
+            return store.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)
+        # FAISS only post-filters its global top fetch_k (20) hits, which on a large
+        # index often holds none of the contract's chunks; search only its positions
+        import faiss
+        positions = self._contract_positions(store)
+        selected = [positions[c] for c in contract_ids if c in positions]
+        if not selected:
+            return []
+        selected = np.concatenate(selected)
+        only_contract = set(filter) == {"contract_id"}
+        vector = np.array([embedding], dtype=np.float32)
+        if store._normalize_L2:
+            faiss.normalize_L2(vector)
+        try:
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(selected))
+        except AttributeError:
+            # faiss < 1.7.3: rank everything, then filter
+            return store.similarity_search_with_score_by_vector(embedding, k=k, filter=filter, fetch_k=store.index.ntotal)
+        scores, indices = store.index.search(vector, k if only_contract else len(selected), params=params)
+        matches = None if only_contract else store._create_filter_func(filter)
+        results = []
+        for score, position in zip(scores[0], indices[0]):
+            if position == -1:
+                continue
+            doc = store.docstore.search(store.index_to_docstore_id[position])
+            if matches is None or matches(doc.metadata):
+                results.append((doc, float(score)))
+                if len(results) == k:
+                    break
+        return results
+
+    def _contract_positions(self, store: FAISS) -> Dict[str, np.ndarray]:
+        mapping = store.index_to_docstore_id
+        cached = self._positions.get(id(store))
+        if cached is not None and cached[0] is mapping and cached[1] == len(mapping):
+            return cached[2]
+        owner = {doc_id: metadata.get("contract_id") for doc_id, metadata in metadata_items(store.docstore)}
+        rows: Dict[str, list] = {}
+        for position, doc_id in mapping.items():
+            rows.setdefault(owner.get(doc_id), []).append(position)
+        positions = {contract_id: np.array(p, dtype=np.int64) for contract_id, p in rows.items()}
+        live = {id(s) for s in self._stores()}
+        self._positions = {key: value for key, value in self._positions.items() if key in live}
+        self._positions[id(store)] = (mapping, len(mapping), positions)
+        return positions
 
     def clear(self):
         """
         Clears the in-memory index.
         """
-        self.vector_store = None
\ No newline at end of file
+        with self._lock:
+            self.vector_store = None
+            for segment in list(self.cold_segments):
+                self._drop_cold(segment)
+            self._hot, self._last_used = {}, {}
+
+def _reconstruct(index, positions: List[int]) -> np.ndarray:
+    """Vectors stored at the given positions of a FAISS index."""
+    try:
+        return index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
+    except (AttributeError, RuntimeError):
+        return np.vstack([index.reconstruct(int(position)) for position in positions])
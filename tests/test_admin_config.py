@@ -4,9 +4,14 @@ from unittest.mock import MagicMock, patch, mock_open
 from fastapi.testclient import TestClient
 
 # Import app and state
-from api.server import app, state
+from api.server import app, state, warm_up_done
 from api.auth import valid_api_keys
+from chat_engine.core import ChatEngine
 from config.settings import settings
+from metadata_extractor.extractor import MetadataExtractor
+from rag_engine.hashing_embeddings import HashingEmbeddings
+from rag_engine.vector_store import RAGEngine
+from utils.fake_llm import FakeChatModel
 
 class TestAdminConfig(unittest.TestCase):
     def setUp(self):
@@ -20,6 +25,7 @@ class TestAdminConfig(unittest.TestCase):
         self.original_admin_key = settings.API_ADMIN_KEY
         self.original_rag_engine = state.rag_engine
         self.original_chat_engine = state.chat_engine
+        self.original_metadata_extractor = state.metadata_extractor
 
         # Override admin key for test
         settings.API_ADMIN_KEY = "admin-secret-test"
@@ -33,12 +39,66 @@ class TestAdminConfig(unittest.TestCase):
         # Restore state
         state.rag_engine = self.original_rag_engine
         state.chat_engine = self.original_chat_engine
+        state.metadata_extractor = self.original_metadata_extractor
 
+    @patch("api.server.get_llm")
     @patch("api.server.RAGEngine")
     @patch("api.server.ChatEngine")
     @patch("builtins.open", new_callable=mock_open, read_data="OPENAI_API_KEY=old_key")
     @patch("os.path.exists", return_value=True)
-    def test_set_openai_key(self, mock_exists, mock_file, mock_chat_engine, mock_rag_engine):
+    def test_set_openai_key(self, mock_exists, mock_file, mock_chat_engine, mock_rag_engine, mock_get_llm):
+        # Running engines with an indexed contract
+        rag_engine = MagicMock()
+        rag_engine.is_empty = False
+        chat_engine = MagicMock()
+        extractor = MagicMock()
+        state.rag_engine, state.chat_engine, state.metadata_extractor = rag_engine, chat_engine, extractor
+        new_llm = MagicMock()
+        mock_get_llm.return_value = new_llm
+
+        response = self.client.post(
+            "/api/admin/set-openai-key",
+            json={"api_key": "sk-test-rotated"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(settings.OPENAI_API_KEY, "sk-test-rotated")
+
+        # Only the LLM clients are swapped; the index and embedding model stay
+        mock_rag_engine.assert_not_called()
+        mock_chat_engine.assert_not_called()
+        self.assertIs(state.rag_engine, rag_engine)
+        self.assertIs(state.chat_engine, chat_engine)
+        chat_engine.set_llm.assert_called_once_with(new_llm)
+        extractor.set_llm.assert_called_once_with(new_llm)
+
+    @patch("api.server.get_llm")
+    @patch("os.path.exists", return_value=False)
+    def test_set_openai_key_from_mock_mode_keeps_index(self, mock_exists, mock_get_llm):
+        # Mock mode with an indexed contract: the hashing embeddings stay, the LLMs become real
+        rag_engine = RAGEngine(embeddings=HashingEmbeddings(size=64))
+        rag_engine.index_documents("Payment is due within 30 days.", "a.pdf", {"contract_id": "a"})
+        state.rag_engine = rag_engine
+        state.chat_engine = ChatEngine(rag_engine, llm=FakeChatModel(responses=["mock"]))
+        state.metadata_extractor = MetadataExtractor(use_llm=False)
+        warm_up_done.set()
+        self.assertEqual(self.client.get("/readyz").json()["llm"], "mock")
+
+        response = self.client.post("/api/admin/set-openai-key", json={"api_key": "sk-test-rotated"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(state.rag_engine, rag_engine)
+        self.assertIs(state.chat_engine.llm, mock_get_llm.return_value)
+        self.assertIs(state.metadata_extractor.llm, mock_get_llm.return_value)
+        ready = self.client.get("/readyz").json()
+        self.assertEqual((ready["llm"], ready["embeddings"]), ("openai", "hashing:64"))
+
+    @patch("api.server.RAGEngine")
+    @patch("api.server.ChatEngine")
+    @patch("builtins.open", new_callable=mock_open, read_data="OPENAI_API_KEY=old_key")
+    @patch("os.path.exists", return_value=True)
+    def test_set_openai_key_initializes_engines(self, mock_exists, mock_file, mock_chat_engine, mock_rag_engine):
+        # No engines yet: they are built with the new key
+        state.rag_engine, state.chat_engine = None, None
+
         # Setup mocks
         mock_rag_instance = MagicMock()
         mock_rag_engine.return_value = mock_rag_instance
@@ -104,6 +164,18 @@ class TestAdminConfig(unittest.TestCase):
         self.assertIn(f"\nOPENAI_API_KEY={new_key}", written_content)
         self.assertIn("FOO=bar", written_content)
 
+    def test_set_openai_key_waits_for_warm_up(self):
+        saved_wait = settings.WARMUP_WAIT_SECONDS
+        settings.WARMUP_WAIT_SECONDS = 0.1
+        warm_up_done.clear()
+        try:
+            response = self.client.post("/api/admin/set-openai-key", json={"api_key": "sk-during-warm-up"})
+        finally:
+            warm_up_done.set()
+            settings.WARMUP_WAIT_SECONDS = saved_wait
+        self.assertEqual(response.status_code, 503)
+        self.assertNotEqual(settings.OPENAI_API_KEY, "sk-during-warm-up")
+
     def test_set_openai_key_empty(self):
         response = self.client.post(
             "/api/admin/set-openai-key",
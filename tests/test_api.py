@@ -1,4 +1,8 @@
 import os
+import json
+import marshal
+import tempfile
+import time
 import unittest
 from unittest.mock import MagicMock
 
@@ -16,9 +20,10 @@ except ImportError:
 
 from fastapi.testclient import TestClient
 # Now import app, which initializes global state
-from api.server import app, state
+from api.server import app, state, warm_up_done
 # Import auth to update valid keys
 from api.auth import valid_api_keys
+from create_samples import create_generated_contract, generate_contract_spec
 
 class TestAPI(unittest.TestCase):
     def setUp(self):
@@ -28,15 +33,185 @@ class TestAPI(unittest.TestCase):
         self.client.headers = {"X-API-Key": "admin-secret-test"}
         # Trigger startup events
         self.client.__enter__()
+        # Engines are built on a background warm-up thread
+        warm_up_done.wait(timeout=30)
 
     def tearDown(self):
         self.client.__exit__(None, None, None)
 
+    def test_metrics(self):
+        self.client.post("/api/chat", json={"query": "What are the payment terms?"})
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn("chatbot_ingestion_queue_depth 0", response.text)
+        self.assertIn('chatbot_chat_requests_total{route="', response.text)
+        self.assertIn("# TYPE chatbot_llm_request_seconds histogram", response.text)
+
+    def test_index_memory(self):
+        response = self.client.get("/api/admin/index/memory")
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertIn("hot", stats)
+        self.assertEqual(stats["cold"]["segments"], 0)
+        self.assertIn('chatbot_index_contracts{tier="cold"} 0', self.client.get("/metrics").text)
+        self.assertIn(TestClient(app).get("/api/admin/index/memory").status_code, [401, 403])
+
+    def test_profile_chat(self):
+        response = self.client.post("/api/chat", json={"query": "What are the payment terms?"}, headers={"X-Profile": "1"})
+        self.assertEqual(response.status_code, 200)
+        profile_id = response.headers["X-Profile-Id"]
+
+        profile = self.client.get(f"/api/admin/profiles/{profile_id}").json()
+        self.assertEqual(profile["kind"], "chat")
+        self.assertEqual(profile["status"], "done")
+        self.assertIn("function calls", profile["report"])
+        self.assertIn(profile_id, [p["id"] for p in self.client.get("/api/admin/profiles").json()])
+
+        raw = self.client.get(f"/api/admin/profiles/{profile_id}", params={"format": "pstats"})
+        self.assertEqual(raw.status_code, 200)
+        self.assertTrue(marshal.loads(raw.content))
+
+        # Unflagged requests are not profiled
+        self.assertNotIn("X-Profile-Id", self.client.post("/api/chat", json={"query": "Hi"}).headers)
+
+    def test_profile_upload_job(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profiled.pdf")
+            create_generated_contract(path, generate_contract_spec(901, seed=5), pages=2)
+            with open(path, "rb") as f:
+                response = self.client.post("/api/upload?profile=1", files={"file": ("profiled.pdf", f.read(), "application/pdf")})
+        self.assertEqual(response.status_code, 200)
+        profile_id = response.json()["profile_id"]
+        self.assertTrue(state.ingestion_queue.wait_idle(timeout=30))
+
+        profile = self.client.get(f"/api/admin/profiles/{profile_id}").json()
+        self.assertEqual(profile["kind"], "upload")
+        self.assertEqual(profile["status"], "done")
+        self.assertEqual(profile["stages"]["pdf_extract"]["calls"], 2)
+        for stage in ("split", "embed", "metadata"):
+            self.assertIn(stage, profile["stages"])
+
+        contract_id = response.json()["id"]
+        state.metadata_store = [c for c in state.metadata_store if c["id"] != contract_id]
+        state.content_hashes = {h: c for h, c in state.content_hashes.items() if c != contract_id}
+
+    def test_profile_requires_admin(self):
+        client = TestClient(app)
+        response = client.post("/api/chat", json={"query": "Hi"}, headers={"X-Profile": "1", "X-API-Key": "not-admin"})
+        self.assertEqual(response.status_code, 403)
+        self.assertIn(client.get("/api/admin/profiles").status_code, [401, 403])
+
+    def test_rate_limit_per_key(self):
+        from api.server import quotas
+        from api.quotas import key_id
+        valid_api_keys.add("client-key")
+        caller = key_id("client-key")
+        quotas.update(caller, chat_quota=1, reset_counters=True)
+        try:
+            client = TestClient(app)
+            headers = {"X-API-Key": "client-key"}
+            self.assertEqual(client.post("/api/chat", json={"query": "Hi"}, headers=headers).status_code, 200)
+            response = client.post("/api/chat", json={"query": "Hi"}, headers=headers)
+            self.assertEqual(response.status_code, 429)
+            self.assertIn("Retry-After", response.headers)
+
+            snapshot = self.client.get(f"/api/admin/quotas/{caller}").json()
+            self.assertEqual(snapshot["counters"]["chat"]["rejected_quota"], 1)
+            self.assertEqual(snapshot["in_flight"]["chat"], 0)
+            update = self.client.put(f"/api/admin/quotas/{caller}", json={"chat_quota": -1})
+            self.assertIsNone(update.json()["limits"]["chat_quota"])
+            self.assertEqual(client.post("/api/chat", json={"query": "Hi"}, headers=headers).status_code, 200)
+
+            # A batch worth more than a minute of chat requests is rejected outright
+            quotas.update(caller, chat_per_minute=10)
+            response = client.post("/api/chat/batch", json={"questions": ["Q?"] * 11}, headers=headers)
+            self.assertEqual(response.status_code, 413)
+        finally:
+            valid_api_keys.discard("client-key")
+
     def test_list_contracts_empty(self):
         response = self.client.get("/api/contracts")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), [])
 
+    def test_health_and_readiness(self):
+        self.assertEqual(self.client.get("/healthz").json(), {"status": "ok"})
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "ready")
+
+        warm_up_done.clear()
+        try:
+            self.assertEqual(self.client.get("/readyz").status_code, 503)
+        finally:
+            warm_up_done.set()
+
+    def test_requests_waiting_for_warm_up_leave_the_threadpool_free(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from config.settings import settings
+        saved_wait = settings.WARMUP_WAIT_SECONDS
+        settings.WARMUP_WAIT_SECONDS = 3
+        warm_up_done.clear()
+        try:
+            # More waiting chat requests than the threadpool has threads
+            with ThreadPoolExecutor(max_workers=60) as pool:
+                waiting = [pool.submit(self.client.post, "/api/chat", json={"query": "hi"}) for _ in range(60)]
+                time.sleep(0.5)
+                started = time.perf_counter()
+                self.assertEqual(self.client.get("/readyz").status_code, 503)
+                # A sync endpoint still gets a worker thread
+                self.assertEqual(self.client.get("/api/contracts").status_code, 200)
+                self.assertLess(time.perf_counter() - started, 2)
+                warm_up_done.set()
+                self.assertEqual({f.result().status_code for f in waiting}, {200})
+        finally:
+            settings.WARMUP_WAIT_SECONDS = saved_wait
+            warm_up_done.set()
+
+    def test_list_contracts_pagination_and_projection(self):
+        state.metadata_store = [{"id": f"c{i}", "filename": f"{i}.pdf", "metadata": None, "status": "processed"}
+                                for i in range(5)]
+        state.processing_files = {}
+        try:
+            first = self.client.get("/api/contracts", params={"limit": 2, "fields": "filename"})
+            self.assertEqual(first.json(), [{"id": "c0", "filename": "0.pdf"}, {"id": "c1", "filename": "1.pdf"}])
+            cursor = first.headers["X-Next-Cursor"]
+
+            last = self.client.get("/api/contracts", params={"limit": 3, "cursor": cursor})
+            self.assertEqual([c["id"] for c in last.json()], ["c2", "c3", "c4"])
+            self.assertNotIn("X-Next-Cursor", last.headers)
+
+            bad = self.client.get("/api/contracts", params={"fields": "secret"})
+            self.assertEqual(bad.status_code, 400)
+
+            # Processed contracts that fill the page exactly: processing ones are still to come
+            state.metadata_store = state.metadata_store[:2]
+            state.processing_files = {f"p{i}": {"id": f"p{i}", "filename": f"p{i}.pdf", "status": "processing",
+                                                "stage": "queued", "metadata": None} for i in range(3)}
+            first = self.client.get("/api/contracts", params={"limit": 2, "fields": "status"})
+            self.assertEqual([c["id"] for c in first.json()], ["c0", "c1"])
+            rest = self.client.get("/api/contracts", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+            self.assertEqual([c["id"] for c in rest.json()], ["p0", "p1"])
+            last = self.client.get("/api/contracts", params={"limit": 2, "cursor": rest.headers["X-Next-Cursor"]})
+            self.assertEqual([c["id"] for c in last.json()], ["p2"])
+            self.assertNotIn("X-Next-Cursor", last.headers)
+        finally:
+            state.metadata_store = []
+            state.processing_files = {}
+
+    def test_list_contracts_etag(self):
+        first = self.client.get("/api/contracts")
+        etag = first.headers["ETag"]
+        unchanged = self.client.get("/api/contracts", headers={"If-None-Match": etag})
+        self.assertEqual(unchanged.status_code, 304)
+
+        from api.server import _bump_version
+        _bump_version()
+        changed = self.client.get("/api/contracts", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
     def test_chat_no_context(self):
         # Mock the chat engine query processing
         original_process_query = state.chat_engine.process_query
@@ -53,6 +228,25 @@ class TestAPI(unittest.TestCase):
         finally:
             state.chat_engine.process_query = original_process_query
 
+    def test_chat_batch_streams_ndjson(self):
+        original_process_batch = state.chat_engine.process_batch
+        state.chat_engine.process_batch = MagicMock(return_value=iter([
+            {"question": "Q1", "contract_id": "a", "answer": "A1", "source_documents": []},
+            {"question": "Q1", "contract_id": "b", "answer": "A2", "source_documents": []},
+        ]))
+
+        try:
+            response = self.client.post("/api/chat/batch", json={"questions": ["Q1"], "contract_ids": ["a", "b"]})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+            lines = [json.loads(line) for line in response.text.splitlines() if line]
+            self.assertEqual([l["answer"] for l in lines], ["A1", "A2"])
+        finally:
+            state.chat_engine.process_batch = original_process_batch
+
+        response = self.client.post("/api/chat/batch", json={"questions": [" "]})
+        self.assertEqual(response.status_code, 400)
+
     def test_generate_key(self):
         response = self.client.post("/api/admin/generate-key")
         self.assertEqual(response.status_code, 200)
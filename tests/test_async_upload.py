@@ -1,4 +1,5 @@
 import os
+import hashlib
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -7,7 +8,8 @@ os.environ["OPENAI_API_KEY"] = "openai-test"
 os.environ["API_ADMIN_KEY"] = "admin-secret-test"
 
 from fastapi.testclient import TestClient
-from api.server import app, state
+from api.server import app, state, process_contract_background
+from metadata_extractor.extractor import MetadataExtractor
 from api.auth import valid_api_keys
 
 class TestAsyncUpload(unittest.TestCase):
@@ -17,7 +19,7 @@ class TestAsyncUpload(unittest.TestCase):
         self.client.headers = {"X-API-Key": "admin-secret-test"}
         # Clear state
         state.metadata_store = []
-        state.processed_files = set()
+        state.content_hashes = {}
         if hasattr(state, 'processing_files'):
             state.processing_files = {}
 
@@ -34,9 +36,41 @@ class TestAsyncUpload(unittest.TestCase):
         self.assertEqual(data['status'], 'processing')
         self.assertIn('id', data)
 
-        # Verify background task was called
+        # Verify the ingestion worker ran the job
+        self.assertTrue(state.ingestion_queue.wait_idle(timeout=5))
         mock_process.assert_called_once()
 
+    @patch('api.server.process_contract_background')
+    def test_upload_deduplicates_on_content(self, mock_process):
+        first = self.client.post("/api/upload", files={'file': ('agreement.pdf', b'%PDF-1.4 same', 'application/pdf')}).json()
+        # Renamed copy of the same bytes returns the existing contract
+        renamed = self.client.post("/api/upload", files={'file': ('copy.pdf', b'%PDF-1.4 same', 'application/pdf')}).json()
+        # Different contract with the same name is a new upload
+        other = self.client.post("/api/upload", files={'file': ('agreement.pdf', b'%PDF-1.4 other', 'application/pdf')}).json()
+
+        self.assertEqual(renamed["id"], first["id"])
+        self.assertIn(renamed["status"], ("processing", "processed"))
+        self.assertNotEqual(other["id"], first["id"])
+        self.assertTrue(state.ingestion_queue.wait_idle(timeout=5))
+        self.assertEqual(mock_process.call_count, 2)
+
+    def test_failed_upload_can_be_retried(self):
+        from api.server import _register_upload, _mark_failed
+        _register_upload("c1", "a.pdf", "hash-a")
+        _mark_failed("c1", "boom")
+        self.assertEqual(state.processing_files["c1"]["status"], "failed")
+        self.assertNotIn("hash-a", state.content_hashes)
+
+    def test_upload_rejected_when_queue_full(self):
+        files = {'file': ('test.pdf', b'%PDF-1.4 dummy content', 'application/pdf')}
+        with patch.object(state.ingestion_queue, "is_full", return_value=True), \
+                patch.object(state.ingestion_queue, "retry_after", return_value=7):
+            response = self.client.post("/api/upload", files=files)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["retry-after"], "7")
+        self.assertEqual(state.processing_files, {})
+
     def test_list_contracts_includes_processing(self):
         # Manually add a processing task
         state.processing_files = {
@@ -52,5 +86,51 @@ class TestAsyncUpload(unittest.TestCase):
         self.assertIsNotNone(pending)
         self.assertEqual(pending['status'], 'processing')
 
+    @patch('api.server.process_batch_background')
+    def test_batch_upload_queues_one_job(self, mock_process):
+        state.content_hashes = {hashlib.sha256(b'%PDF-1.4 old').hexdigest(): "old-id"}
+        files = [
+            ('files', ('a.pdf', b'%PDF-1.4 a', 'application/pdf')),
+            ('files', ('b.pdf', b'%PDF-1.4 b', 'application/pdf')),
+            ('files', ('old.pdf', b'%PDF-1.4 old', 'application/pdf')),
+        ]
+        response = self.client.post("/api/upload/batch", files=files)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual([f["status"] for f in data["files"]], ["processing", "processing", "processed"])
+        self.assertEqual(data["files"][2]["id"], "old-id")
+        self.assertTrue(state.ingestion_queue.wait_idle(timeout=5))
+        mock_process.assert_called_once()
+        batch_id, items = mock_process.call_args[0][:2]
+        self.assertEqual(batch_id, data["batch_id"])
+        self.assertEqual([i.source for i in items], ["a.pdf", "b.pdf"])
+
+        status = self.client.get(f"/api/upload/batch/{batch_id}").json()
+        self.assertEqual(status["files"], 2)
+        self.assertEqual(self.client.get("/api/upload/batch/unknown").status_code, 404)
+
+    @patch("ingestion.pdf_loader.PDFLoader.extract_text_from_file")
+    def test_background_pipeline_reports_stage_timings(self, mock_extract):
+        mock_extract.return_value = "Service Agreement\nVendor: Acme Inc.\nContract End Date: 2025-12-31\n"
+        original_rag, original_extractor = state.rag_engine, state.metadata_extractor
+        state.rag_engine = MagicMock()
+        state.rag_engine.index_documents.return_value = True
+        state.metadata_extractor = MetadataExtractor(use_llm=False)
+        state.processing_files = {
+            "c1": {"id": "c1", "filename": "a.pdf", "status": "processing", "metadata": None}
+        }
+
+        try:
+            process_contract_background("/tmp/does-not-exist.pdf", "a.pdf", "c1")
+        finally:
+            state.rag_engine, state.metadata_extractor = original_rag, original_extractor
+
+        self.assertNotIn("c1", state.processing_files)
+        record = state.metadata_store[0]
+        self.assertEqual(record["metadata"].vendor, "Acme Inc.")
+        for stage in ("extract_text", "index", "metadata", "metadata_wait", "total"):
+            self.assertIn(stage, record["timings"])
+
 if __name__ == '__main__':
     unittest.main()
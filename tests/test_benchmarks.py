@@ -0,0 +1,67 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.components import percentiles, run_benchmarks, compare
+from benchmarks.memory import run_memory_benchmark, summary
+from create_samples import generate_contract_spec, generate_corpus, load_clause_templates
+
+class TestBenchmarks(unittest.TestCase):
+    def test_percentiles(self):
+        stats = percentiles([i / 1000 for i in range(1, 101)])
+        self.assertEqual(stats["p50"], 51.0)
+        self.assertEqual(stats["p99"], 99.0)
+        self.assertEqual(stats["max"], 100.0)
+        self.assertEqual(percentiles([]), {})
+
+    def test_generated_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            first = generate_corpus(a, 4, pages=2, scanned=0.25, seed=7)
+            second = generate_corpus(b, 4, pages=2, scanned=0.25, seed=7)
+            self.assertEqual([c["spec"] for c in first], [c["spec"] for c in second])
+            self.assertEqual([c["layer"] for c in first].count("scanned"), 1)
+            for x, y in zip(first, second):
+                with open(x["path"], "rb") as fx, open(y["path"], "rb") as fy:
+                    self.assertEqual(fx.read(), fy.read())
+
+    def test_custom_clause_templates(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "templates.json")
+            with open(path, "w") as f:
+                json.dump([["Escrow", "{vendor} deposits the source code with an escrow agent in {jurisdiction}."],
+                           {"heading": "Audit", "template": "{client} may audit {vendor} once per year."}], f)
+            templates = load_clause_templates(path)
+            spec = generate_contract_spec(3, seed=7, templates=templates)
+            self.assertEqual(sorted(heading for heading, _ in spec["clauses"]), ["Audit", "Escrow"])
+            self.assertIn(spec["vendor"], dict(spec["clauses"])["Escrow"])
+            corpus = generate_corpus(d, 1, seed=7, templates=templates)
+            self.assertEqual(corpus[0]["spec"]["clauses"], generate_contract_spec(0, seed=7, templates=templates)["clauses"])
+
+    def test_run_and_compare(self):
+        report = run_benchmarks(count=2, pages=2, scanned=0.0, mixed=0.0, search_rounds=1)
+        json.dumps(report)
+        benchmarks = report["benchmarks"]
+        for name in ("pdf_extract", "split", "embed", "index", "search", "search_filtered", "metadata_rules"):
+            self.assertIn("latency_ms", benchmarks[name], name)
+        self.assertEqual(benchmarks["pdf_extract"]["units"], 4)
+        self.assertIn("skipped", benchmarks["ocr"])
+        self.assertEqual(report["meta"]["corpus"]["contracts"], 2)
+
+        lines = compare(report, report)
+        self.assertEqual(len(lines), 7)
+        self.assertTrue(all("+0.0%" in line for line in lines))
+
+    def test_memory_benchmark(self):
+        report = run_memory_benchmark(count=5, pages=2)
+        self.assertEqual(report["in_memory"]["docstore"], "InMemoryDocstore")
+        self.assertEqual(report["compact"]["docstore"], "CompactDocstore")
+        self.assertEqual(report["in_memory"]["chunks"], report["compact"]["chunks"])
+        self.assertIn("rss_mb", report["savings"])
+        self.assertEqual(len(summary(report)), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+import unittest
+from langchain_community.embeddings import FakeEmbeddings
+from create_samples import create_contract
+from ingestion.bulk import BulkIngestor, BulkItem, DirectoryIngestion, read_manifest
+from metadata_extractor.extractor import MetadataExtractor
+from rag_engine.vector_store import RAGEngine, index_path, saved_embedding_model
+
+class TestBulkIngestion(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pdf_dir = os.path.join(self.tmp, "pdfs")
+        self.index_dir = os.path.join(self.tmp, "index")
+        os.makedirs(self.pdf_dir)
+        for i in range(3):
+            create_contract(
+                os.path.join(self.pdf_dir, f"contract_{i}.pdf"),
+                f"Service Agreement {i}", f"Vendor {i} Inc.", "Global Corp",
+                "2024-01-01", "2025-12-31", "1. Scope\nServices are provided monthly.",
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_bulk_ingestor_batches_embeddings(self):
+        rag = RAGEngine(embeddings=FakeEmbeddings(size=32))
+        done = []
+        items = [
+            BulkItem(path=os.path.join(self.pdf_dir, name), source=name, contract_id=name)
+            for name in sorted(os.listdir(self.pdf_dir))
+        ]
+        stats = BulkIngestor(
+            rag, metadata_extractor=MetadataExtractor(use_llm=False), processes=2, batch_size=1000,
+            on_done=lambda item, text, meta: done.append((item.contract_id, meta.vendor)),
+        ).ingest(items)
+
+        self.assertEqual(stats.files, 3)
+        self.assertEqual(stats.pages, 3)
+        # Everything fits in one batch, so one embedding call
+        self.assertEqual(stats.embed_batches, 1)
+        self.assertEqual(sorted(done), [("contract_0.pdf", "Vendor 0 Inc."), ("contract_1.pdf", "Vendor 1 Inc."), ("contract_2.pdf", "Vendor 2 Inc.")])
+        self.assertEqual(len(rag.search("scope", k=10, filter={"contract_id": "contract_1.pdf"})), 1)
+
+    def test_directory_ingestion_resumes(self):
+        def run():
+            rag = RAGEngine(embeddings=FakeEmbeddings(size=32))
+            stats = DirectoryIngestion(rag, MetadataExtractor(use_llm=False), index_dir=self.index_dir, processes=1).run(self.pdf_dir)
+            return rag, stats
+
+        rag, stats = run()
+        self.assertEqual(stats.files, 3)
+        manifest = read_manifest(self.index_dir)
+        self.assertEqual(len(manifest), 3)
+        self.assertTrue(all(e["metadata"]["client"] == "Global Corp" for e in manifest.values()))
+        self.assertEqual(saved_embedding_model(self.index_dir), "FakeEmbeddings")
+
+        # Simulate an interrupted run: chunks in the saved index but not in the manifest
+        rag.index_documents("orphan text", "orphan.pdf", metadata={"contract_id": "orphan"})
+        rag.save(self.index_dir)
+
+        rag, stats = run()
+        self.assertEqual(stats.files, 0)
+        self.assertEqual(rag.search("orphan", k=10, filter={"contract_id": "orphan"}), [])
+        self.assertEqual(len(rag.vector_store.docstore), 3)
+
+    def test_directory_ingestion_replaces_modified_and_drops_deleted_files(self):
+        def run():
+            rag = RAGEngine(embeddings=FakeEmbeddings(size=32))
+            stats = DirectoryIngestion(rag, MetadataExtractor(use_llm=False), index_dir=self.index_dir, processes=1).run(self.pdf_dir)
+            return rag, stats
+
+        run()
+        old_ids = {e["path"]: e["contract_id"] for e in read_manifest(self.index_dir).values()}
+        modified = os.path.join(self.pdf_dir, "contract_1.pdf")
+        deleted = os.path.join(self.pdf_dir, "contract_2.pdf")
+        create_contract(modified, "Service Agreement 1 (amended)", "Vendor 1 Inc.", "Global Corp",
+                        "2024-01-01", "2026-12-31", "1. Scope\nServices are provided weekly.")
+        os.utime(modified, (1, 1))
+        os.remove(deleted)
+
+        rag, stats = run()
+        self.assertEqual(stats.files, 1)
+        manifest = read_manifest(self.index_dir)
+        self.assertEqual(manifest[deleted]["status"], "removed")
+        self.assertNotEqual(manifest[modified]["contract_id"], old_ids[modified])
+        contract_ids = {rag.vector_store.docstore.search(i).metadata["contract_id"]
+                        for i in rag.vector_store.index_to_docstore_id.values()}
+        self.assertEqual(contract_ids, {old_ids[os.path.join(self.pdf_dir, "contract_0.pdf")], manifest[modified]["contract_id"]})
+
+        # The saved index agrees: nothing stale comes back on the next run
+        rag, stats = run()
+        self.assertEqual(stats.files, 0)
+        self.assertEqual(len(rag.vector_store.docstore), 2)
+
+    def test_directory_ingestion_skips_content_already_indexed(self):
+        def run():
+            rag = RAGEngine(embeddings=FakeEmbeddings(size=32))
+            stats = DirectoryIngestion(rag, MetadataExtractor(use_llm=False), index_dir=self.index_dir, processes=1).run(self.pdf_dir)
+            return rag, stats
+
+        original = os.path.join(self.pdf_dir, "contract_0.pdf")
+        copy = os.path.join(self.pdf_dir, "copy_of_contract_0.pdf")
+        shutil.copy(original, copy)
+        rag, stats = run()
+        self.assertEqual((stats.files, stats.duplicates), (3, 1))
+        manifest = read_manifest(self.index_dir)
+        self.assertEqual(manifest[copy]["status"], "duplicate")
+        self.assertEqual(manifest[copy]["contract_id"], manifest[original]["contract_id"])
+        self.assertEqual(len(rag.vector_store.docstore), 3)
+
+        # Already recorded: not hashed or counted again
+        rag, stats = run()
+        self.assertEqual((stats.files, stats.duplicates), (0, 0))
+
+        # Once the original is gone, the copy is indexed in its place
+        os.remove(original)
+        rag, stats = run()
+        self.assertEqual(stats.files, 1)
+        manifest = read_manifest(self.index_dir)
+        self.assertEqual((manifest[original]["status"], manifest[copy]["status"]), ("removed", "indexed"))
+        self.assertEqual(len(rag.vector_store.docstore), 3)
+
+    def test_checkpoints_switch_versions_atomically(self):
+        def run():
+            rag = RAGEngine(embeddings=FakeEmbeddings(size=32))
+            stats = DirectoryIngestion(rag, MetadataExtractor(use_llm=False), index_dir=self.index_dir, processes=1).run(self.pdf_dir)
+            return rag, stats
+
+        run()
+        first = index_path(self.index_dir)
+        self.assertEqual(os.path.dirname(first), os.path.join(self.index_dir, "versions"))
+
+        # A save that never switched the pointer (crash mid-write) is not read
+        os.makedirs(os.path.join(self.index_dir, "versions", ".tmp-crashed"))
+        with open(os.path.join(self.index_dir, "versions", ".tmp-crashed", "index.faiss"), "wb") as f:
+            f.write(b"partial")
+        loaded = RAGEngine(embeddings=FakeEmbeddings(size=32))
+        self.assertTrue(loaded.load(self.index_dir))
+        self.assertEqual(len(loaded.vector_store.docstore), 3)
+
+        for i in range(3):
+            os.remove(os.path.join(self.pdf_dir, f"contract_{i}.pdf"))
+            run()
+        # The previous version stays for loaders that read the old pointer; older ones go
+        versions = [v for v in os.listdir(os.path.join(self.index_dir, "versions")) if not v.startswith(".")]
+        self.assertEqual(len(versions), 2)
+        self.assertFalse(os.path.exists(first))
+        # Deleting every file leaves an empty index, not the last non-empty one
+        loaded = RAGEngine(embeddings=FakeEmbeddings(size=32))
+        loaded.load(self.index_dir)
+        self.assertEqual(loaded.search("scope", k=10), [])
+
+if __name__ == '__main__':
+    unittest.main()
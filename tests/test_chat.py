@@ -25,5 +25,27 @@ class TestChat(unittest.TestCase):
         self.assertEqual(len(result["source_documents"]), 1)
         mock_rag.search.assert_called_with("When does it expire?", filter=None)
 
+    def test_process_batch(self):
+        mock_rag = MagicMock()
+        mock_rag.is_empty = False
+        mock_rag.embed_queries.return_value = [[0.1], [0.2]]
+        mock_rag.search_by_vector.return_value = [
+            Document(page_content="Notice period is 60 days.", metadata={"source": "contract.pdf"})
+        ]
+
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value.content = "60 days."
+
+        chat = ChatEngine(rag_engine=mock_rag, llm=mock_llm)
+        results = list(chat.process_batch(["Notice?", "Renewal?"], contract_ids=["a", "b", "c"], max_concurrency=2))
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual({(r["question"], r["contract_id"]) for r in results},
+                         {(q, c) for q in ["Notice?", "Renewal?"] for c in ["a", "b", "c"]})
+        # Queries are embedded once for the whole batch
+        mock_rag.embed_queries.assert_called_once_with(["Notice?", "Renewal?"])
+        mock_rag.search_by_vector.assert_any_call([0.1], filter={"contract_id": "b"})
+        self.assertEqual(mock_llm.invoke.call_count, 6)
+
 if __name__ == '__main__':
     unittest.main()
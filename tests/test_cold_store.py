@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from create_samples import _contract_lines, generate_contract_spec
+from rag_engine.cold_store import ColdSegment
+from rag_engine.hashing_embeddings import HashingEmbeddings
+from rag_engine.vector_store import RAGEngine
+
+QUERIES = ("payment terms", "termination notice", "governing law", "confidentiality")
+
+def _contract_text(index: int) -> str:
+    return "\n".join(_contract_lines(generate_contract_spec(index, seed=11), pages=3, lines_per_page=45))
+
+def _results(docs):
+    return [(d.page_content, d.metadata) for d in docs]
+
+class TestColdEviction(unittest.TestCase):
+    def setUp(self):
+        self.cold_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cold_dir, True)
+
+    def _engine(self, budget_mb: float = 0) -> RAGEngine:
+        engine = RAGEngine(embeddings=HashingEmbeddings(size=64), memory_budget_mb=budget_mb, cold_dir=self.cold_dir)
+        for i in range(4):
+            engine.index_documents(_contract_text(i), f"c{i}.pdf", {"contract_id": f"c{i}"})
+        return engine
+
+    def test_evicted_contracts_return_the_same_results(self):
+        engine = self._engine()
+        before_global = {q: _results(engine.search(q, k=6)) for q in QUERIES}
+        hot_chunks = engine.vector_count
+
+        moved = engine.evict(["c1", "c2"])
+        self.assertGreater(moved, 0)
+        self.assertEqual(len(engine.cold_segments), 1)
+        self.assertEqual(sorted(engine.cold_segments[0].live_contracts), ["c1", "c2"])
+        self.assertEqual(engine.vector_store.index.ntotal, hot_chunks - moved)
+        self.assertEqual(engine.vector_count, hot_chunks)
+
+        # A scoped search ranks all of the contract's chunks, as an index of that contract alone would
+        alone = RAGEngine(embeddings=HashingEmbeddings(size=64))
+        alone.index_documents(_contract_text(1), "c1.pdf", {"contract_id": "c1"})
+        for q in QUERIES:
+            self.assertEqual(_results(engine.search(q, k=6)), before_global[q])
+            self.assertEqual(_results(engine.search(q, k=4, filter={"contract_id": "c1"})), _results(alone.search(q, k=4)))
+        # Filters on other metadata still apply to cold chunks
+        self.assertEqual(engine.search("payment", filter={"contract_id": "c1", "source": "other.pdf"}), [])
+
+    def test_budget_evicts_least_recently_searched(self):
+        budgeted = RAGEngine(embeddings=HashingEmbeddings(size=64), memory_budget_mb=1024, cold_dir=self.cold_dir)
+        budgeted.index_documents(_contract_text(0), "c0.pdf", {"contract_id": "c0"})
+        budgeted.index_documents(_contract_text(1), "c1.pdf", {"contract_id": "c1"})
+        # Room for 2.8 contracts; each eviction frees down to 80% of that
+        budgeted.memory_budget = int(budgeted.memory_stats()["hot"]["estimated_bytes"] * 1.4)
+        # c0 keeps being searched, so the least recently used contract is c1, then c2
+        for i in (2, 3):
+            time.sleep(0.01)
+            budgeted.search("payment", filter={"contract_id": "c0"})
+            budgeted.index_documents(_contract_text(i), f"c{i}.pdf", {"contract_id": f"c{i}"})
+            if i == 2:
+                self.assertEqual([s.live_contracts for s in budgeted.cold_segments], [["c1"]])
+
+        stats = budgeted.memory_stats()
+        cold = {c for segment in budgeted.cold_segments for c in segment.live_contracts}
+        self.assertEqual(cold, {"c1", "c2"})
+        self.assertLessEqual(stats["hot"]["estimated_bytes"], stats["budget_bytes"])
+        self.assertEqual(stats["cold"]["contracts"], len(cold))
+        self.assertGreater(stats["cold"]["disk_bytes"], 0)
+        self.assertEqual(stats["evictions"]["runs"], 2)
+        self.assertEqual(stats["hot"]["contracts"] + stats["cold"]["contracts"], 4)
+
+        docs = budgeted.search("payment", filter={"contract_id": "c1"})
+        self.assertTrue(docs and all(d.metadata["contract_id"] == "c1" for d in docs))
+        self.assertGreaterEqual(budgeted.memory_stats()["cold_searches"], 1)
+
+    def test_cold_segments_are_merged(self):
+        engine = self._engine()
+        engine.max_cold_segments = 2
+        before = {q: _results(engine.search(q, k=6)) for q in QUERIES}
+        engine.evict(["c0"])
+        engine.evict(["c1"])
+        engine.delete_contracts({"c1"})
+        engine.evict(["c2"])
+        first = engine.cold_segments[0].path
+        self.assertEqual([s.live_contracts for s in engine.cold_segments], [["c0"], ["c2"]])
+
+        # A third segment goes over the limit: all are rewritten as one, without the removed contract
+        engine.evict(["c3"])
+        self.assertEqual(len(engine.cold_segments), 1)
+        self.assertEqual(sorted(engine.cold_segments[0].contracts), ["c0", "c2", "c3"])
+        self.assertFalse(os.path.exists(first))
+        for q in QUERIES:
+            expected = [r for r in before[q] if r[1]["contract_id"] != "c1"]
+            self.assertEqual(_results(engine.search(q, k=6))[:len(expected)], expected)
+
+    def test_delete_cold_contract(self):
+        engine = self._engine()
+        engine.evict(["c1", "c2"])
+        segment_path = engine.cold_segments[0].path
+        self.assertGreater(engine.delete_contracts({"c1"}), 0)
+        self.assertEqual({d.metadata["contract_id"] for d in engine.search("payment", k=50)}, {"c0", "c2", "c3"})
+        self.assertEqual(engine.search("payment", filter={"contract_id": "c1"}), [])
+
+        # A segment with no live contracts left is deleted
+        engine.delete_contracts({"c2"})
+        self.assertEqual(engine.cold_segments, [])
+        self.assertFalse(os.path.exists(segment_path))
+
+    def test_save_and_load_keep_cold_contracts(self):
+        engine = self._engine()
+        engine.evict(["c0", "c3"])
+        engine.delete_contracts({"c3"})
+        expected = {q: _results(engine.search(q, k=6)) for q in QUERIES}
+        index_dir = os.path.join(self.cold_dir, "index")
+        engine.save(index_dir)
+
+        loaded = RAGEngine(embeddings=HashingEmbeddings(size=64))
+        self.assertTrue(loaded.load(index_dir))
+        self.assertEqual(loaded.memory_stats()["cold"]["contracts"], 1)
+        for q in QUERIES:
+            self.assertEqual(_results(loaded.search(q, k=6)), expected[q])
+        # Saving over the directory it was loaded from keeps the segment files
+        loaded.save(index_dir)
+        self.assertEqual(len(os.listdir(os.path.join(index_dir, "cold"))), 1)
+
+    def test_scoped_search_reads_only_that_contract(self):
+        engine = self._engine()
+        engine.evict(["c1", "c2"])
+        segment: ColdSegment = engine.cold_segments[0]
+        rows = segment._rows_for({"contract_id": "c2"})
+        self.assertEqual((int(rows[0]), int(rows[-1]) + 1), segment.contracts["c2"])
+        self.assertIsNone(segment._rows_for({"source": "c2.pdf"}))
+        self.assertEqual(len(segment._rows_for({"contract_id": {"$in": ["c1", "c2"]}})), segment.live_chunks)
+
+if __name__ == "__main__":
+    unittest.main()
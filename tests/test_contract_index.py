@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from rag_engine.contract_index import ContractIndex
+from rag_engine.hashing_embeddings import HashingEmbeddings
+from rag_engine.segments import SegmentStore
+from rag_engine.vector_store import EmbeddingMismatchError, RAGEngine
+
+def _engine_with(text: str, contract_id: str) -> RAGEngine:
+    engine = RAGEngine(embeddings=HashingEmbeddings(size=64))
+    engine.index_documents(text, f"{contract_id}.pdf", {"contract_id": contract_id})
+    return engine
+
+class TestContractIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_shared_index_is_lazy_and_follows_new_segments(self):
+        store = SegmentStore(self.root)
+        store.publish(_engine_with("Payment is due within 30 days.", "a").vector_store,
+                      [{"id": "a", "filename": "a.pdf", "metadata": None}])
+        index = ContractIndex(shared_dir=self.root, embeddings=HashingEmbeddings(size=64))
+        self.assertIsNone(index.engine)
+
+        docs = index.get_engine().search("payment due", filter={"contract_id": "a"})
+        self.assertEqual(docs[0].metadata["source"], "a.pdf")
+        self.assertEqual([c["id"] for c in index.list_contracts()], ["a"])
+
+        # An upload through the API publishes another segment
+        store.publish(_engine_with("Either party may terminate with notice.", "b").vector_store,
+                      [{"id": "b", "filename": "b.pdf", "metadata": {"vendor": "Acme"}}])
+        docs = index.get_engine().search("terminate notice", filter={"contract_id": "b"})
+        self.assertEqual(docs[0].metadata["source"], "b.pdf")
+        self.assertEqual([c["id"] for c in index.list_contracts()], ["a", "b"])
+        self.assertEqual(index.contracts[1]["metadata"], {"vendor": "Acme"})
+
+    def test_persisted_index(self):
+        _engine_with("Governing law is Delaware.", "c").save(self.root)
+        with open(os.path.join(self.root, "manifest.jsonl"), "w") as f:
+            f.write(json.dumps({"path": "c.pdf", "source": "c.pdf", "contract_id": "c", "status": "indexed"}) + "\n")
+        index = ContractIndex(shared_dir="", index_dir=self.root, embeddings=HashingEmbeddings(size=64))
+        self.assertEqual(index.list_contracts(), [{"id": "c", "filename": "c.pdf", "metadata": None}])
+        self.assertEqual(len(index.get_engine().search("governing law")), 1)
+
+    def test_embedding_model_is_taken_from_the_index(self):
+        _engine_with("Governing law is Delaware.", "c").save(self.root)
+        index = ContractIndex(shared_dir="", index_dir=self.root)
+        engine = index.get_engine()
+        self.assertIsInstance(engine.embeddings, HashingEmbeddings)
+        self.assertEqual(engine.embeddings.size, 64)
+        self.assertEqual(len(engine.search("governing law")), 1)
+
+        # Another model is refused rather than searched with unrelated vectors
+        with self.assertRaises(EmbeddingMismatchError):
+            ContractIndex(shared_dir="", index_dir=self.root, embeddings=HashingEmbeddings(size=32)).get_engine()
+        # Same dimension, different model ('main.py ingest' without OPENAI_API_KEY in the MCP server)
+        with open(os.path.join(self.root, "embedding.json"), "w") as f:
+            json.dump({"model": "HuggingFaceEmbeddings:all-MiniLM-L6-v2"}, f)
+        with self.assertRaises(EmbeddingMismatchError):
+            ContractIndex(shared_dir="", index_dir=self.root, embeddings=HashingEmbeddings(size=64)).get_engine()
+
+    def test_shared_index_records_embedding_model(self):
+        store = SegmentStore(self.root)
+        store.publish(_engine_with("Payment is due within 30 days.", "a").vector_store, [{"id": "a", "filename": "a.pdf"}])
+        self.assertEqual(store.read_manifest()["embedding_model"], "hashing:64")
+        self.assertEqual(ContractIndex(shared_dir=self.root).get_engine().embeddings.size, 64)
+        with self.assertRaises(EmbeddingMismatchError):
+            ContractIndex(shared_dir=self.root, embeddings=HashingEmbeddings(size=32)).get_engine()
+        other = RAGEngine(embeddings=HashingEmbeddings(size=32))
+        other.index_documents("Other text.", "b.pdf", {"contract_id": "b"})
+        with self.assertRaises(EmbeddingMismatchError):
+            store.publish(other.vector_store, [{"id": "b", "filename": "b.pdf"}])
+        self.assertEqual(store.version, 1)
+
+    def test_missing_sources_give_empty_index(self):
+        index = ContractIndex(shared_dir="", index_dir="", sample_dir=self.root, embeddings=HashingEmbeddings(size=64))
+        self.assertTrue(index.get_engine().is_empty)
+        self.assertEqual(index.list_contracts(), [])
+
+if __name__ == "__main__":
+    unittest.main()
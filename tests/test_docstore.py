@@ -0,0 +1,100 @@
+import pickle
+import unittest
+from langchain_core.documents import Document
+from create_samples import _contract_lines, generate_contract_spec
+from rag_engine.docstore import CompactDocstore, _overlap
+from rag_engine.hashing_embeddings import HashingEmbeddings
+from rag_engine.vector_store import RAGEngine
+
+def _contract_text(index: int) -> str:
+    return "\n".join(_contract_lines(generate_contract_spec(index, seed=9), pages=3, lines_per_page=45))
+
+class TestOverlap(unittest.TestCase):
+    def test_overlap(self):
+        self.assertEqual(_overlap("hello world", "world peace"), 5)
+        self.assertEqual(_overlap("abc", "cde"), 1)
+        self.assertEqual(_overlap("abc", "xyz"), 0)
+        self.assertEqual(_overlap("", "xyz"), 0)
+        # Longest suffix wins
+        self.assertEqual(_overlap("aaaa", "aaab"), 3)
+        self.assertEqual(_overlap("the end of the text", "of the text"), 11)
+
+class TestCompactDocstore(unittest.TestCase):
+    def _engine(self, compact=True) -> RAGEngine:
+        return RAGEngine(embeddings=HashingEmbeddings(size=64), compact_docstore=compact)
+
+    def test_chunks_round_trip_and_text_is_stored_once(self):
+        engine = self._engine()
+        expected = {}
+        for i in range(3):
+            documents = engine.split_documents(_contract_text(i), f"c{i}.pdf", {"contract_id": f"c{i}"})
+            engine.add_documents(documents)
+            for d in documents:
+                expected.setdefault(d.metadata["contract_id"], []).append(d.page_content)
+
+        store = engine.vector_store
+        docstore = store.docstore
+        self.assertIsInstance(docstore, CompactDocstore)
+        found = {}
+        for i in range(len(store.index_to_docstore_id)):
+            doc = docstore.search(store.index_to_docstore_id[i])
+            found.setdefault(doc.metadata["contract_id"], []).append(doc.page_content)
+            self.assertEqual(doc.id, store.index_to_docstore_id[i])
+        self.assertEqual(found, expected)
+
+        stats = docstore.stats()
+        self.assertEqual(stats["contracts"], 3)
+        self.assertEqual(stats["metadata_dicts"], 3)
+        self.assertLess(stats["stored_chars"], stats["chunk_chars"])
+
+    def test_search_results_match_in_memory_docstore(self):
+        compact, plain = self._engine(True), self._engine(False)
+        for engine in (compact, plain):
+            for i in range(3):
+                engine.index_documents(_contract_text(i), f"c{i}.pdf", {"contract_id": f"c{i}"})
+        for query in ("payment terms", "termination notice", "governing law"):
+            self.assertEqual(
+                [(d.page_content, d.metadata) for d in compact.search(query, k=4)],
+                [(d.page_content, d.metadata) for d in plain.search(query, k=4)],
+            )
+        filtered = compact.search("payment", filter={"contract_id": "c1"})
+        self.assertTrue(filtered and all(d.metadata["contract_id"] == "c1" for d in filtered))
+
+    def test_metadata_is_copied(self):
+        docstore = CompactDocstore()
+        docstore.add({"a": Document(page_content="one", metadata={"contract_id": "x"})})
+        docstore.search("a").metadata["contract_id"] = "changed"
+        self.assertEqual(docstore.search("a").metadata, {"contract_id": "x"})
+        self.assertEqual(docstore.search("missing"), "ID missing not found.")
+        with self.assertRaises(ValueError):
+            docstore.add({"a": Document(page_content="again")})
+
+    def test_delete_and_re_add(self):
+        engine = self._engine()
+        engine.index_documents(_contract_text(1), "a.pdf", {"contract_id": "a"})
+        engine.index_documents(_contract_text(2), "b.pdf", {"contract_id": "b"})
+        removed = engine.delete_contracts({"a"})
+        self.assertGreater(removed, 0)
+        docstore = engine.vector_store.docstore
+        self.assertEqual(docstore.stats()["contracts"], 1)
+        self.assertEqual({d.metadata["contract_id"] for d in engine.search("payment", k=10)}, {"b"})
+
+        # Same contract ID indexed again, e.g. a modified file
+        engine.index_documents("Replacement text about payment.", "a.pdf", {"contract_id": "a"})
+        docs = engine.search("replacement payment", k=1, filter={"contract_id": "a"})
+        self.assertEqual(docs[0].page_content, "Replacement text about payment.")
+
+    def test_pickle_and_merge(self):
+        first, second = self._engine(), self._engine()
+        first.index_documents(_contract_text(1), "a.pdf", {"contract_id": "a"})
+        second.index_documents(_contract_text(2), "b.pdf", {"contract_id": "b"})
+        docstore = pickle.loads(pickle.dumps(first.vector_store.docstore))
+        doc_id = first.vector_store.index_to_docstore_id[0]
+        self.assertEqual(docstore.search(doc_id), first.vector_store.docstore.search(doc_id))
+
+        first.vector_store.merge_from(second.vector_store)
+        self.assertEqual(len(first.vector_store.docstore), len(first.vector_store.index_to_docstore_id))
+        self.assertEqual({d.metadata["contract_id"] for d in first.search("payment", k=20)}, {"a", "b"})
+
+if __name__ == "__main__":
+    unittest.main()
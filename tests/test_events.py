@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from api.events import AwaitableEvent, EventBroker, format_sse
+from api.server import app, state, events, _update_task
+
+class TestEventBroker(unittest.TestCase):
+    def test_publish_reaches_subscriber(self):
+        async def run():
+            broker = EventBroker()
+            queue, backlog = broker.subscribe()
+            self.assertEqual(backlog, [])
+            broker.publish("contract", {"id": "c1", "status": "processing"})
+            event = await asyncio.wait_for(queue.get(), timeout=1)
+            broker.unsubscribe(queue)
+            return event, broker.subscriber_count
+        event, count = asyncio.run(run())
+        self.assertEqual(event["data"]["id"], "c1")
+        self.assertEqual(count, 0)
+
+    def test_backlog_after_last_event_id(self):
+        async def run():
+            broker = EventBroker(history=10)
+            first = broker.publish("contract", {"id": "a"})
+            broker.publish("contract", {"id": "b"})
+            return broker.subscribe(first)[1]
+        backlog = asyncio.run(run())
+        self.assertEqual([e["data"]["id"] for e in backlog], ["b"])
+
+    def test_reset_when_history_exceeded(self):
+        async def run():
+            broker = EventBroker(history=2)
+            for i in range(5):
+                broker.publish("contract", {"id": str(i)})
+            return broker.subscribe(1)[1]
+        backlog = asyncio.run(run())
+        self.assertEqual([e["type"] for e in backlog], ["reset"])
+
+    def test_slow_subscriber_gets_reset(self):
+        async def run():
+            broker = EventBroker(queue_size=2)
+            queue, _ = broker.subscribe()
+            for i in range(3):
+                broker.publish("contract", {"id": str(i)})
+            await asyncio.sleep(0)
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+        received = asyncio.run(run())
+        self.assertEqual(received[-1]["type"], "reset")
+
+    def test_format_sse(self):
+        text = format_sse({"id": 7, "type": "contract", "data": {"id": "c1"}})
+        self.assertEqual(text, 'id: 7\nevent: contract\ndata: {"id": "c1"}\n\n')
+
+class TestAwaitableEvent(unittest.TestCase):
+    def test_waiters_hold_no_threads(self):
+        event = AwaitableEvent()
+
+        async def main():
+            threads = threading.active_count()
+            waiters = [asyncio.ensure_future(event.wait_async(timeout=5)) for _ in range(100)]
+            await asyncio.sleep(0.05)
+            self.assertEqual(threading.active_count(), threads)
+            threading.Timer(0.05, event.set).start()
+            return await asyncio.gather(*waiters)
+
+        self.assertEqual(asyncio.run(main()), [True] * 100)
+        self.assertTrue(event.wait(timeout=0))
+
+    def test_timeout(self):
+        event = AwaitableEvent()
+        self.assertFalse(asyncio.run(event.wait_async(timeout=0.01)))
+        self.assertEqual(event._waiters, {})
+
+class TestServerEvents(unittest.TestCase):
+    def setUp(self):
+        state.processing_files = {}
+
+    def test_task_updates_are_published(self):
+        state.processing_files["c1"] = {"id": "c1", "filename": "a.pdf", "status": "processing"}
+        with patch.object(events, "publish") as mock_publish:
+            _update_task("c1", stage="index")
+        event_type, data = mock_publish.call_args[0]
+        self.assertEqual(event_type, "contract")
+        self.assertEqual(data["stage"], "index")
+        self.assertIsNone(data["metadata"])
+
+    def test_list_includes_progress(self):
+        state.processing_files["c1"] = {"id": "c1", "filename": "a.pdf", "status": "processing", "metadata": None,
+                                        "progress": {"page": 2, "pages": 5}}
+        response = TestClient(app).get("/api/contracts")
+        task = next(c for c in response.json() if c["id"] == "c1")
+        self.assertEqual(task["progress"], {"page": 2, "pages": 5})
+
+if __name__ == '__main__':
+    unittest.main()
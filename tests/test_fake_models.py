@@ -0,0 +1,53 @@
+import time
+import unittest
+import numpy as np
+from rag_engine.hashing_embeddings import HashingEmbeddings
+from rag_engine.vector_store import RAGEngine
+from utils.fake_llm import FakeChatModel
+
+class TestHashingEmbeddings(unittest.TestCase):
+    def test_deterministic_and_normalized(self):
+        embeddings = HashingEmbeddings(size=64)
+        first = embeddings.embed_query("Termination for convenience")
+        self.assertEqual(first, HashingEmbeddings(size=64).embed_query("Termination for convenience"))
+        self.assertEqual(len(first), 64)
+        self.assertAlmostEqual(float(np.linalg.norm(first)), 1.0, places=5)
+
+    def test_related_texts_are_closer(self):
+        embeddings = HashingEmbeddings()
+        renewal, renews, payment = (np.array(v) for v in embeddings.embed_documents([
+            "The agreement renews automatically each year",
+            "Automatic renewal of this agreement every year",
+            "Payment is due within thirty days of invoice",
+        ]))
+        self.assertGreater(renewal @ renews, renewal @ payment)
+
+    def test_retrieval_finds_matching_chunk(self):
+        rag = RAGEngine(embeddings=HashingEmbeddings())
+        rag.index_documents("Payment is due within thirty days.", "a.pdf", metadata={"contract_id": "a"})
+        rag.index_documents("Either party may terminate with ninety days notice.", "b.pdf", metadata={"contract_id": "b"})
+        docs = rag.search("How much notice is needed to terminate?", k=1)
+        self.assertEqual(docs[0].metadata["contract_id"], "b")
+
+class TestFakeChatModel(unittest.TestCase):
+    def test_cycles_responses_with_usage(self):
+        llm = FakeChatModel(responses=["first answer", "second"])
+        self.assertEqual(llm.invoke("hi").content, "first answer")
+        response = llm.invoke("hi")
+        self.assertEqual(response.content, "second")
+        self.assertEqual(response.usage_metadata["output_tokens"], 1)
+
+    def test_latency_profile(self):
+        llm = FakeChatModel(responses=["one two three four"], first_token_latency=0.05, tokens_per_second=100)
+        started = time.perf_counter()
+        llm.invoke("hi")
+        # 50ms to the first token plus 4 tokens at 100/s
+        self.assertGreaterEqual(time.perf_counter() - started, 0.09)
+
+    def test_streaming(self):
+        llm = FakeChatModel(responses=["one two three"])
+        chunks = [chunk.content for chunk in llm.stream("hi")]
+        self.assertEqual("".join(chunks), "one two three")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from utils.llm_client import (
+    TokenBucket, RateLimiter, RateLimitedLLM, LLMClientRegistry,
+    PRIORITY_CHAT, PRIORITY_BACKGROUND, backoff_delay,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class RateLimitError(Exception):
+    status_code = 429
+
+class TestTokenBucket(unittest.TestCase):
+    def test_refill_and_wait_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)  # 1 token per second
+        bucket.take(60)
+        self.assertAlmostEqual(bucket.wait_time(1), 1.0)
+
+        clock.now = 10
+        self.assertEqual(bucket.wait_time(10), 0.0)
+        # Reserve keeps 20% of capacity (12 tokens) back
+        self.assertAlmostEqual(bucket.wait_time(10, reserve=0.2), 12.0)
+
+    def test_disabled_bucket_never_blocks(self):
+        bucket = TokenBucket(0)
+        bucket.take(1000)
+        self.assertEqual(bucket.wait_time(1000), 0.0)
+
+class TestRateLimiter(unittest.TestCase):
+    def test_background_respects_reserve(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=0, background_reserve=0.5, clock=clock)
+        for _ in range(5):
+            limiter.acquire(0, PRIORITY_CHAT)
+        # 5 requests left: chat may proceed, background must leave 5 in reserve
+        self.assertEqual(limiter._wait_time(0, PRIORITY_CHAT), 0.0)
+        self.assertGreater(limiter._wait_time(0, PRIORITY_BACKGROUND), 0.0)
+
+    def test_pause_blocks_everyone(self):
+        clock = FakeClock()
+        limiter = RateLimiter(0, 0, clock=clock)
+        limiter.pause(3)
+        self.assertAlmostEqual(limiter._wait_time(0, PRIORITY_CHAT), 3.0)
+
+class TestRateLimitedLLM(unittest.TestCase):
+    @patch("utils.llm_client.time.sleep")
+    def test_retries_on_rate_limit(self, mock_sleep):
+        inner = MagicMock()
+        response = MagicMock(usage_metadata={"total_tokens": 10})
+        inner.invoke.side_effect = [RateLimitError("slow down"), response]
+
+        llm = RateLimitedLLM(inner, RateLimiter(0, 0), max_retries=2)
+        self.assertIs(llm.invoke("hello"), response)
+        self.assertEqual(inner.invoke.call_count, 2)
+        mock_sleep.assert_called_once()
+
+    @patch("utils.llm_client.time.sleep")
+    def test_does_not_retry_client_errors(self, mock_sleep):
+        inner = MagicMock()
+        error = ValueError("bad request")
+        inner.invoke.side_effect = error
+
+        llm = RateLimitedLLM(inner, RateLimiter(0, 0), max_retries=3)
+        with self.assertRaises(ValueError):
+            llm.invoke("hello")
+        mock_sleep.assert_not_called()
+
+    def test_backoff_honours_retry_after(self):
+        self.assertGreaterEqual(backoff_delay(0, retry_after=5), 5)
+
+class TestRegistry(unittest.TestCase):
+    @patch.object(LLMClientRegistry, "_create_client")
+    def test_client_is_shared(self, mock_create):
+        mock_create.side_effect = lambda key, model: (MagicMock(), MagicMock())
+        registry = LLMClientRegistry()
+        chat = registry.get(PRIORITY_CHAT, api_key="k", model="m")
+        background = registry.get(PRIORITY_BACKGROUND, api_key="k", model="m")
+
+        self.assertIs(chat.llm, background.llm)
+        self.assertEqual(background.priority, PRIORITY_BACKGROUND)
+        mock_create.assert_called_once()
+
+    @patch.object(LLMClientRegistry, "_create_client")
+    def test_retire_other_keys(self, mock_create):
+        http_clients = {}
+        def create(key, model):
+            http_clients[key] = MagicMock()
+            return MagicMock(), http_clients[key]
+        mock_create.side_effect = create
+        registry = LLMClientRegistry()
+        old = registry.get(api_key="old", model="m")
+        idle = registry.get(api_key="idle", model="m")
+        registry.get(api_key="new", model="m")
+
+        calls = []
+        def slow_invoke(messages, **kwargs):
+            # Still running (e.g. backing off between retries) when the key rotates
+            registry.retire_other_keys("new")
+            calls.append(http_clients["old"].close.called)
+            return MagicMock(usage_metadata=None)
+        old.llm.invoke.side_effect = slow_invoke
+
+        old.invoke("hello")
+        # The old pool was closed only once the call on it had finished
+        self.assertEqual(calls, [False])
+        http_clients["old"].close.assert_called_once()
+        http_clients["idle"].close.assert_called_once()
+        http_clients["new"].close.assert_not_called()
+        self.assertIsNot(registry.get(api_key="old", model="m").llm, old.llm)
+        self.assertTrue(idle.pool.retired)
+
+if __name__ == '__main__':
+    unittest.main()
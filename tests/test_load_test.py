@@ -0,0 +1,39 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.load_test import parse_mix, run_load_test, summary, OperationStats
+
+class TestLoadTest(unittest.TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("upload=1, chat=6"), {"upload": 1.0, "chat": 6.0})
+        self.assertEqual(parse_mix("contracts"), {"contracts": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("delete=1")
+        with self.assertRaises(ValueError):
+            parse_mix("chat=0")
+
+    def test_operation_stats(self):
+        stats = OperationStats()
+        stats.record(200, 0.01, ok=True)
+        stats.record(429, 0.02, ok=False)
+        report = stats.as_dict(elapsed=1.0)
+        self.assertEqual(report["requests"], 2)
+        self.assertEqual(report["error_rate"], 0.5)
+        self.assertEqual(report["status_codes"], {"200": 1, "429": 1})
+
+    def test_against_mock_server(self):
+        report = run_load_test(levels=(2,), duration=1.0, pages=1, distinct_files=2, drain_timeout=20)
+        self.assertEqual(report["meta"]["server_mode"], "mock")
+        level = report["levels"][0]
+        self.assertGreater(level["requests"], 0)
+        self.assertEqual(level["error_rate"], 0.0)
+        ingestion = level["ingestion"]
+        self.assertEqual(ingestion["processed"], ingestion["accepted"])
+        self.assertEqual(ingestion["unfinished"], 0)
+        self.assertEqual(len(summary(report)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import json
+import logging
+import os
+import queue
+import sys
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+from utils.logger import JsonFormatter, request_id, _ContextFilter, _NonBlockingQueueHandler
+from ingestion.work_queue import IngestionQueue
+
+def _record(level=logging.INFO, msg="processed %s", args=("a.pdf",), **extra):
+    record = logging.LogRecord("test.logger", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+class TestLogging(unittest.TestCase):
+    def test_json_format_with_request_id_and_extra(self):
+        record = _record(contract_id="c-1")
+        token = request_id.set("req-1")
+        try:
+            _ContextFilter().filter(record)
+        finally:
+            request_id.reset(token)
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["message"], "processed a.pdf")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["request_id"], "req-1")
+        self.assertEqual(entry["contract_id"], "c-1")
+
+    def test_sampling_is_per_request_and_keeps_warnings(self):
+        drop_all = _ContextFilter(sample_rate=0.0)
+        token = request_id.set("req-2")
+        try:
+            self.assertFalse(drop_all.filter(_record()))
+            self.assertTrue(drop_all.filter(_record(level=logging.WARNING)))
+            keep_half = _ContextFilter(sample_rate=0.5)
+            # The same request always gets the same decision
+            self.assertEqual(len({keep_half.filter(_record()) for _ in range(10)}), 1)
+        finally:
+            request_id.reset(token)
+        # Lines outside a request are never sampled away
+        self.assertTrue(drop_all.filter(_record()))
+
+    def test_queue_handler_never_blocks(self):
+        handler = _NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(_record())
+        handler.handle(_record())
+        self.assertEqual(handler.dropped, 1)
+        queued = handler.queue.get_nowait()
+        self.assertEqual((queued.msg, queued.args), ("processed a.pdf", None))
+
+    def test_ingestion_job_inherits_request_id(self):
+        seen = []
+        work = IngestionQueue(workers=1, max_depth=5)
+        token = request_id.set("upload-req")
+        try:
+            work.submit("job", 1, lambda: seen.append(request_id.get()))
+        finally:
+            request_id.reset(token)
+        self.assertTrue(work.wait_idle(timeout=5))
+        self.assertEqual(seen, ["upload-req"])
+
+    def test_request_id_header(self):
+        from api.server import app, state, warm_up_done
+        client = TestClient(app)
+        with client:
+            warm_up_done.wait(timeout=30)
+            seen = []
+            original = state.chat_engine.process_query
+            state.chat_engine.process_query = MagicMock(side_effect=lambda *a, **k: seen.append(request_id.get()) or {"answer": "ok", "source_documents": []})
+            try:
+                response = client.post("/api/chat", json={"query": "Hello"}, headers={"X-Request-ID": "trace-42"})
+            finally:
+                state.chat_engine.process_query = original
+            self.assertEqual(response.headers["X-Request-ID"], "trace-42")
+            self.assertEqual(seen, ["trace-42"])
+            generated = client.get("/healthz", headers={"X-Request-ID": "bad id with spaces"}).headers["X-Request-ID"]
+            self.assertRegex(generated, r"^[0-9a-f]{16}$")
+
+if __name__ == '__main__':
+    unittest.main()
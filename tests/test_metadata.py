@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock
 from metadata_extractor.extractor import MetadataExtractor, ContractMetadata
+from metadata_extractor.rules import RuleBasedExtractor
 
 class TestMetadata(unittest.TestCase):
     def test_extraction(self):
@@ -26,6 +27,78 @@ class TestMetadata(unittest.TestCase):
         self.assertEqual(metadata.title, "Service Agreement")
         self.assertEqual(metadata.vendor, "Acme Inc")
         self.assertEqual(metadata.start_date, "2023-01-01")
+        self.assertEqual(metadata.field_sources["vendor"], "llm")
+
+    def test_rules_fill_fields_before_llm(self):
+        text = """Enterprise Software License
+        Vendor: SoftWareHouse Ltd.
+        Client: Global Corp
+        Contract Start Date: June 1, 2024
+        Contract End Date: 2025-05-31
+        Contract No: SWH-2024-001
+        """
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value.content = '{"renewal_terms": "Renews yearly", "vendor": "Wrong Vendor"}'
+
+        extractor = MetadataExtractor(llm=mock_llm)
+        metadata = extractor.extract(text)
+
+        self.assertEqual(metadata.title, "Enterprise Software License")
+        self.assertEqual(metadata.vendor, "SoftWareHouse Ltd.")
+        self.assertEqual(metadata.start_date, "2024-06-01")
+        self.assertEqual(metadata.contract_id, "SWH-2024-001")
+        self.assertEqual(metadata.renewal_terms, "Renews yearly")
+        self.assertEqual(metadata.field_sources["vendor"], "rules")
+        self.assertEqual(metadata.field_sources["renewal_terms"], "llm")
+
+        # The LLM is only asked for the missing field
+        prompt = mock_llm.invoke.call_args[0][0][1].content
+        self.assertIn("renewal_terms", prompt)
+        self.assertNotIn("start_date", prompt)
+
+    def test_contract_id_ignores_prose(self):
+        rules = RuleBasedExtractor()
+        for text in (
+            "This agreement notwithstanding any prior understanding governs the services.",
+            "The contract noted above remains in force.",
+            "Agreement number of copies: see annex.",
+        ):
+            self.assertNotIn("contract_id", rules.extract(text), text)
+        self.assertEqual(rules.extract("Contract ID: ACME-XYZ")["contract_id"], "ACME-XYZ")
+        self.assertEqual(rules.extract("Agreement No. 2024/17 between the parties")["contract_id"], "2024/17")
+        self.assertEqual(rules.extract("Contract # 88123")["contract_id"], "88123")
+
+    def test_rules_only_without_llm(self):
+        text = "IT Service Agreement\nVendor: TechSolutions Inc.\nThis agreement shall automatically renew for one-year terms."
+        metadata = MetadataExtractor(use_llm=False).extract(text)
+
+        self.assertEqual(metadata.vendor, "TechSolutions Inc.")
+        self.assertIn("automatically renew", metadata.renewal_terms)
+        self.assertIsNone(metadata.end_date)
+
+    def test_long_contract_uses_retrieved_chunks(self):
+        from langchain_core.documents import Document
+
+        tail = "Either party may extend this agreement by mutual consent for two further years."
+        text = "Master Services Agreement\n" + ("Boilerplate clause text. " * 2000) + tail
+
+        mock_rag = MagicMock()
+        mock_rag.is_empty = False
+        mock_rag.embed_queries.side_effect = lambda queries: [[0.1]] * len(queries)
+        mock_rag.search_by_vector.return_value = [Document(page_content=tail, metadata={"contract_id": "c1"})]
+
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value.content = '{"renewal_terms": "Extendable by two years by mutual consent"}'
+
+        extractor = MetadataExtractor(llm=mock_llm)
+        metadata = extractor.extract(text, rag_engine=mock_rag, contract_id="c1")
+
+        self.assertEqual(metadata.renewal_terms, "Extendable by two years by mutual consent")
+        mock_rag.search_by_vector.assert_called_with([0.1], k=2, filter={"contract_id": "c1"})
+
+        prompt = mock_llm.invoke.call_args[0][0][1].content
+        self.assertIn(tail, prompt)
+        self.assertLess(len(prompt), 10000)
 
 if __name__ == '__main__':
     unittest.main()
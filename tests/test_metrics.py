@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.metrics import MetricsRegistry, observe_llm, LLM_TOKENS, LLM_SECONDS
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("test_seconds", "Test latency", labels=("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, stage="split")
+        text = self.registry.render()
+        self.assertIn("# TYPE test_seconds histogram", text)
+        self.assertIn('test_seconds_bucket{stage="split",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{stage="split",le="1"} 3', text)
+        self.assertIn('test_seconds_bucket{stage="split",le="+Inf"} 4', text)
+        self.assertIn('test_seconds_count{stage="split"} 4', text)
+        self.assertIn('test_seconds_sum{stage="split"} 6.05', text)
+
+    def test_counters_and_callback_gauges(self):
+        counter = self.registry.counter("test_total", "Things", labels=("result",))
+        counter.inc(result="new")
+        counter.inc(2, result="new")
+        self.registry.gauge("test_depth", "Depth", fn=lambda: 7)
+        self.registry.gauge("test_broken", "Broken", fn=lambda: 1 / 0)
+        text = self.registry.render()
+        self.assertIn('test_total{result="new"} 3', text)
+        self.assertIn("test_depth 7", text)
+        # A failing callback is left out instead of failing the scrape
+        self.assertNotIn("test_broken", text)
+
+    def test_observe_llm_counts_tokens(self):
+        key = ("test-priority", "completion")
+        before = LLM_TOKENS._values.get(key, 0)
+        with observe_llm("test-priority") as call:
+            call.record(SimpleNamespace(usage_metadata={"input_tokens": 10, "output_tokens": 4}))
+        self.assertEqual(LLM_TOKENS._values[key] - before, 4)
+
+        with self.assertRaises(RuntimeError):
+            with observe_llm("test-priority"):
+                raise RuntimeError("boom")
+        self.assertIn(("test-priority", "error"), LLM_SECONDS._series)
+
+if __name__ == '__main__':
+    unittest.main()
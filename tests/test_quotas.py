@@ -0,0 +1,106 @@
+import unittest
+from api.quotas import QuotaManager, QuotaExceeded, KeyLimits, key_id, CHAT, UPLOAD
+
+class TestQuotaManager(unittest.TestCase):
+    def test_rate_limit(self):
+        quotas = QuotaManager(KeyLimits(chat_per_minute=2))
+        quotas.admit("a", CHAT).release()
+        quotas.admit("a", CHAT).release()
+        with self.assertRaises(QuotaExceeded) as ctx:
+            quotas.admit("a", CHAT)
+        self.assertEqual(ctx.exception.reason, "rate")
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+        # Other callers and other kinds have their own buckets
+        quotas.admit("b", CHAT)
+        quotas.admit("a", UPLOAD)
+        self.assertEqual(quotas.snapshot("a")["counters"][CHAT]["rejected_rate"], 1)
+
+    def test_concurrency_cap(self):
+        quotas = QuotaManager(KeyLimits(max_concurrent_uploads=1))
+        lease = quotas.admit("a", UPLOAD)
+        with self.assertRaises(QuotaExceeded) as ctx:
+            quotas.admit("a", UPLOAD, retry_after=7)
+        self.assertEqual(ctx.exception.retry_after, 7)
+        lease.release()
+        lease.release()
+        self.assertEqual(quotas.snapshot("a")["in_flight"][UPLOAD], 0)
+        quotas.admit("a", UPLOAD)
+
+    def test_quota_counts_down(self):
+        quotas = QuotaManager(KeyLimits())
+        quotas.update("a", chat_quota=3)
+        quotas.admit("a", CHAT, cost=2)
+        with self.assertRaises(QuotaExceeded) as ctx:
+            quotas.admit("a", CHAT, cost=2)
+        self.assertEqual(ctx.exception.reason, "quota")
+        quotas.admit("a", CHAT)
+        self.assertEqual(quotas.snapshot("a")["limits"]["chat_quota"], 0)
+        # Negative removes the quota
+        quotas.update("a", chat_quota=-1)
+        quotas.admit("a", CHAT, cost=100)
+
+    def test_update_and_reset(self):
+        quotas = QuotaManager(KeyLimits(chat_per_minute=1, max_concurrent_chats=1))
+        quotas.admit("a", CHAT).release()
+        self.assertRaises(QuotaExceeded, quotas.admit, "a", CHAT)
+        snapshot = quotas.update("a", chat_per_minute=0, max_concurrent_chats=None, reset_counters=True)
+        self.assertEqual(snapshot["limits"]["chat_per_minute"], 0)
+        self.assertEqual(snapshot["limits"]["max_concurrent_chats"], 1)
+        self.assertEqual(snapshot["counters"][CHAT]["requests"], 0)
+        for _ in range(10):
+            quotas.admit("a", CHAT).release()
+        # Defaults of other callers are unchanged
+        self.assertEqual(quotas.snapshot("b")["limits"]["chat_per_minute"], 1)
+
+    def test_unlimited_identity(self):
+        quotas = QuotaManager(KeyLimits(chat_per_minute=1, max_concurrent_chats=1))
+        quotas.unlimited.add("admin")
+        for _ in range(5):
+            quotas.admit("admin", CHAT)
+
+    def test_cost_above_capacity_is_rejected(self):
+        quotas = QuotaManager(KeyLimits(chat_per_minute=10))
+        with self.assertRaises(QuotaExceeded) as ctx:
+            quotas.admit("a", CHAT, cost=5000)
+        self.assertEqual(ctx.exception.reason, "size")
+        # Nothing was taken
+        quotas.admit("a", CHAT, cost=10)
+
+    def test_rejected_admission_costs_nothing(self):
+        quotas = QuotaManager(KeyLimits(max_concurrent_uploads=1))
+        quotas.update("a", upload_quota=3)
+        lease = quotas.admit("a", UPLOAD)
+        for _ in range(3):
+            with self.assertRaises(QuotaExceeded) as ctx:
+                quotas.admit("a", UPLOAD)
+            self.assertEqual(ctx.exception.reason, "concurrency")
+        self.assertEqual(quotas.snapshot("a")["limits"]["upload_quota"], 2)
+        # A request rejected after admission (duplicate, queue full) gets its charge back
+        lease.cancel()
+        self.assertEqual(quotas.snapshot("a")["limits"]["upload_quota"], 3)
+        self.assertEqual(quotas.snapshot("a")["in_flight"][UPLOAD], 0)
+
+        lease = quotas.admit("a", UPLOAD, cost=3)
+        lease.refund(2)
+        lease.release()
+        self.assertEqual(quotas.snapshot("a")["limits"]["upload_quota"], 2)
+
+    def test_idle_callers_are_forgotten(self):
+        now = [0.0]
+        quotas = QuotaManager(KeyLimits(chat_per_minute=1), idle_seconds=600, clock=lambda: now[0])
+        quotas.admit("anon-1", CHAT).release()
+        quotas.update("key-custom", chat_per_minute=5)
+        busy = quotas.admit("anon-2", CHAT)
+        now[0] = 700
+        quotas.admit("anon-3", CHAT)
+        identities = {s["key_id"] for s in quotas.snapshots()}
+        self.assertEqual(identities, {"key-custom", "anon-2", "anon-3"})
+        busy.release()
+
+    def test_key_id_hides_key(self):
+        self.assertTrue(key_id("secret").startswith("key-"))
+        self.assertNotIn("secret", key_id("secret"))
+        self.assertEqual(key_id("secret"), key_id("secret"))
+
+if __name__ == "__main__":
+    unittest.main()
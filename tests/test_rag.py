@@ -32,5 +32,27 @@ class TestRAG(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertIn("Acme Corp", results[0].page_content)
 
+    def test_contract_scoped_search_on_a_large_index(self):
+        from rag_engine.hashing_embeddings import HashingEmbeddings
+        rag = RAGEngine(embeddings=HashingEmbeddings(size=64))
+        for i in range(40):
+            rag.index_documents(f"Payment terms: invoices are payable within {i} days.", f"c{i}.pdf", {"contract_id": f"c{i}"})
+        rag.index_documents("Renewal notice periods.\n\n" * 3 + "Payment is made in kind.", "long.pdf", {"contract_id": "long"})
+        # The long contract's chunks are not among the global top 20 for this query
+        self.assertNotIn("long", {d.metadata["contract_id"] for d in rag.search("payment terms invoices", k=20)})
+
+        docs = rag.search("payment terms invoices", k=2, filter={"contract_id": "long"})
+        self.assertEqual(len(docs), 1)
+        self.assertEqual(docs[0].metadata["contract_id"], "long")
+        vector = rag.embed_queries(["payment terms invoices"])[0]
+        self.assertEqual(rag.search_by_vector(vector, k=2, filter={"contract_id": {"$in": ["long", "c3"]}})[0].metadata["contract_id"], "c3")
+        # Other filter keys still apply
+        self.assertEqual(rag.search("payment", filter={"contract_id": "long", "source": "other.pdf"}), [])
+
+        # Positions follow deletes and re-adds
+        rag.delete_contracts({"c3"})
+        rag.index_documents("Payment terms for the replacement.", "c3.pdf", {"contract_id": "c3"})
+        self.assertEqual(rag.search("payment", k=5, filter={"contract_id": "c3"})[0].page_content, "Payment terms for the replacement.")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from chat_engine.router import QueryRouter
+from metadata_extractor.extractor import ContractMetadata
+
+def make_store():
+    return [
+        {
+            "id": "c1",
+            "filename": "vendor_service_agreement.pdf",
+            "status": "processed",
+            "metadata": ContractMetadata(
+                title="IT Service Agreement",
+                vendor="TechSolutions Inc.",
+                client="Global Corp",
+                start_date="2023-01-01",
+                end_date="2025-12-31",
+                renewal_terms="Auto-renews yearly unless 60 days notice is given",
+            ),
+        },
+        {
+            "id": "c2",
+            "filename": "software_license.pdf",
+            "status": "processed",
+            "metadata": ContractMetadata(
+                title="Enterprise Software License",
+                vendor="SoftWareHouse Ltd.",
+                client="Global Corp",
+                start_date="2024-06-01",
+                end_date="2025-05-31",
+            ),
+        },
+    ]
+
+class TestQueryRouter(unittest.TestCase):
+    def setUp(self):
+        self.store = make_store()
+        self.router = QueryRouter(lambda: self.store)
+
+    def test_field_lookup_by_vendor_name(self):
+        result = self.router.route("When does the SoftWareHouse license expire?")
+        self.assertIsNotNone(result)
+        self.assertIn("2025-05-31", result["answer"])
+        self.assertEqual(result["source_documents"][0].metadata["source"], "software_license.pdf")
+
+    def test_field_lookup_by_contract_id(self):
+        result = self.router.route("Who is the vendor?", contract_id="c1")
+        self.assertIn("TechSolutions Inc.", result["answer"])
+
+    def test_list_filter_by_year(self):
+        result = self.router.route("Which contracts expire in 2025?")
+        self.assertIn("Found 2 matching contracts", result["answer"])
+
+        result = self.router.route("Which contracts expire before 2025-06-01?")
+        self.assertIn("Found 1 matching contracts", result["answer"])
+        self.assertIn("software_license.pdf", result["answer"])
+
+    def test_date_filters_compare_dates(self):
+        self.store.append({
+            "id": "c3", "filename": "lease.pdf", "status": "processed",
+            "metadata": ContractMetadata(title="Office Lease", vendor="Landlord LLC", end_date="2026-03-31"),
+        })
+        # A bare year after "after" means from the next year on, so contracts ending during 2025 are out
+        result = self.router.route("Which contracts expire after 2025?")
+        self.assertIn("Found 1 matching contracts", result["answer"])
+        self.assertIn("lease.pdf", result["answer"])
+        result = self.router.route("Which contracts expire since 2025?")
+        self.assertIn("Found 3 matching contracts", result["answer"])
+
+        # ...and after "before", up to the end of the previous year
+        result = self.router.route("Which contracts expire before 2026?")
+        self.assertIn("Found 2 matching contracts", result["answer"])
+        self.assertNotIn("lease.pdf", result["answer"])
+        self.assertIn("No contracts match", self.router.route("Which contracts expire before 2025?")["answer"])
+        result = self.router.route("Which contracts expire by 2025?")
+        self.assertIn("Found 2 matching contracts", result["answer"])
+
+        result = self.router.route("Which contracts expire after 2025-05-31?")
+        self.assertIn("Found 2 matching contracts", result["answer"])
+        self.assertNotIn("software_license.pdf", result["answer"])
+
+    def test_count(self):
+        result = self.router.route("How many contracts are there?")
+        self.assertEqual(result["answer"], "There are 2 matching contracts.")
+
+    def test_falls_back_to_rag(self):
+        # No field, clause reasoning, ambiguous contract and missing value
+        self.assertIsNone(self.router.route("Hello"))
+        self.assertIsNone(self.router.route("What is the termination clause of the TechSolutions contract?"))
+        self.assertIsNone(self.router.route("When does the Global Corp contract expire?"))
+        self.assertIsNone(self.router.route("What are the renewal terms?", contract_id="c2"))
+        self.assertIsNone(self.router.route("When does it expire?", contract_id="unknown"))
+
+    def test_content_questions_about_contracts_fall_back_to_rag(self):
+        self.assertIsNone(self.router.route("What contracts mention confidentiality?"))
+        self.assertIsNone(self.router.route("Which contracts did we sign with Acme?"))
+        self.assertIsNone(self.router.route("Show contracts that cover data protection"))
+        self.assertIsNone(self.router.route("Which contracts were signed in 2024?"))
+        self.assertIsNone(self.router.route("What happens when the TechSolutions contract ends?"))
+        self.assertIsNone(self.router.route("When does work on the SoftWareHouse license begin?"))
+
+    def test_explicit_list_all(self):
+        self.assertIn("Found 2 matching contracts", self.router.route("List all contracts")["answer"])
+        self.assertIn("Found 2 matching contracts", self.router.route("What contracts do we have?")["answer"])
+        self.assertEqual(self.router.route("How many contracts do we have?")["answer"], "There are 2 matching contracts.")
+
+    def test_client_filter(self):
+        result = self.router.route("Which contracts have the client Global Corp?")
+        self.assertIn("Found 2 matching contracts", result["answer"])
+
+    def test_empty_store(self):
+        router = QueryRouter(lambda: [])
+        self.assertIsNone(router.route("Which contracts expire in 2025?"))
+
+if __name__ == '__main__':
+    unittest.main()
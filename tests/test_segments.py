@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+from langchain_community.embeddings import FakeEmbeddings
+from rag_engine.segments import SegmentStore
+from rag_engine.vector_store import RAGEngine
+from api.server import state, reload_shared_index
+
+def build_segment(embeddings, contract_id):
+    engine = RAGEngine(embeddings=embeddings)
+    engine.index_documents(f"Text of {contract_id}", f"{contract_id}.pdf", metadata={"contract_id": contract_id})
+    return engine.vector_store
+
+class TestSegmentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.embeddings = FakeEmbeddings(size=32)
+        self.now = 1000.0
+        self.store = SegmentStore(self.tmp, retire_seconds=300, clock=lambda: self.now)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_publish_and_search_across_segments(self):
+        self.assertEqual(self.store.version, 0)
+        for contract_id in ("a", "b"):
+            self.store.publish(build_segment(self.embeddings, contract_id), [{"id": contract_id}])
+        manifest = self.store.read_manifest()
+        self.assertEqual(manifest["version"], 2)
+
+        rag = RAGEngine(embeddings=self.embeddings)
+        rag.set_segments([self.store.load(name, self.embeddings)[0] for name in manifest["segments"]])
+        self.assertFalse(rag.is_empty)
+        self.assertEqual(len(rag.search("text", k=5)), 2)
+        docs = rag.search("text", k=5, filter={"contract_id": "b"})
+        self.assertEqual([d.metadata["contract_id"] for d in docs], ["b"])
+
+    def test_compact_merges_segments(self):
+        for contract_id in ("a", "b", "c"):
+            self.store.publish(build_segment(self.embeddings, contract_id), [{"id": contract_id}])
+        self.assertIsNone(self.store.compact(self.embeddings, max_segments=3))
+        self.assertEqual(self.store.compact(self.embeddings, max_segments=1), 4)
+
+        manifest = self.store.read_manifest()
+        self.assertEqual(len(manifest["segments"]), 1)
+        vector_store, contracts = self.store.load(manifest["segments"][0], self.embeddings)
+        self.assertEqual([c["id"] for c in contracts], ["a", "b", "c"])
+        self.assertEqual(vector_store.index.ntotal, 3)
+
+    def test_compaction_retires_segments_for_a_grace_period(self):
+        for contract_id in ("a", "b"):
+            self.store.publish(build_segment(self.embeddings, contract_id), [{"id": contract_id}])
+        old = self.store.read_manifest()["segments"]
+        self.store.compact(self.embeddings, max_segments=1)
+        # Workers still mapping the old segments can keep reading them
+        for name in old:
+            self.assertTrue(os.path.isdir(os.path.join(self.tmp, "segments", name)))
+            self.store.load(name, self.embeddings)
+
+        self.now += 299
+        self.store.publish(build_segment(self.embeddings, "c"), [{"id": "c"}])
+        self.assertEqual(len(self.store.read_manifest()["retired"]), 2)
+        self.now += 1
+        self.store.publish(build_segment(self.embeddings, "d"), [{"id": "d"}])
+        self.assertEqual(self.store.read_manifest()["retired"], [])
+        for name in old:
+            self.assertFalse(os.path.exists(os.path.join(self.tmp, "segments", name)))
+
+    def test_compaction_keeps_segments_published_during_the_merge(self):
+        for contract_id in ("a", "b"):
+            self.store.publish(build_segment(self.embeddings, contract_id), [{"id": contract_id}])
+        merge = self.store._merge
+
+        def merge_while_publishing(segments, embeddings):
+            self.store.publish(build_segment(self.embeddings, "c"), [{"id": "c"}])
+            # Only one process compacts at a time
+            self.assertIsNone(SegmentStore(self.tmp).compact(self.embeddings, max_segments=1))
+            return merge(segments, embeddings)
+
+        self.store._merge = merge_while_publishing
+        self.assertEqual(self.store.compact(self.embeddings, max_segments=1), 4)
+        segments = self.store.read_manifest()["segments"]
+        self.assertEqual(len(segments), 2)
+        self.assertEqual([c["id"] for name in segments for c in self.store.load(name, self.embeddings)[1]], ["a", "b", "c"])
+
+class TestSharedIndexReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.embeddings = FakeEmbeddings(size=32)
+        self.saved = (state.rag_engine, state.metadata_store, state.segment_store, state.index_version, state.loaded_segments)
+        state.rag_engine = RAGEngine(embeddings=self.embeddings)
+        state.metadata_store = []
+        state.segment_store = SegmentStore(self.tmp)
+        state.index_version = 0
+        state.loaded_segments = {}
+
+    def tearDown(self):
+        (state.rag_engine, state.metadata_store, state.segment_store, state.index_version, state.loaded_segments) = self.saved
+        shutil.rmtree(self.tmp)
+
+    def test_reload_picks_up_other_workers_segments(self):
+        # Another worker process publishes a contract
+        other = SegmentStore(self.tmp)
+        other.publish(build_segment(self.embeddings, "a"), [{"id": "a", "filename": "a.pdf", "metadata": {"vendor": "Acme"}}])
+
+        self.assertTrue(reload_shared_index())
+        self.assertFalse(reload_shared_index())
+        self.assertEqual(state.metadata_store[0]["metadata"].vendor, "Acme")
+        self.assertEqual(len(state.rag_engine.search("text", filter={"contract_id": "a"})), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -38,7 +38,7 @@ class TestSelection(unittest.TestCase):
         # Reset state
         state.rag_engine.vector_store = None
         state.metadata_store = []
-        state.processed_files = set()
+        state.content_hashes = {}
         state.processing_files = {}
         # Reset mocks
         mock_vectorstore.reset_mock()
@@ -51,14 +51,16 @@ class TestSelection(unittest.TestCase):
         # 1. Setup RAG engine with a mocked vector store
         state.rag_engine.vector_store = mock_vectorstore
 
-        # 2. Chat with contract_id
+        # 2. Chat with contract_id (contract-scoped searches rank only that contract's
+        # positions in the index rather than calling similarity_search)
         contract_id = "12345"
-        response = client.post("/api/chat", json={"query": "What is this?", "contract_id": contract_id})
+        with patch.object(state.rag_engine, "search", return_value=mock_vectorstore.similarity_search.return_value) as search:
+            response = client.post("/api/chat", json={"query": "What is this?", "contract_id": contract_id})
 
         self.assertEqual(response.status_code, 200)
 
         # Verify that search was called with the correct filter
-        mock_vectorstore.similarity_search.assert_called_with("What is this?", k=3, filter={"contract_id": contract_id})
+        search.assert_called_with("What is this?", filter={"contract_id": contract_id})
 
     def test_chat_no_filtering(self):
         # 1. Setup RAG engine with a mocked vector store
@@ -10,7 +10,7 @@ class TestUploadFailure(unittest.TestCase):
         # Reset state
         state.rag_engine.vector_store = None
         state.metadata_store = []
-        state.processed_files = set()
+        state.content_hashes = {}
         state.processing_files = {}
 
         # Use Fake Embeddings
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from create_samples import create_generated_contract, generate_contract_spec
+from ingestion.watcher import DirectoryWatcher, FileManifest, file_hash
+from rag_engine.contract_index import ContractIndex
+from rag_engine.hashing_embeddings import HashingEmbeddings
+
+def _write_contract(path: str, index: int):
+    create_generated_contract(path, generate_contract_spec(index, seed=3))
+
+class TestFileManifest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_diff(self):
+        with open(os.path.join(self.dir, "a.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4 a")
+        with open(os.path.join(self.dir, "notes.txt"), "w") as f:
+            f.write("ignored")
+        manifest = FileManifest()
+        self.assertEqual(manifest.diff(self.dir), (["a.pdf"], []))
+
+        stat = os.stat(os.path.join(self.dir, "a.pdf"))
+        manifest.entries = {
+            "a.pdf": {"mtime": stat.st_mtime - 10, "size": stat.st_size, "sha256": file_hash(os.path.join(self.dir, "a.pdf"))},
+            "gone.pdf": {"mtime": 0, "size": 1, "sha256": "x"},
+        }
+        # Touched but identical: only re-stamped
+        self.assertEqual(manifest.diff(self.dir), ([], ["gone.pdf"]))
+        self.assertEqual(manifest.entries["a.pdf"]["mtime"], stat.st_mtime)
+
+class TestDirectorySync(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.state = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        shutil.rmtree(self.state, ignore_errors=True)
+
+    def _index(self, **kwargs) -> ContractIndex:
+        return ContractIndex(shared_dir="", index_dir="", sample_dir=self.dir, embeddings=HashingEmbeddings(size=64),
+                             watch=False, **kwargs)
+
+    def test_incremental_sync(self):
+        _write_contract(os.path.join(self.dir, "a.pdf"), 1)
+        _write_contract(os.path.join(self.dir, "b.pdf"), 2)
+        index = self._index()
+        self.assertEqual([c["id"] for c in index.list_contracts()], ["a.pdf", "b.pdf"])
+        self.assertEqual(index.sync(), (0, 0))
+
+        _write_contract(os.path.join(self.dir, "b.pdf"), 3)
+        os.utime(os.path.join(self.dir, "b.pdf"), (time.time() + 5, time.time() + 5))
+        os.remove(os.path.join(self.dir, "a.pdf"))
+        self.assertEqual(index.sync(), (1, 1))
+        self.assertEqual([c["id"] for c in index.list_contracts()], ["b.pdf"])
+        sources = {d.metadata["source"] for d in index.get_engine().search("contract payment", k=20)}
+        self.assertEqual(sources, {"b.pdf"})
+        # The old version of b.pdf was replaced, not added alongside
+        chunks = index._manifest.entries["b.pdf"]["chunks"]
+        self.assertEqual(len(index.engine.vector_store.docstore), chunks)
+
+    def test_failed_file_is_not_retried_until_changed(self):
+        with open(os.path.join(self.dir, "broken.pdf"), "wb") as f:
+            f.write(b"not a pdf")
+        index = self._index()
+        self.assertEqual(index.list_contracts(), [])
+        self.assertEqual(index._manifest.entries["broken.pdf"]["status"], "failed")
+        self.assertEqual(index.sync(), (0, 0))
+
+    def test_state_dir_skips_unchanged_files_on_restart(self):
+        _write_contract(os.path.join(self.dir, "a.pdf"), 1)
+        self._index(state_dir=self.state).get_engine()
+
+        restarted = self._index(state_dir=self.state)
+        with patch("rag_engine.contract_index.PDFLoader.extract_text_from_file") as mock_extract:
+            restarted.get_engine()
+        mock_extract.assert_not_called()
+        self.assertEqual([c["id"] for c in restarted.contracts], ["a.pdf"])
+        self.assertFalse(restarted.engine.is_empty)
+
+class TestDirectoryWatcher(unittest.TestCase):
+    def test_reports_changes(self):
+        directory = tempfile.mkdtemp()
+        changed = threading.Event()
+        watcher = DirectoryWatcher(directory, changed.set, poll_seconds=0.2, settle_seconds=0.05)
+        watcher.start()
+        try:
+            with open(os.path.join(directory, "new.pdf"), "wb") as f:
+                f.write(b"%PDF-1.4")
+            self.assertTrue(changed.wait(timeout=5))
+        finally:
+            watcher.stop()
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import threading
+import time
+import unittest
+from ingestion.work_queue import IngestionQueue, QueueFullError
+
+class TestIngestionQueue(unittest.TestCase):
+    def test_small_files_first_and_positions(self):
+        queue = IngestionQueue(workers=1, max_depth=10, size_rate=1000)
+        gate = threading.Event()
+        order = []
+
+        # Occupy the single worker so the rest stay queued
+        queue.submit("blocker", 0, gate.wait)
+        while queue.stats()["active"] == 0:
+            time.sleep(0.01)
+
+        queue.submit("large", 50_000, order.append, "large")
+        queue.submit("small", 10, order.append, "small")
+
+        self.assertEqual(queue.positions(), {"small": 1, "large": 2})
+        self.assertEqual(queue.stats()["depth"], 2)
+
+        gate.set()
+        self.assertTrue(queue.wait_idle(timeout=5))
+        self.assertEqual(order, ["small", "large"])
+        self.assertEqual(queue.positions(), {})
+
+    def test_full_queue_raises(self):
+        queue = IngestionQueue(workers=1, max_depth=1)
+        gate = threading.Event()
+        queue.submit("running", 0, gate.wait)
+        while queue.stats()["active"] == 0:
+            time.sleep(0.01)
+        queue.submit("waiting", 0, lambda: None)
+
+        self.assertTrue(queue.is_full())
+        with self.assertRaises(QueueFullError) as ctx:
+            queue.submit("rejected", 0, lambda: None)
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+
+        gate.set()
+        self.assertTrue(queue.wait_idle(timeout=5))
+
+    def test_failing_job_does_not_kill_worker(self):
+        queue = IngestionQueue(workers=1, max_depth=5)
+        done = []
+        queue.submit("bad", 0, lambda: 1 / 0)
+        queue.submit("good", 0, done.append, True)
+        self.assertTrue(queue.wait_idle(timeout=5))
+        self.assertEqual(done, [True])
+
+if __name__ == '__main__':
+    unittest.main()
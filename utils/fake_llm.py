@@ -0,0 +1,58 @@
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from typing import Any, Iterator, List, Optional
+import itertools
+import time
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for the OpenAI chat model with a tunable cost profile:
+    first_token_latency seconds before the first token, then tokens_per_second
+    (0 = instant). Cycles through `responses`, supports streaming and reports
+    usage_metadata, so the whole chat path (including the rate limiter's
+    token accounting) can be load-tested without network access.
+    """
+    responses: List[str]
+    first_token_latency: float = 0.0
+    tokens_per_second: float = 0.0
+
+    _cycle: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _next_response(self) -> str:
+        if self._cycle is None:
+            self._cycle = itertools.cycle(self.responses)
+        return next(self._cycle)
+
+    def _usage(self, messages: List[BaseMessage], tokens: List[str]) -> dict:
+        # Same rough 4-characters-per-token estimate the rate limiter uses
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        return {"input_tokens": input_tokens, "output_tokens": len(tokens), "total_tokens": input_tokens + len(tokens)}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self._next_response()
+        tokens = text.split()
+        delay = self.first_token_latency
+        if self.tokens_per_second:
+            delay += len(tokens) / self.tokens_per_second
+        if delay:
+            time.sleep(delay)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tokens = self._next_response().split()
+        if self.first_token_latency:
+            time.sleep(self.first_token_latency)
+        for i, token in enumerate(tokens):
+            if i and self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token if i == 0 else " " + token))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, tokens)))
@@ -0,0 +1,323 @@
+from config.settings import settings
+from utils.metrics import LLM_RETRIES
+from typing import Any, Dict, Optional, Tuple
+import random
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Interactive chat traffic is served before background work (metadata extraction)
+PRIORITY_CHAT = "chat"
+PRIORITY_BACKGROUND = "background"
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at rate_per_minute.
+    A rate of 0 disables the bucket (never blocks).
+    Not thread-safe on its own - RateLimiter serialises access.
+    """
+    def __init__(self, rate_per_minute: float, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until `amount` can be taken while leaving `reserve` tokens behind."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        # Never ask for more than the bucket can ever hold
+        needed = min(amount, self.capacity) + reserve * self.capacity
+        needed = min(needed, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        if self.enabled:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Charges (positive) or refunds (negative) tokens after the fact."""
+        if self.enabled:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+class RateLimiter:
+    """
+    Process-wide requests-per-minute and tokens-per-minute limiter.
+    Chat callers always go first: background callers wait while any chat
+    caller is queued and may not dip into the reserved share of either bucket.
+    """
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float,
+                 background_reserve: float = 0.2, clock=time.monotonic):
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self.background_reserve = background_reserve
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._chat_waiting = 0
+        self._blocked_until = 0.0
+
+    def _wait_time(self, tokens: int, priority: str) -> float:
+        reserve = self.background_reserve if priority == PRIORITY_BACKGROUND else 0.0
+        return max(
+            self._blocked_until - self.clock(),
+            self.requests.wait_time(1, reserve),
+            self.tokens.wait_time(tokens, reserve),
+        )
+
+    def acquire(self, tokens: int, priority: str = PRIORITY_CHAT):
+        """Blocks until one request carrying roughly `tokens` tokens may be sent."""
+        with self._cond:
+            is_chat = priority != PRIORITY_BACKGROUND
+            if is_chat:
+                self._chat_waiting += 1
+            try:
+                while True:
+                    if not is_chat and self._chat_waiting:
+                        # Re-checked when a chat caller finishes acquiring
+                        self._cond.wait(timeout=0.5)
+                        continue
+                    wait = self._wait_time(tokens, priority)
+                    if wait <= 0:
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        return
+                    self._cond.wait(timeout=wait)
+            finally:
+                if is_chat:
+                    self._chat_waiting -= 1
+                    self._cond.notify_all()
+
+    def reconcile(self, estimated: int, actual: int):
+        """Corrects the token bucket once the real usage of a call is known."""
+        with self._cond:
+            self.tokens.adjust(actual - estimated)
+
+    def pause(self, seconds: float):
+        """Stops all callers for `seconds`, e.g. after the API returned 429."""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, self.clock() + seconds)
+
+def _estimate_tokens(messages) -> int:
+    # ~4 characters per token plus a budget for the completion
+    if isinstance(messages, str):
+        chars = len(messages)
+    else:
+        chars = sum(len(getattr(m, "content", m) or "") for m in messages)
+    return chars // 4 + settings.LLM_COMPLETION_TOKEN_ESTIMATE
+
+def _actual_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict) and usage.get("total_tokens"):
+        return usage["total_tokens"]
+    return None
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(error: Exception) -> bool:
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    name = type(error).__name__
+    return name in ("APIConnectionError", "APITimeoutError", "RateLimitError", "Timeout", "ConnectError")
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    """Exponential backoff with full jitter, never shorter than Retry-After."""
+    ceiling = min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+class RateLimitedLLM:
+    """
+    Wraps a chat model so every invoke() goes through the shared limiter and
+    is retried with jittered backoff on 429s and transient errors.
+    """
+    def __init__(self, llm, limiter: RateLimiter, priority: str = PRIORITY_CHAT, max_retries: int = None,
+                 pool: "ClientPool" = None):
+        self.llm = llm
+        self.limiter = limiter
+        self.priority = priority
+        self.max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.pool = pool
+
+    def invoke(self, messages, **kwargs):
+        if self.pool is None:
+            return self._invoke(messages, **kwargs)
+        # The connection pool stays open until every call on it, retries included, is done
+        with self.pool:
+            return self._invoke(messages, **kwargs)
+
+    def _invoke(self, messages, **kwargs):
+        estimated = _estimate_tokens(messages)
+        attempt = 0
+        while True:
+            self.limiter.acquire(estimated, self.priority)
+            try:
+                response = self.llm.invoke(messages, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt, _retry_after(e))
+                if getattr(e, "status_code", None) == 429:
+                    # Everyone backs off, not just this caller
+                    self.limiter.pause(delay)
+                logger.warning(f"LLM call failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                LLM_RETRIES.inc(priority=self.priority)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            actual = _actual_tokens(response)
+            if actual is not None:
+                self.limiter.reconcile(estimated, actual)
+            return response
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+class ClientPool:
+    """
+    A ChatOpenAI client and its keep-alive HTTP connection pool. Calls are
+    counted while they run; a retired pool is closed when the last one ends.
+    """
+    def __init__(self, client, http_client=None):
+        self.client = client
+        self.http_client = http_client
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.retired = False
+        self.closed = False
+
+    def __enter__(self):
+        with self._lock:
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.in_flight -= 1
+            close = self.retired and self.in_flight == 0
+        if close:
+            self.close()
+
+    def retire(self):
+        """Closes the pool now if idle, otherwise after the last running call."""
+        with self._lock:
+            self.retired = True
+            close = self.in_flight == 0
+        if close:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if self.closed or self.http_client is None:
+                return
+            self.closed = True
+        try:
+            self.http_client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client: {e}")
+
+class LLMClientRegistry:
+    """
+    Holds one ChatOpenAI client (and its keep-alive HTTP connection pool) per
+    API key/model, shared by the chat engine and metadata extraction.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple[str, str], ClientPool] = {}
+        self.limiter = RateLimiter(
+            settings.LLM_REQUESTS_PER_MINUTE,
+            settings.LLM_TOKENS_PER_MINUTE,
+            background_reserve=settings.LLM_BACKGROUND_RESERVE,
+        )
+
+    def get(self, priority: str = PRIORITY_CHAT, api_key: str = None, model: str = None) -> RateLimitedLLM:
+        api_key = api_key or settings.OPENAI_API_KEY
+        model = model or settings.OPENAI_MODEL
+        if not api_key:
+            raise ValueError("OpenAI API Key is missing. Please set the OPENAI_API_KEY environment variable.")
+
+        key = (api_key, model)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ClientPool(*self._create_client(api_key, model))
+                self._pools[key] = pool
+        return RateLimitedLLM(pool.client, self.limiter, priority=priority, pool=pool)
+
+    def _create_client(self, api_key: str, model: str) -> Tuple[Any, Any]:
+        """Returns a ChatOpenAI client and the httpx client holding its connections."""
+        import httpx
+        from langchain_openai import ChatOpenAI
+
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+            ),
+            timeout=settings.LLM_REQUEST_TIMEOUT,
+        )
+        logger.info(f"Created shared LLM client for model {model}")
+        # Retries are handled by RateLimitedLLM so they respect the shared limiter
+        client = ChatOpenAI(
+            openai_api_key=api_key,
+            model=model,
+            temperature=0,
+            max_retries=0,
+            http_client=http_client,
+        )
+        return client, http_client
+
+    def reset(self):
+        """Drops all cached clients and closes their connection pools."""
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+    def retire_other_keys(self, api_key: str):
+        """
+        Drops cached clients for every key except api_key (after a key
+        rotation). Each connection pool is closed once the calls still running
+        on it, retries and backoff included, have finished.
+        """
+        with self._lock:
+            stale = [key for key in self._pools if key[0] != api_key]
+            pools = [self._pools.pop(key) for key in stale]
+        for pool in pools:
+            pool.retire()
+
+registry = LLMClientRegistry()
+
+def get_llm(priority: str = PRIORITY_CHAT) -> RateLimitedLLM:
+    """Returns the shared, rate-limited LLM client for the configured key and model."""
+    return registry.get(priority=priority)
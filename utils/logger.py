@@ -1,17 +1,120 @@
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+import atexit
+import json
 import logging
+import queue
 import sys
+import threading
+import zlib
 from config.settings import settings
 
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Correlation ID of the HTTP request (or the job it started) being handled
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+class _ContextFilter(logging.Filter):
+    """
+    Tags records with the current request ID and samples INFO/DEBUG lines per
+    request: a request keeps all of its lines or none, so sampled logs still
+    read as complete traces. Warnings, errors and lines outside a request are
+    always kept.
+    """
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rid = request_id.get()
+        record.request_id = rid
+        if rid is None or self.sample_rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        return zlib.crc32(rid.encode()) / 0xFFFFFFFF < self.sample_rate
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        rid = getattr(record, "request_id", None)
+        return f"{line} [request_id={rid}]" if rid else line
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with extra={...} are included."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        rid = getattr(record, "request_id", None)
+        if rid:
+            entry["request_id"] = rid
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the writer thread; drops them if it has fallen behind."""
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze the message now (its arguments may change later); timestamps,
+        # JSON encoding and the write itself happen on the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_install_lock = threading.Lock()
+_handler: Optional[logging.Handler] = None
+
+def _install() -> logging.Handler:
+    """Attaches the process-wide handler to the root logger (once)."""
+    global _handler
+    with _install_lock:
+        if _handler is not None:
+            return _handler
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+        if settings.LOG_ASYNC:
+            handler = _NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+            listener = QueueListener(handler.queue, stream)
+            listener.start()
+            # Flush what is still queued when the process exits
+            atexit.register(listener.stop)
+        else:
+            handler = stream
+        handler.addFilter(_ContextFilter(settings.LOG_INFO_SAMPLE_RATE))
+        logging.getLogger().addHandler(handler)
+        _handler = handler
+        return handler
+
+def dropped_records() -> int:
+    """Log records dropped because the writer thread could not keep up."""
+    return getattr(_handler, "dropped", 0)
+
 def setup_logger(name: str):
     logger = logging.getLogger(name)
     logger.setLevel(settings.LOG_LEVEL)
-
-    if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-
+    # Records propagate to the single shared handler on the root logger
+    _install()
     return logger
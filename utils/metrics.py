@@ -0,0 +1,217 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+import math
+import threading
+import time
+from config.settings import settings
+from utils.profiling import active_profile
+
+# Latency buckets in seconds, from sub-millisecond searches to minute-long OCR
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), fn: Callable = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        # fn is read at scrape time: a number, or {label values tuple: number}
+        self.fn = fn
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        if self.fn is not None:
+            value = self.fn()
+            values = value if isinstance(value, dict) else {(): value}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}" for key, v in values.items()]
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 stage: str = None):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Pipeline stage name for the per-request breakdown of profiled requests
+        self.stage = stage
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        if self.stage is not None:
+            session = active_profile.get()
+            if session is not None:
+                session.add_stage(self.stage, value)
+        if not settings.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager that observes the time spent in its block."""
+        return _Timer(self, labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        lines = []
+        for key, (counts, total) in series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+class _Timer:
+    # A plain class rather than @contextmanager: this sits on the search path
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text format. Recording is
+    a dict update under a per-metric lock; gauges backed by a function are
+    only evaluated when /metrics is scraped.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Re-registering (e.g. module reloaded in tests) replaces the old one
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = (), fn: Callable = None) -> Counter:
+        return self.register(Counter(name, documentation, labels, fn))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = (), fn: Callable = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, fn))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+                  stage: str = None) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets, stage))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                # A failing gauge callback must not break the whole scrape
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# Pipeline stages
+PDF_PAGE_SECONDS = registry.histogram("chatbot_pdf_extract_page_seconds", "Text layer extraction time per PDF page", stage="pdf_extract")
+OCR_PAGE_SECONDS = registry.histogram("chatbot_ocr_page_seconds", "OCR time per page (rasterising plus recognition)", stage="ocr")
+SPLIT_SECONDS = registry.histogram("chatbot_split_seconds", "Time to split one document into chunks", stage="split")
+SPLIT_CHUNKS = registry.counter("chatbot_split_chunks_total", "Chunks produced by the text splitter")
+EMBED_BATCH_SECONDS = registry.histogram("chatbot_embed_batch_seconds", "Embedding time per batch of chunks", stage="embed")
+EMBED_BATCH_SIZE = registry.histogram("chatbot_embed_batch_size", "Chunks per embedding batch", buckets=SIZE_BUCKETS)
+SEARCH_SECONDS = registry.histogram("chatbot_search_seconds", "FAISS similarity search time", labels=("kind", "filtered"), stage="search")
+LLM_SECONDS = registry.histogram("chatbot_llm_request_seconds", "LLM call latency including retries", labels=("priority", "outcome"), stage="llm")
+LLM_TOKENS = registry.counter("chatbot_llm_tokens_total", "LLM tokens reported by the API", labels=("priority", "kind"))
+LLM_RETRIES = registry.counter("chatbot_llm_retries_total", "LLM calls retried after a transient error", labels=("priority",))
+METADATA_SECONDS = registry.histogram("chatbot_metadata_extraction_seconds", "Metadata extraction time per contract", labels=("llm",), stage="metadata")
+METADATA_FIELDS_FILLED = registry.counter("chatbot_metadata_fields_total", "Metadata fields filled, by extractor", labels=("source",))
+
+class _LLMCall:
+    def __init__(self):
+        self.response = None
+
+    def record(self, response):
+        self.response = response
+        return response
+
+@contextmanager
+def observe_llm(priority: str):
+    """
+    Times one LLM call and counts the tokens the response reports:
+
+        with observe_llm(PRIORITY_CHAT) as call:
+            response = call.record(llm.invoke(messages))
+    """
+    call = _LLMCall()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield call
+        outcome = "ok"
+    finally:
+        LLM_SECONDS.observe(time.perf_counter() - started, priority=priority, outcome=outcome)
+        usage = getattr(call.response, "usage_metadata", None)
+        if isinstance(usage, dict):
+            LLM_TOKENS.inc(usage.get("input_tokens", 0), priority=priority, kind="prompt")
+            LLM_TOKENS.inc(usage.get("output_tokens", 0), priority=priority, kind="completion")
@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+import uuid
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# The profile the current request or job belongs to; None when not profiling,
+# so the only cost for everyone else is one ContextVar lookup per stage timing
+active_profile: ContextVar[Optional["ProfileSession"]] = ContextVar("active_profile", default=None)
+
+class ProfileSession:
+    """
+    One profiled request or background job: cProfile data from every thread
+    that worked on it, plus seconds and calls per pipeline stage (recorded by
+    the stage histograms in utils.metrics while the session is active).
+    """
+    def __init__(self, profile_id: str, kind: str, label: str):
+        self.id = profile_id
+        self.kind = kind
+        self.label = label
+        self.status = "pending"
+        self.created_at = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.stages: Dict[str, List[float]] = {}
+        self.notes: List[str] = []
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._stats: Optional[pstats.Stats] = None
+
+    def add_stage(self, stage: str, seconds: float):
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def run_profiled(self):
+        """Context manager: profiles the calling thread as part of this session."""
+        return _ThreadProfile(self)
+
+    def finish(self, duration: float, error: str = None):
+        with self._lock:
+            profiles = list(self._profiles)
+        if profiles:
+            self._stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                self._stats.add(profile)
+        self.duration = round(duration, 4)
+        self.error = error
+        self.status = "failed" if error else "done"
+
+    def report(self, top: int = 40, sort: str = "cumulative") -> str:
+        if self._stats is None:
+            return ""
+        out = io.StringIO()
+        self._stats.stream = out
+        self._stats.sort_stats(sort).print_stats(top)
+        return out.getvalue()
+
+    def pstats_bytes(self) -> bytes:
+        """Same bytes as pstats.Stats.dump_stats, loadable by pstats or snakeviz."""
+        return marshal.dumps(self._stats.stats) if self._stats is not None else b""
+
+    def summary(self) -> dict:
+        with self._lock:
+            stages = {name: {"seconds": round(total, 4), "calls": calls} for name, (total, calls) in self.stages.items()}
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "label": self.label,
+            "status": self.status,
+            "created_at": self.created_at,
+            "duration_seconds": self.duration,
+            "error": self.error,
+            "stages": stages,
+            "notes": self.notes,
+        }
+
+class _ThreadProfile:
+    def __init__(self, session: ProfileSession):
+        self.session = session
+
+    def __enter__(self):
+        self.token = active_profile.set(self.session)
+        self.profile = cProfile.Profile()
+        try:
+            self.profile.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows only one); keep stage timings
+            self.profile = None
+            self.session.notes.append("cProfile unavailable in one thread: another profiler was active")
+        return self.session
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.disable()
+            with self.session._lock:
+                self.session._profiles.append(self.profile)
+        active_profile.reset(self.token)
+
+def bind(fn: Callable) -> Callable:
+    """
+    Returns fn unchanged unless the caller is being profiled; then fn is
+    wrapped so the thread it is handed to (e.g. a pool worker) joins the
+    same profile.
+    """
+    session = active_profile.get()
+    if session is None:
+        return fn
+
+    def run(*args, **kwargs):
+        with session.run_profiled():
+            return fn(*args, **kwargs)
+    return run
+
+class ProfileStore:
+    """The last max_profiles profiles, kept in memory for the admin endpoints."""
+    def __init__(self, max_profiles: int = 50):
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, ProfileSession]" = OrderedDict()
+
+    def create(self, kind: str, label: str) -> ProfileSession:
+        session = ProfileSession(uuid.uuid4().hex[:12], kind, label[:200])
+        with self._lock:
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_profiles:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, profile_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            return self._sessions.get(profile_id)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [s.summary() for s in reversed(sessions)]
+
+    def profile(self, session: ProfileSession):
+        """Context manager that profiles the calling thread and finishes the session on exit."""
+        return _SessionRun(session)
+
+class _SessionRun:
+    def __init__(self, session: ProfileSession):
+        self.session = session
+        self.thread_profile = session.run_profiled()
+
+    def __enter__(self):
+        self.session.status = "running"
+        self.started = time.perf_counter()
+        self.thread_profile.__enter__()
+        return self.session
+
+    def __exit__(self, exc_type, exc, tb):
+        self.thread_profile.__exit__(exc_type, exc, tb)
+        self.session.finish(time.perf_counter() - self.started, error=repr(exc) if exc is not None else None)
+        logger.info(f"Profile {self.session.id} ({self.session.kind}: {self.session.label}) took {self.session.duration}s")